@@ -0,0 +1,82 @@
+"""
+Analysis upload/poll benchmark against the local File API stub (no network).
+
+Runs N concurrent analyses with the legacy blocking upload/poll loop and with the
+async path, reporting wall time and the worst event-loop stall seen by a heartbeat.
+
+Usage:
+    uv run benchmarks/analysis_benchmark.py [--jobs 8] [--upload 0.5] [--processing 2]
+"""
+import os
+import sys
+import time
+import asyncio
+import argparse
+import tempfile
+from pathlib import Path
+
+root_path = str(Path(__file__).parent.parent)
+if root_path not in sys.path:
+    sys.path.append(root_path)
+
+os.environ.setdefault("GEMINI_API_KEY", "benchmark")
+os.environ.setdefault("LANGFUSE_PUBLIC_KEY", "benchmark")
+os.environ.setdefault("LANGFUSE_SECRET_KEY", "benchmark")
+
+from pydantic_ai.models.test import TestModel
+from src.agents import analyst
+from src.core.registry import registry
+from benchmarks.file_api_stub import StubGenaiClient
+
+async def legacy_upload_video(video_path: str):
+    """The pre-async implementation: sync upload + time.sleep polling on the event loop."""
+    video_file = registry.genai_client().files.upload(file=video_path)
+    while video_file.state.name == "PROCESSING":
+        time.sleep(2)
+        video_file = registry.genai_client().files.get(name=video_file.name)
+    return video_file
+
+async def heartbeat(stop: asyncio.Event, interval: float = 0.05) -> float:
+    """Measures the longest gap between ticks, i.e. how long the loop was blocked."""
+    loop = asyncio.get_running_loop()
+    worst = 0.0
+    last = loop.time()
+    while not stop.is_set():
+        await asyncio.sleep(interval)
+        now = loop.time()
+        worst = max(worst, now - last - interval)
+        last = now
+    return worst
+
+async def run(label: str, video_path: str, jobs: int):
+    stop = asyncio.Event()
+    beat = asyncio.create_task(heartbeat(stop))
+
+    t0 = time.perf_counter()
+    with analyst.analyst_agent.override(model=TestModel()):
+        await asyncio.gather(*(analyst.run_analysis(video_path) for _ in range(jobs)))
+    elapsed = time.perf_counter() - t0
+
+    stop.set()
+    stall = await beat
+    print(f"{label:<8} {jobs} analyses in {elapsed:6.2f}s | worst loop stall {stall * 1000:8.1f} ms")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--jobs", type=int, default=8)
+    parser.add_argument("--upload", type=float, default=0.5, help="Simulated upload latency (s)")
+    parser.add_argument("--processing", type=float, default=2.0, help="Simulated PROCESSING window (s)")
+    args = parser.parse_args()
+
+    registry.override("genai_client", StubGenaiClient(upload_latency=args.upload, processing_seconds=args.processing))
+
+    with tempfile.NamedTemporaryFile(suffix=".mp4") as video:
+        original = analyst.upload_video
+        analyst.upload_video = legacy_upload_video
+        asyncio.run(run("legacy", video.name, args.jobs))
+
+        analyst.upload_video = original
+        asyncio.run(run("async", video.name, args.jobs))
+
+if __name__ == "__main__":
+    main()
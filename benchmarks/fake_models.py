@@ -0,0 +1,116 @@
+"""
+Deterministic stand-ins for the Gemini agents, built on pydantic-ai FunctionModel.
+
+Each fake waits `latency` seconds (streamed responses spread it across chunks) and derives
+its structured output from the prompt, so results are valid for the real pipeline:
+- analyst: clips on the local pre-analysis candidates when present, else evenly spaced
+- copywriter (clip / strategy / single brief): posts for every platform of every clip
+"""
+import json
+import asyncio
+from pydantic_ai.messages import ModelResponse, TextPart, ToolCallPart, UserPromptPart
+from pydantic_ai.models.function import AgentInfo, DeltaToolCall, FunctionModel
+
+PLATFORMS = ("TikTok", "YouTube", "LinkedIn")
+
+def _prompt(messages: list) -> str:
+    for message in reversed(messages):
+        for part in getattr(message, "parts", []):
+            if isinstance(part, UserPromptPart) and isinstance(part.content, str):
+                return part.content
+    return ""
+
+def _json_after(text: str, marker: str) -> dict:
+    """First JSON object in `text` at or after `marker`."""
+    start = text.find(marker)
+    if start < 0:
+        return {}
+    return json.JSONDecoder().raw_decode(text, text.index("{", start))[0]
+
+def _ts(seconds: float) -> str:
+    seconds = int(seconds)
+    return f"{seconds // 60:02d}:{seconds % 60:02d}"
+
+def _seconds(ts: str) -> float:
+    minutes, _, rest = ts.partition(":")
+    return int(minutes) * 60 + float(rest or 0)
+
+def _posts(clip_index: int) -> list:
+    return [
+        {
+            "platform": platform,
+            "content": f"Clip {clip_index} for {platform}: the moment you can't scroll past. Watch till the end.",
+            "hashtags": ["#benchmark", f"#{platform.lower()}", f"#clip{clip_index}"]
+        }
+        for platform in PLATFORMS
+    ]
+
+def _output_call(info: AgentInfo, args: dict) -> ModelResponse:
+    return ModelResponse(parts=[ToolCallPart(tool_name=info.output_tools[0].name, args=args)])
+
+# 1. ANALYST
+def analyst_model(latency: float, clips: int, duration: float, clip_seconds: int = 20) -> FunctionModel:
+    async def analyze(messages: list, info: AgentInfo) -> ModelResponse:
+        await asyncio.sleep(latency)
+        prompt = _prompt(messages)
+
+        candidates = _json_after(prompt, '{"candidates"').get("candidates", [])
+        if candidates:
+            best = sorted(candidates, key=lambda c: -c["score"])[:clips]
+            spans = sorted((_seconds(c["start"]), _seconds(c["end"])) for c in best)
+        else:
+            step = duration / clips
+            spans = [(i * step, min(i * step + clip_seconds, duration)) for i in range(clips)]
+
+        return _output_call(info, {
+            "main_topic": "Synthetic benchmark footage",
+            "suggested_titles": ["Benchmark run"],
+            "clips": [
+                {
+                    "start": _ts(start),
+                    "end": _ts(end),
+                    "visual_description": f"Test pattern segment {i}",
+                    "narrative_hook": f"Synthetic hook {i}",
+                    "score": 8
+                }
+                for i, (start, end) in enumerate(spans, 1)
+            ]
+        })
+    return FunctionModel(analyze, model_name="fake-analyst")
+
+# 2. COPYWRITER
+def _clip_strategy(clip: dict) -> dict:
+    duration = int(_seconds(clip["end"]) - _seconds(clip["start"]))
+    return {"clip_index": clip["clip_index"], "duration_seconds": duration, "posts": _posts(clip["clip_index"])}
+
+def clip_model(latency: float, chunks: int = 8) -> FunctionModel:
+    """Per-clip fan-out agent; streams its JSON arguments in `chunks` pieces."""
+    async def write(messages: list, info: AgentInfo) -> ModelResponse:
+        await asyncio.sleep(latency)
+        return _output_call(info, _clip_strategy(_json_after(_prompt(messages), "{")["clip"]))
+
+    async def stream(messages: list, info: AgentInfo):
+        args = json.dumps(_clip_strategy(_json_after(_prompt(messages), "{")["clip"]))
+        size = -(-len(args) // chunks)
+        for i in range(0, len(args), size):
+            await asyncio.sleep(latency / chunks)
+            yield {0: DeltaToolCall(name=info.output_tools[0].name if i == 0 else None, json_args=args[i:i + size])}
+    return FunctionModel(write, stream_function=stream, model_name="fake-copywriter-clip")
+
+def strategy_model(latency: float) -> FunctionModel:
+    async def write(messages: list, info: AgentInfo) -> ModelResponse:
+        await asyncio.sleep(latency)
+        topic = _json_after(_prompt(messages), "{").get("main_topic", "")
+        return ModelResponse(parts=[TextPart(f"Lead with the strongest visual beat of '{topic}' on every platform.")])
+    return FunctionModel(write, model_name="fake-copywriter-strategy")
+
+def brief_model(latency: float) -> FunctionModel:
+    """Single-call copywriter (COPY_MODE=single)."""
+    async def write(messages: list, info: AgentInfo) -> ModelResponse:
+        await asyncio.sleep(latency)
+        payload = _json_after(_prompt(messages), "{")
+        return _output_call(info, {
+            "overall_strategy": f"Lead with the strongest visual beat of '{payload.get('main_topic', '')}'.",
+            "clip_strategies": [_clip_strategy(clip) for clip in payload.get("clips", [])]
+        })
+    return FunctionModel(write, model_name="fake-copywriter")
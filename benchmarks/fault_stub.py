@@ -0,0 +1,110 @@
+"""
+Fault-injecting stand-ins for Gemini and Qdrant, used to exercise core/resilience.py offline.
+
+A FaultPlan decides per call whether it fails, the way the real services do:
+- a server-side quota (token bucket): calls beyond it get 429 with Retry-After
+- a steady share of random 503s
+- an outage window (seconds after the plan starts) in which every call gets 503
+
+Errors are pydantic-ai ModelHTTPErrors for models and, for SDK calls, exceptions with
+`status_code` and a `response` carrying headers, like google-genai's and qdrant-client's.
+"""
+import time
+import random
+import threading
+from collections import Counter
+from contextlib import asynccontextmanager
+from types import SimpleNamespace
+from typing import Optional, Tuple
+from pydantic_ai.exceptions import ModelHTTPError
+from pydantic_ai.models.wrapper import WrapperModel
+
+class InjectedError(Exception):
+    def __init__(self, status_code: int, retry_after: Optional[float] = None):
+        super().__init__(f"injected HTTP {status_code}")
+        self.status_code = status_code
+        headers = {"retry-after": f"{retry_after:g}"} if retry_after else {}
+        self.response = SimpleNamespace(status_code=status_code, headers=headers)
+
+class FaultPlan:
+    """Shared by every stub of one service; thread-safe."""
+
+    def __init__(
+        self,
+        quota_per_s: float = 0,
+        burst: float = 1,
+        error_rate: float = 0.0,
+        outage: Optional[Tuple[float, float]] = None,
+        seed: int = 0
+    ):
+        self.quota_per_s = quota_per_s
+        self.burst = max(burst, 1)
+        self.error_rate = error_rate
+        self.outage = outage
+        self.started = time.monotonic()
+        self.counts = Counter()
+        self._tokens = self.burst
+        self._refilled = self.started
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def check(self) -> Optional[Tuple[int, Optional[float]]]:
+        """(status, retry_after) of the fault to inject into this call, or None to let it through."""
+        with self._lock:
+            now = time.monotonic()
+            self.counts["calls"] += 1
+            if self.outage and self.outage[0] <= now - self.started < self.outage[1]:
+                self.counts["503_outage"] += 1
+                return 503, None
+            if self.quota_per_s:
+                self._tokens = min(self.burst, self._tokens + (now - self._refilled) * self.quota_per_s)
+                self._refilled = now
+                if self._tokens < 1:
+                    self.counts["429"] += 1
+                    return 429, round((1 - self._tokens) / self.quota_per_s, 2)
+                self._tokens -= 1
+            if self._random.random() < self.error_rate:
+                self.counts["503"] += 1
+                return 503, None
+            self.counts["ok"] += 1
+            return None
+
+    def raise_fault(self):
+        fault = self.check()
+        if fault:
+            raise InjectedError(*fault)
+
+    def wrap_async(self, fn):
+        async def call(*args, **kwargs):
+            self.raise_fault()
+            return await fn(*args, **kwargs)
+        return call
+
+    def wrap_sync(self, fn):
+        def call(*args, **kwargs):
+            self.raise_fault()
+            return fn(*args, **kwargs)
+        return call
+
+class FaultyModel(WrapperModel):
+    """Fails model requests per the plan before they reach the wrapped (fake) model."""
+
+    def __init__(self, wrapped, plan: FaultPlan):
+        super().__init__(wrapped)
+        self.plan = plan
+
+    def _raise_fault(self):
+        fault = self.plan.check()
+        if fault:
+            raise ModelHTTPError(status_code=fault[0], model_name=self.model_name, body="injected")
+
+    async def request(self, *args, **kwargs):
+        self._raise_fault()
+        return await self.wrapped.request(*args, **kwargs)
+
+    @asynccontextmanager
+    async def request_stream(self, *args, **kwargs):
+        # Real streams fail on the first round trip, before any data arrives
+        self._raise_fault()
+        async with self.wrapped.request_stream(*args, **kwargs) as response:
+            yield response
@@ -0,0 +1,89 @@
+"""
+Local stand-in for the Gemini File API (google-genai `client.files` / `client.aio.files`)
+and for text embeddings (`client.models.embed_content`).
+
+Uploads take `upload_latency` seconds and files stay PROCESSING for `processing_seconds`
+after upload, so upload/poll behaviour can be measured without network access.
+Embeddings are deterministic pseudo-random unit vectors seeded by the text.
+"""
+import time
+import asyncio
+import uuid
+import hashlib
+from types import SimpleNamespace
+import numpy as np
+
+class StubFileAPI:
+    """Shared state behind the sync and async stub surfaces."""
+
+    def __init__(self, upload_latency: float = 0.5, processing_seconds: float = 2.0, request_latency: float = 0.02):
+        self.upload_latency = upload_latency
+        self.processing_seconds = processing_seconds
+        self.request_latency = request_latency
+        self.uploaded = {}
+        self.calls = {"upload": 0, "get": 0}
+
+    def _register(self, path: str):
+        name = f"files/{uuid.uuid4().hex[:12]}"
+        self.uploaded[name] = time.monotonic()
+        self.calls["upload"] += 1
+        return self._file(name)
+
+    def _file(self, name: str):
+        ready = time.monotonic() - self.uploaded[name] >= self.processing_seconds
+        return SimpleNamespace(
+            name=name,
+            uri=f"https://stub.local/{name}",
+            mime_type="video/mp4",
+            state=SimpleNamespace(name="ACTIVE" if ready else "PROCESSING")
+        )
+
+class _SyncFiles:
+    def __init__(self, api: StubFileAPI):
+        self.api = api
+
+    def upload(self, file: str):
+        time.sleep(self.api.upload_latency)
+        return self.api._register(file)
+
+    def get(self, name: str):
+        time.sleep(self.api.request_latency)
+        self.api.calls["get"] += 1
+        return self.api._file(name)
+
+class _AsyncFiles:
+    def __init__(self, api: StubFileAPI):
+        self.api = api
+
+    async def upload(self, file: str):
+        await asyncio.sleep(self.api.upload_latency)
+        return self.api._register(file)
+
+    async def get(self, name: str):
+        await asyncio.sleep(self.api.request_latency)
+        self.api.calls["get"] += 1
+        return self.api._file(name)
+
+class _Models:
+    def __init__(self, dimensions: int, latency: float):
+        self.dimensions = dimensions
+        self.latency = latency
+
+    def _vector(self, text: str) -> list:
+        seed = int.from_bytes(hashlib.sha256(text.encode("utf-8")).digest()[:8], "little")
+        vector = np.random.default_rng(seed).standard_normal(self.dimensions).astype(np.float32)
+        return (vector / np.linalg.norm(vector)).tolist()
+
+    def embed_content(self, model: str, contents):
+        time.sleep(self.latency)
+        texts = [contents] if isinstance(contents, str) else contents
+        return SimpleNamespace(embeddings=[SimpleNamespace(values=self._vector(t)) for t in texts])
+
+class StubGenaiClient:
+    """Drop-in replacement for `genai.Client` as used by the analyst and memory modules."""
+
+    def __init__(self, embed_dimensions: int = 768, embed_latency: float = 0.05, **kwargs):
+        self.api = StubFileAPI(**kwargs)
+        self.files = _SyncFiles(self.api)
+        self.models = _Models(embed_dimensions, embed_latency)
+        self.aio = SimpleNamespace(files=_AsyncFiles(self.api))
@@ -0,0 +1,85 @@
+"""
+API cold-start benchmark based on `python -X importtime`.
+
+Imports the target module in fresh interpreters and reports the cumulative import
+time (median of --runs), interpreter wall time, and the heaviest top-level packages.
+With --budget-ms the script exits non-zero when the median import exceeds the budget,
+so CI can track cold-start regressions.
+
+Usage:
+    uv run benchmarks/import_benchmark.py [--module src.api.main] [--runs 5] [--top 15] [--budget-ms 800]
+"""
+import os
+import sys
+import time
+import argparse
+import statistics
+import subprocess
+from pathlib import Path
+
+root_path = str(Path(__file__).parent.parent)
+
+def parse_importtime(stderr: str) -> dict:
+    """{module: (self_us, cumulative_us)} from -X importtime output."""
+    timings = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        fields = line[len("import time:"):].split("|")
+        if len(fields) == 3:
+            timings[fields[2].strip()] = (int(fields[0]), int(fields[1]))
+    return timings
+
+def import_once(module: str) -> tuple:
+    """Returns (interpreter wall seconds, importtime table) for one cold import."""
+    env = dict(os.environ)
+    # Settings require these keys; importing must never call Gemini or Langfuse
+    for key in ("GEMINI_API_KEY", "LANGFUSE_PUBLIC_KEY", "LANGFUSE_SECRET_KEY"):
+        env.setdefault(key, "benchmark")
+
+    t0 = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=root_path, env=env, capture_output=True, text=True
+    )
+    wall = time.perf_counter() - t0
+    if proc.returncode != 0:
+        raise RuntimeError(f"Importing {module} failed:\n{proc.stderr[-2000:]}")
+    return wall, parse_importtime(proc.stderr)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--module", default="src.api.main")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15, help="Heaviest top-level packages to list")
+    parser.add_argument("--budget-ms", type=float, help="Fail when the median import exceeds this")
+    args = parser.parse_args()
+
+    # First run warms the bytecode cache so every measured run is comparable
+    import_once(args.module)
+
+    walls, totals, packages = [], [], {}
+    for _ in range(args.runs):
+        wall, timings = import_once(args.module)
+        walls.append(wall)
+        totals.append(timings.get(args.module, (0, 0))[1] / 1000)
+        for name, (self_us, _) in timings.items():
+            top = name.split(".")[0]
+            packages.setdefault(top, []).append(self_us / 1000)
+
+    median_ms = statistics.median(totals)
+    print(f"{args.module}: import {median_ms:.0f} ms median "
+          f"(min {min(totals):.0f}, max {max(totals):.0f}) | interpreter wall {statistics.median(walls) * 1000:.0f} ms")
+
+    # Self time summed per top-level package, averaged over runs
+    heaviest = sorted(((sum(v) / args.runs, k) for k, v in packages.items()), reverse=True)[:args.top]
+    print(f"\n{'package':<32}{'ms':>8}")
+    for ms, name in heaviest:
+        print(f"{name:<32}{ms:>8.1f}")
+
+    if args.budget_ms is not None and median_ms > args.budget_ms:
+        print(f"\n❌ Import time {median_ms:.0f} ms exceeds budget {args.budget_ms:.0f} ms")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
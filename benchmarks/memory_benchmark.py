@@ -0,0 +1,168 @@
+"""
+Qdrant layout benchmark for the content_memory collection.
+
+Loads N synthetic campaigns into a scratch collection per configuration (baseline,
+int8 quantization, on-disk vectors, ...) and reports memory use plus filtered and
+unfiltered query latency and recall@10 against exact search.
+
+Usage:
+    uv run benchmarks/memory_benchmark.py [--url http://localhost:6333] [--points 20000] [--queries 200]
+
+--url ":memory:" runs against the in-process Qdrant (no indexes/quantization there,
+memory is this process's RSS). With a server, memory is Qdrant's resident set
+reported by its /metrics endpoint.
+"""
+import os
+import sys
+import time
+import random
+import argparse
+import urllib.request
+from pathlib import Path
+
+root_path = str(Path(__file__).parent.parent)
+if root_path not in sys.path:
+    sys.path.append(root_path)
+
+# Settings require these keys even though the benchmark never calls Gemini or Langfuse
+os.environ.setdefault("GEMINI_API_KEY", "benchmark")
+os.environ.setdefault("LANGFUSE_PUBLIC_KEY", "benchmark")
+os.environ.setdefault("LANGFUSE_SECRET_KEY", "benchmark")
+
+import numpy as np
+from qdrant_client.models import CollectionStatus, PointStruct, SearchParams
+from src.core.stats import LatencyRecorder
+from src.services.memory import create_qdrant_client
+from src.services.memory_schema import CollectionSchema, apply_schema, is_local
+from src.services.retrieval import build_filter
+
+PLATFORMS = ["tiktok", "youtube shorts", "instagram reels", "linkedin", "x"]
+
+CONFIGS = {
+    "baseline": CollectionSchema(),
+    "int8": CollectionSchema(quantization="int8"),
+    "on_disk": CollectionSchema(on_disk=True, on_disk_payload=True, hnsw_on_disk=True),
+    "int8+on_disk": CollectionSchema(quantization="int8", on_disk=True, on_disk_payload=True, hnsw_on_disk=True),
+    "int8+m32": CollectionSchema(quantization="int8", hnsw_m=32, hnsw_ef_construct=200),
+}
+
+def resident_bytes(client, url: str) -> int:
+    """Qdrant server RSS from /metrics, or this process's RSS for local mode."""
+    if is_local(client):
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+        return 0
+    with urllib.request.urlopen(f"{url.rstrip('/')}/metrics", timeout=10) as resp:
+        for line in resp.read().decode().splitlines():
+            if line.startswith("memory_resident_bytes "):
+                return int(float(line.split()[1]))
+    return 0
+
+def synthetic_points(count: int, dim: int, seed: int = 7):
+    rng = np.random.default_rng(seed)
+    vectors = rng.standard_normal((count, dim)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    base_ts = time.time() - 365 * 86400
+    pick = random.Random(seed)
+    for i, vector in enumerate(vectors):
+        yield PointStruct(
+            id=i,
+            vector=vector.tolist(),
+            payload={
+                "type": "campaign_brief",
+                "topic": f"topic {i % 500}",
+                "job_id": f"bench-{i}",
+                "platforms": pick.sample(PLATFORMS, 2),
+                "created_ts": base_ts + pick.random() * 365 * 86400,
+                "timestamp": "",
+                "clips": [],
+            },
+        )
+
+def wait_until_indexed(client, name: str, timeout: float = 600):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if client.get_collection(name).status == CollectionStatus.GREEN:
+            return
+        time.sleep(0.5)
+
+def run_config(client, url: str, label: str, schema: CollectionSchema, points: int, queries: int, batch: int) -> dict:
+    name = f"bench_memory_{label.replace('+', '_')}"
+    if client.collection_exists(name):
+        client.delete_collection(name)
+
+    ram_before = resident_bytes(client, url)
+    apply_schema(client, name, schema)
+
+    t0 = time.perf_counter()
+    buffer = []
+    for point in synthetic_points(points, schema.vector_size):
+        buffer.append(point)
+        if len(buffer) == batch:
+            client.upsert(name, points=buffer, wait=False)
+            buffer = []
+    if buffer:
+        client.upsert(name, points=buffer, wait=True)
+    wait_until_indexed(client, name)
+    load_s = time.perf_counter() - t0
+    ram_after = resident_bytes(client, url)
+
+    rng = np.random.default_rng(99)
+    plain, filtered = LatencyRecorder(queries), LatencyRecorder(queries)
+    recall_hits = 0
+    query_filter = build_filter(platform="tiktok", since=None)
+
+    for _ in range(queries):
+        q = rng.standard_normal(schema.vector_size).astype(np.float32)
+        q = (q / np.linalg.norm(q)).tolist()
+
+        t = time.perf_counter()
+        approx = client.query_points(name, query=q, limit=10, search_params=schema.search_params()).points
+        plain.record(time.perf_counter() - t)
+
+        t = time.perf_counter()
+        client.query_points(name, query=q, query_filter=query_filter, limit=10, search_params=schema.search_params())
+        filtered.record(time.perf_counter() - t)
+
+        exact = client.query_points(name, query=q, limit=10, search_params=SearchParams(exact=True)).points
+        recall_hits += len({p.id for p in approx} & {p.id for p in exact})
+
+    client.delete_collection(name)
+    return {
+        "config": label,
+        "load_s": load_s,
+        "ram_mb": (ram_after - ram_before) / 1024 ** 2,
+        "plain": plain.summary(),
+        "filtered": filtered.summary(),
+        "recall": recall_hits / (queries * 10),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default=os.environ.get("QDRANT_URL", "http://localhost:6333"))
+    parser.add_argument("--points", type=int, default=20000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--batch", type=int, default=256)
+    parser.add_argument("--configs", default=",".join(CONFIGS), help="Comma-separated subset of: " + ", ".join(CONFIGS))
+    args = parser.parse_args()
+
+    client = create_qdrant_client(args.url)
+    print(f"Qdrant: {args.url} | {args.points} campaigns | {args.queries} queries per config\n")
+
+    results = []
+    for label in args.configs.split(","):
+        print(f"-> {label} ...", flush=True)
+        results.append(run_config(client, args.url, label, CONFIGS[label], args.points, args.queries, args.batch))
+
+    print(f"\n{'config':<14}{'load s':>8}{'RAM MB':>9}{'p50 ms':>9}{'p99 ms':>9}{'filt p50':>10}{'filt p99':>10}{'recall@10':>11}")
+    for r in results:
+        print(
+            f"{r['config']:<14}{r['load_s']:>8.1f}{r['ram_mb']:>9.1f}"
+            f"{r['plain']['p50_ms']:>9.2f}{r['plain']['p99_ms']:>9.2f}"
+            f"{r['filtered']['p50_ms']:>10.2f}{r['filtered']['p99_ms']:>10.2f}{r['recall']:>11.3f}"
+        )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,270 @@
+"""
+End-to-end pipeline benchmark: drives `execute_workflow` through the real scheduler.
+
+Everything external is local and deterministic:
+- source videos are synthetic (FFmpeg testsrc2 with scene changes, sine audio)
+- Gemini agents are pydantic-ai FunctionModels with configurable latency (fake_models.py)
+- the File API and embeddings come from the local stub (file_api_stub.py)
+- long-term memory is an in-process Qdrant (QDRANT_URL=":memory:")
+
+Pre-analysis, rendering, dispatch and memory batching run for real. Every job gets its
+own content hash, so caches only help with --warm-cache. Reports throughput, per-stage
+and end-to-end latency percentiles, and peak RSS (API process and render children).
+Runs in a temporary directory, so the repo's data/ and output folders are untouched.
+
+With --baseline (a previous --json report) the script exits non-zero when throughput
+drops, or a stage's p95 / peak RSS grows, by more than --tolerance, so CI can gate deploys.
+
+Usage:
+    uv run benchmarks/pipeline_benchmark.py [--jobs 8] [--concurrency 4] [--duration 90]
+        [--size 1280x720] [--clips 3] [--llm-latency 1.0] [--json report.json]
+        [--baseline baseline.json --tolerance 0.2]
+"""
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+import resource
+import statistics
+import subprocess
+import tempfile
+from pathlib import Path
+
+root_path = str(Path(__file__).parent.parent)
+if root_path not in sys.path:
+    sys.path.append(root_path)
+
+def configure_environment(work_dir: str, args):
+    """Must run before any src import: settings are read once at import time."""
+    os.environ.setdefault("GEMINI_API_KEY", "benchmark")
+    os.environ.setdefault("LANGFUSE_PUBLIC_KEY", "benchmark")
+    os.environ.setdefault("LANGFUSE_SECRET_KEY", "benchmark")
+    # Traces would only measure the network path to Langfuse
+    os.environ.setdefault("LANGFUSE_SAMPLE_RATE", "0")
+    os.environ.update({
+        "QDRANT_URL": ":memory:",
+        "WARM_UP_ON_STARTUP": "false",
+        "LOG_LEVEL": os.environ.get("LOG_LEVEL", "WARNING"),
+        "JOB_STORE_PATH": os.path.join(work_dir, "jobs.db"),
+        "ANALYSIS_CACHE_DIR": os.path.join(work_dir, "analysis_cache"),
+        "COPY_CACHE_DIR": os.path.join(work_dir, "copy_cache"),
+        "PREANALYSIS_DIR": os.path.join(work_dir, "preanalysis"),
+        "RENDITION_CACHE_DIR": os.path.join(work_dir, "renditions"),
+        "MAX_PENDING_JOBS": str(max(args.concurrency, 1)),
+        "PREANALYSIS_MODE": args.preanalysis,
+        "COPY_MODE": args.copy_mode,
+    })
+
+def make_source(path: str, seconds: int, size: str, seed: int):
+    """Test pattern with a hard scene change every 20s, so pre-analysis finds cuts."""
+    scenes = max(1, -(-seconds // 20))
+    patterns = ["testsrc2", "smptebars", "rgbtestsrc", "yuvtestsrc", "smptehdbars"]
+    inputs, labels = [], []
+    for i in range(scenes):
+        pattern = patterns[(i + seed) % len(patterns)]
+        length = min(20, seconds - i * 20)
+        inputs += ["-f", "lavfi", "-i", f"{pattern}=size={size}:rate=25:duration={length}"]
+        labels.append(f"[{i}:v]")
+
+    from imageio_ffmpeg import get_ffmpeg_exe
+    subprocess.run([
+        get_ffmpeg_exe(), "-y", "-loglevel", "error", *inputs,
+        "-f", "lavfi", "-i", f"sine=frequency={330 + 110 * seed}:duration={seconds}",
+        "-filter_complex", f"{''.join(labels)}concat=n={scenes}:v=1:a=0,format=yuv420p[v]",
+        "-map", "[v]", "-map", f"{scenes}:a", "-c:v", "libx264", "-preset", "veryfast",
+        "-c:a", "aac", "-shortest", path
+    ], check=True)
+
+def percentile(values: list, p: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(p / 100 * (len(ordered) - 1))))]
+
+def peak_rss_mb() -> dict:
+    """ru_maxrss is in KiB on Linux; children covers reaped render workers and FFmpeg."""
+    return {
+        "api_process": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        "children": round(resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024, 1)
+    }
+
+async def run_jobs(main, sources: list, args) -> dict:
+    """Submits --jobs jobs keeping --concurrency in flight; returns per-job records."""
+    from src.services.ingest import hash_file
+
+    base_hashes = [hash_file(path) for path in sources]
+    submitted, records = {}, {}
+    t0 = time.perf_counter()
+
+    for i in range(args.jobs):
+        while not main.scheduler.has_capacity():
+            await asyncio.sleep(0.05)
+        source = sources[i % len(sources)]
+        # Distinct hash per job defeats the content-addressed caches unless --warm-cache
+        video_hash = base_hashes[i % len(sources)] if args.warm_cache else f"{base_hashes[i % len(sources)]}-{i}"
+        job_id = f"bench{i:04d}"
+        main.job_store.create({
+            "job_id": job_id, "status": "QUEUED", "video_path": source,
+            "directives": None if args.warm_cache else f"benchmark run {i}", "result": None
+        })
+        main.scheduler.submit(job_id, main.execute_workflow, source, main.job_store.get(job_id)["directives"], video_hash)
+        submitted[job_id] = time.perf_counter()
+
+    # Completed jobs may still be draining background stages (memory); wait for all of them
+    while main.scheduler.snapshot()["jobs_in_flight"]:
+        await asyncio.sleep(0.05)
+        for job_id in submitted:
+            if job_id not in records:
+                job = main.job_store.get(job_id)
+                if job["status"] in ("COMPLETED", "FAILED"):
+                    records[job_id] = {**job, "latency": time.perf_counter() - submitted[job_id]}
+    wall = time.perf_counter() - t0
+
+    for job_id in submitted:
+        # Latency stops at COMPLETED; stage timings are re-read to include background stages
+        latency = records[job_id]["latency"] if job_id in records else time.perf_counter() - submitted[job_id]
+        records[job_id] = {**main.job_store.get(job_id), "latency": latency}
+    return {"wall": wall, "records": list(records.values())}
+
+def summarize(outcome: dict, args) -> dict:
+    records = outcome["records"]
+    completed = [r for r in records if r["status"] == "COMPLETED"]
+
+    from src.services.scheduler import STAGES
+
+    stages = {stage: [] for stage in STAGES}
+    for record in completed:
+        for stage, seconds in (record.get("stage_timings") or {}).items():
+            stages.setdefault(stage, []).append(seconds)
+
+    latencies = [r["latency"] for r in completed]
+    return {
+        "jobs": len(records),
+        "completed": len(completed),
+        "failed": [{"job_id": r["job_id"], "error": r.get("error")} for r in records if r["status"] != "COMPLETED"],
+        "concurrency": args.concurrency,
+        "wall_seconds": round(outcome["wall"], 2),
+        "jobs_per_minute": round(len(completed) / outcome["wall"] * 60, 2) if outcome["wall"] else 0.0,
+        "job_latency": {
+            "p50": round(percentile(latencies, 50), 2),
+            "p95": round(percentile(latencies, 95), 2),
+            "max": round(max(latencies), 2)
+        } if latencies else {},
+        "stages": {
+            stage: {
+                "count": len(values),
+                "mean": round(statistics.fmean(values), 3),
+                "p50": round(percentile(values, 50), 3),
+                "p95": round(percentile(values, 95), 3)
+            }
+            for stage, values in stages.items() if values
+        },
+        "peak_rss_mb": peak_rss_mb()
+    }
+
+def print_report(report: dict):
+    print(f"\n{report['completed']}/{report['jobs']} jobs at concurrency {report['concurrency']} "
+          f"in {report['wall_seconds']:.1f}s -> {report['jobs_per_minute']:.2f} jobs/min")
+    if report["job_latency"]:
+        lat = report["job_latency"]
+        print(f"job latency   p50 {lat['p50']:7.2f}s  p95 {lat['p95']:7.2f}s  max {lat['max']:7.2f}s")
+
+    print(f"\n{'stage':<10}{'n':>5}{'mean s':>10}{'p50 s':>10}{'p95 s':>10}")
+    for stage, s in report["stages"].items():
+        print(f"{stage:<10}{s['count']:>5}{s['mean']:>10.3f}{s['p50']:>10.3f}{s['p95']:>10.3f}")
+
+    rss = report["peak_rss_mb"]
+    print(f"\npeak RSS      api process {rss['api_process']:.0f} MB | largest child {rss['children']:.0f} MB")
+    for failure in report["failed"]:
+        print(f"❌ {failure['job_id']}: {failure['error']}")
+
+def regressions(report: dict, baseline: dict, tolerance: float) -> list:
+    """Human-readable list of metrics that got worse than baseline by more than tolerance."""
+    found = []
+    if report["jobs_per_minute"] < baseline["jobs_per_minute"] * (1 - tolerance):
+        found.append(f"throughput {report['jobs_per_minute']:.2f} < {baseline['jobs_per_minute']:.2f} jobs/min")
+    for stage, stats in report["stages"].items():
+        before = baseline["stages"].get(stage)
+        if before and stats["p95"] > before["p95"] * (1 + tolerance):
+            found.append(f"{stage} p95 {stats['p95']:.3f}s > {before['p95']:.3f}s")
+    for key, mb in report["peak_rss_mb"].items():
+        before = baseline["peak_rss_mb"].get(key)
+        if before and mb > before * (1 + tolerance):
+            found.append(f"peak RSS ({key}) {mb:.0f} MB > {before:.0f} MB")
+    return found
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--jobs", type=int, default=8)
+    parser.add_argument("--concurrency", type=int, default=4, help="Jobs in flight at once")
+    parser.add_argument("--duration", type=int, default=90, help="Source length in seconds")
+    parser.add_argument("--size", default="1280x720", help="Source resolution")
+    parser.add_argument("--sources", type=int, default=2, help="Distinct synthetic videos, used round-robin")
+    parser.add_argument("--clips", type=int, default=3, help="Clips per analysis")
+    parser.add_argument("--llm-latency", type=float, default=1.0, help="Seconds per fake model response")
+    parser.add_argument("--upload", type=float, default=0.5, help="Simulated File API upload latency (s)")
+    parser.add_argument("--processing", type=float, default=2.0, help="Simulated File API PROCESSING window (s)")
+    parser.add_argument("--embed-latency", type=float, default=0.05, help="Simulated embedding latency (s)")
+    parser.add_argument("--preanalysis", choices=["off", "proxy", "windows"], default="proxy")
+    parser.add_argument("--copy-mode", choices=["fanout", "single"], default="fanout")
+    parser.add_argument("--warm-cache", action="store_true", help="Reuse content hashes so caches can hit")
+    parser.add_argument("--json", help="Also write the report to this file")
+    parser.add_argument("--baseline", help="Previous --json report to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed relative regression")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="omni-bench-") as work_dir:
+        configure_environment(work_dir, args)
+
+        sources = []
+        for i in range(args.sources):
+            path = os.path.join(work_dir, f"source_{i}.mp4")
+            make_source(path, args.duration, args.size, seed=i)
+            sources.append(path)
+
+        from src.api import main as api
+        from src.agents import analyst, copywriter
+        from src.core.registry import registry
+        from benchmarks.file_api_stub import StubGenaiClient
+        from benchmarks import fake_models
+
+        registry.override("genai_client", StubGenaiClient(
+            upload_latency=args.upload, processing_seconds=args.processing, embed_latency=args.embed_latency
+        ))
+        # Agent overrides take precedence; this only keeps a real GoogleModel from being built
+        registry.override(f"google_model:{analyst.MODEL_NAME}", fake_models.strategy_model(0))
+
+        # Rendered clips and dispatcher output stay inside the temporary directory
+        api.output_dir = Path(work_dir) / "web_output"
+        api.output_dir.mkdir()
+        os.chdir(work_dir)
+
+        async def run():
+            api.event_bus.bind(asyncio.get_running_loop())
+            with analyst.analyst_agent.override(model=fake_models.analyst_model(args.llm_latency, args.clips, args.duration)), \
+                 copywriter.clip_agent.override(model=fake_models.clip_model(args.llm_latency)), \
+                 copywriter.strategy_agent.override(model=fake_models.strategy_model(args.llm_latency)), \
+                 copywriter.copywriter_agent.override(model=fake_models.brief_model(args.llm_latency)):
+                outcome = await run_jobs(api, sources, args)
+            await api.shutdown_scheduler()
+            return outcome
+
+        outcome = asyncio.run(run())
+        # Reap render workers so their peak RSS shows up in RUSAGE_CHILDREN
+        api.scheduler.process_pool.shutdown(wait=True)
+        os.chdir(root_path)
+
+    report = summarize(outcome, args)
+    print_report(report)
+    if args.json:
+        Path(args.json).write_text(json.dumps(report, indent=2), encoding="utf-8")
+
+    if args.baseline:
+        found = regressions(report, json.loads(Path(args.baseline).read_text(encoding="utf-8")), args.tolerance)
+        for line in found:
+            print(f"❌ Regression: {line}")
+        if found or report["failed"]:
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Render engine benchmark: serial path vs. process-pool path.
+
+Usage:
+    uv run benchmarks/render_benchmark.py [--source video.mp4] [--clips 6] [--length 20] [--smart-crop]
+
+--smart-crop also renders the clips with CROP_MODE=smart (cold ROI tracks) and reports
+its overhead over the centered crop.
+
+Without --source, a synthetic 1080p test video is generated with FFmpeg.
+"""
+import os
+import sys
+import time
+import shutil
+import argparse
+import subprocess
+import tempfile
+from pathlib import Path
+
+root_path = str(Path(__file__).parent.parent)
+if root_path not in sys.path:
+    sys.path.append(root_path)
+
+# Settings require these keys even though rendering never calls Gemini or Langfuse
+os.environ.setdefault("GEMINI_API_KEY", "benchmark")
+os.environ.setdefault("LANGFUSE_PUBLIC_KEY", "benchmark")
+os.environ.setdefault("LANGFUSE_SECRET_KEY", "benchmark")
+
+from imageio_ffmpeg import get_ffmpeg_exe
+from src.core.config import settings
+from src.services.video_proc import process_video_segments
+
+def make_synthetic_source(path: str, seconds: int, size: str = "1920x1080"):
+    """Generates a test pattern video with a sine audio track."""
+    subprocess.run([
+        get_ffmpeg_exe(), "-y", "-loglevel", "error",
+        "-f", "lavfi", "-i", f"testsrc2=size={size}:rate=30:duration={seconds}",
+        "-f", "lavfi", "-i", f"sine=frequency=440:duration={seconds}",
+        "-c:v", "libx264", "-preset", "veryfast", "-c:a", "aac", "-shortest", path
+    ], check=True)
+
+def make_clips(count: int, length: int) -> list:
+    clips = []
+    for i in range(count):
+        start = i * (length + 5)
+        end = start + length
+        clips.append({
+            "start": f"{start // 60:02d}:{start % 60:02d}",
+            "end": f"{end // 60:02d}:{end % 60:02d}",
+            "narrative_hook": f"Synthetic clip {i + 1}"
+        })
+    return clips
+
+def run(label: str, source: str, clips: list, output_root: str, max_workers: int, crop_mode: str = "center") -> float:
+    shutil.rmtree(output_root, ignore_errors=True)
+    settings.crop_mode = crop_mode
+    t0 = time.perf_counter()
+    files = process_video_segments(source, clips, "bench", output_root=output_root, max_workers=max_workers)
+    elapsed = time.perf_counter() - t0
+    print(f"{label:<10} {len(files)} clips in {elapsed:7.2f}s")
+    return elapsed
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--source", help="Existing source video (default: synthetic)")
+    parser.add_argument("--clips", type=int, default=6)
+    parser.add_argument("--length", type=int, default=20, help="Clip length in seconds")
+    parser.add_argument("--workers", type=int, default=None, help="Pool size (default: one per core)")
+    parser.add_argument("--smart-crop", action="store_true", help="Also measure CROP_MODE=smart")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        source = args.source
+        if source is None:
+            source = os.path.join(tmp, "source.mp4")
+            make_synthetic_source(source, args.clips * (args.length + 5))
+
+        clips = make_clips(args.clips, args.length)
+        output_root = os.path.join(tmp, "output")
+
+        serial = run("serial", source, clips, output_root, max_workers=1)
+        pooled = run("pool", source, clips, output_root, max_workers=args.workers)
+        print(f"speedup    {serial / pooled:.2f}x")
+
+        if args.smart_crop:
+            smart = run("smart", source, clips, output_root, max_workers=args.workers, crop_mode="smart")
+            print(f"overhead   {(smart / pooled - 1) * 100:+.1f}% (smart vs. centered crop)")
+
+if __name__ == "__main__":
+    main()
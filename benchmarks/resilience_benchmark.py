@@ -0,0 +1,165 @@
+"""
+Resilience benchmark: the external calls of many concurrent jobs against fault-injecting stubs.
+
+Every job uploads a file (File API stub), writes copy with per-clip fan-out (fake models)
+and saves the campaign to memory (stub embeddings, in-process Qdrant). Faults come from
+fault_stub.py: the model has a server-side quota (429 + Retry-After beyond it) and an
+outage window of 503s; every service also fails a share of calls at random.
+
+The same workload runs with the resilience layer off (only the copywriter's own clip
+retries) and on (client-side token bucket matching the quota, jittered retries,
+circuit breaker, job deadline). Exits non-zero if any job fails with the layer on.
+
+Usage:
+    uv run benchmarks/resilience_benchmark.py [--jobs 12] [--clips 3] [--quota 4]
+        [--error-rate 0.1] [--outage-at 3 --outage 2] [--deadline 60]
+"""
+import os
+import sys
+import time
+import asyncio
+import argparse
+import tempfile
+from pathlib import Path
+
+root_path = str(Path(__file__).parent.parent)
+if root_path not in sys.path:
+    sys.path.append(root_path)
+
+def configure_environment(work_dir: str, args):
+    """Must run before any src import: settings are read once at import time."""
+    os.environ.setdefault("GEMINI_API_KEY", "benchmark")
+    os.environ.setdefault("LANGFUSE_PUBLIC_KEY", "benchmark")
+    os.environ.setdefault("LANGFUSE_SECRET_KEY", "benchmark")
+    os.environ.setdefault("LANGFUSE_SAMPLE_RATE", "0")
+    os.environ.update({
+        "QDRANT_URL": ":memory:",
+        "LOG_LEVEL": os.environ.get("LOG_LEVEL", "ERROR"),
+        "ANALYSIS_CACHE_DIR": os.path.join(work_dir, "analysis_cache"),
+        "COPY_CACHE_DIR": os.path.join(work_dir, "copy_cache"),
+        # The client-side bucket is configured to the (stub) server's quota, as in production
+        "GEMINI_RPM": str(args.quota * 60),
+        # Scaled down so the run takes seconds, not minutes
+        "CALL_RETRY_BASE_DELAY": "0.25",
+        "CALL_RETRY_MAX_DELAY": "4",
+        "CIRCUIT_COOLDOWN_SECONDS": str(args.cooldown),
+    })
+
+def percentile(values: list, p: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(p / 100 * (len(ordered) - 1))))]
+
+def _ts(seconds: int) -> str:
+    return f"{seconds // 60:02d}:{seconds % 60:02d}"
+
+async def run_jobs(args, source_path: str, mode: str) -> dict:
+    from src.agents import analyst, copywriter
+    from src.core.registry import registry
+    from src.core.resilience import deadline, guard_model
+    from src.services import memory
+    from benchmarks import fake_models
+    from benchmarks.fault_stub import FaultPlan, FaultyModel
+    from benchmarks.file_api_stub import StubGenaiClient
+
+    model_plan = FaultPlan(
+        quota_per_s=args.quota, burst=args.quota * 10, error_rate=args.error_rate,
+        outage=(args.outage_at, args.outage_at + args.outage), seed=1
+    )
+    plans = {
+        "model": model_plan,
+        "files": FaultPlan(error_rate=args.error_rate, seed=2),
+        "embed": FaultPlan(error_rate=args.error_rate, seed=3),
+        "qdrant": FaultPlan(error_rate=args.error_rate, seed=4),
+    }
+
+    # Fresh stubs per mode, wrapped in this mode's fault plans
+    stub = StubGenaiClient(upload_latency=0.2, processing_seconds=0.5, embed_latency=0.02)
+    stub.aio.files.upload = plans["files"].wrap_async(stub.aio.files.upload)
+    stub.models.embed_content = plans["embed"].wrap_sync(stub.models.embed_content)
+    registry.override("genai_client", stub)
+    qdrant = memory.create_qdrant_client(":memory:")
+    registry.override("qdrant_client", qdrant)
+    memory.init_memory()
+    qdrant.upsert = plans["qdrant"].wrap_sync(qdrant.upsert)
+
+    # Agent overrides bypass the registry, so the guard is applied here as the registry would
+    def model(fake):
+        return guard_model(FaultyModel(fake, model_plan), f"gemini:{copywriter.MODEL_NAME}")
+
+    async def job(i: int) -> dict:
+        t0 = time.perf_counter()
+        payload = {
+            "main_topic": f"{mode} job {i}",
+            "clips": [{"clip_index": c, "start": _ts(c * 20), "end": _ts(c * 20 + 20)} for c in range(1, args.clips + 1)]
+        }
+        try:
+            with deadline(args.deadline):
+                await analyst.upload_video(source_path)
+                brief, complete = await copywriter.write_fanout(payload, None)
+                if not complete:
+                    raise RuntimeError("clips dropped from the brief")
+                await asyncio.to_thread(
+                    memory.save_campaigns_to_memory,
+                    [{"brief": {**brief.model_dump(), "job_id": f"{mode}-{i}"}, "topic": payload["main_topic"]}]
+                )
+            return {"ok": True, "latency": time.perf_counter() - t0}
+        except Exception as e:
+            return {"ok": False, "latency": time.perf_counter() - t0, "error": f"{type(e).__name__}: {e}"[:160]}
+
+    t0 = time.perf_counter()
+    with copywriter.clip_agent.override(model=model(fake_models.clip_model(args.llm_latency))), \
+         copywriter.strategy_agent.override(model=model(fake_models.strategy_model(args.llm_latency))):
+        results = await asyncio.gather(*(job(i) for i in range(args.jobs)))
+
+    return {"mode": mode, "wall": time.perf_counter() - t0, "results": results, "faults": {k: dict(p.counts) for k, p in plans.items()}}
+
+def print_report(outcome: dict):
+    results = outcome["results"]
+    ok = [r["latency"] for r in results if r["ok"]]
+    print(f"\nresilience {outcome['mode']:<4} {len(ok)}/{len(results)} jobs ok in {outcome['wall']:.1f}s", end="")
+    if ok:
+        print(f"  latency p50 {percentile(ok, 50):.2f}s  p95 {percentile(ok, 95):.2f}s", end="")
+    print()
+    for service, counts in outcome["faults"].items():
+        faults = {k: v for k, v in counts.items() if k not in ("calls", "ok")}
+        print(f"  {service:<7} {counts.get('calls', 0):>4} calls  {faults or 'no faults'}")
+    errors = sorted({r["error"] for r in results if not r["ok"]})
+    for error in errors[:5]:
+        print(f"  ❌ {error}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--jobs", type=int, default=12)
+    parser.add_argument("--clips", type=int, default=3, help="Clips per job (one model call each, plus the strategy)")
+    parser.add_argument("--quota", type=float, default=4, help="Model requests per second the stub server accepts")
+    parser.add_argument("--error-rate", type=float, default=0.1, help="Share of calls failing with 503 at random")
+    parser.add_argument("--outage-at", type=float, default=3, help="Seconds into the run when the model goes down")
+    parser.add_argument("--outage", type=float, default=2, help="Seconds the model stays down")
+    parser.add_argument("--cooldown", type=float, default=1, help="Circuit breaker cooldown (s)")
+    parser.add_argument("--deadline", type=float, default=60, help="Per-job deadline (s)")
+    parser.add_argument("--llm-latency", type=float, default=0.3, help="Seconds per fake model response")
+    parser.add_argument("--modes", default="off,on", help="Comma-separated: off, on")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="omni-resilience-") as work_dir:
+        configure_environment(work_dir, args)
+        source_path = os.path.join(work_dir, "source.mp4")
+        Path(source_path).write_bytes(b"\0" * 1024)
+
+        from src.core.config import settings
+        from src.core.resilience import resilience
+
+        failed_with_layer = 0
+        for mode in args.modes.split(","):
+            settings.resilience_enabled = mode == "on"
+            resilience.reset()
+            outcome = asyncio.run(run_jobs(args, source_path, mode))
+            print_report(outcome)
+            if mode == "on":
+                failed_with_layer = sum(not r["ok"] for r in outcome["results"])
+
+    if failed_with_layer:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -1,19 +1,31 @@
 import os
-import time
-from typing import List
+import asyncio
+import hashlib
+from datetime import datetime, timezone
+from types import SimpleNamespace
+from typing import List, Optional
 from pydantic import BaseModel, Field
 from pydantic_ai import Agent
-from pydantic_ai.models.google import GoogleModel
 from langfuse.decorators import observe
-from src.core.config import settings
-from google import genai
+from src.core.config import settings, resolve_path
+from src.core.registry import registry
+from src.core.resilience import resilience, time_left
+from src.core.telemetry import BYTES_TOTAL, get_logger, track_call
+from src.services.disk_cache import DiskLRUCache
+from src.services.preanalysis import PreAnalysis, preanalysis_variant
 
 # 1. ENVIRONMENT CONFIGURATION
 # PydanticAI still uses os.environ["GOOGLE_API_KEY"]
 os.environ["GOOGLE_API_KEY"] = settings.gemini_api_key
 
-# Initialization of new SDK client for file handling
-client = genai.Client(api_key=settings.gemini_api_key)
+# File handling goes through the shared genai client from the registry (built on first use);
+# its async transport (client.aio) keeps one pooled HTTP connection set for all uploads
+
+log = get_logger("ANALYST")
+
+# File API polling: exponential backoff between state checks
+POLL_INITIAL_DELAY = 1.0
+POLL_MAX_DELAY = 10.0
 
 # 2. DATA MODELS (Structured Output for your PydanticAI version)
 class ShotCandidate(BaseModel):
@@ -32,10 +44,13 @@ class VideoAnalysisReport(BaseModel):
 
 # 3. ENGINE AND AGENT INITIALIZATION
 # We use the gemini-3-flash-preview model
-model = GoogleModel('gemini-3-flash-preview')
+# The model itself comes from the registry at run time (shared client, built lazily)
+MODEL_NAME = 'gemini-3-flash-preview'
+
+# Bump whenever the system prompt or report schema changes, so cached reports are not reused
+PROMPT_VERSION = "1"
 
 analyst_agent = Agent(
-    model=model,
     output_type=VideoAnalysisReport,
     system_prompt=(
         "You are an elite video analyst at OPERATORS' FORGE. "
@@ -50,39 +65,144 @@ analyst_agent = Agent(
     )
 )
 
-# 4. OPERATIONAL LOGIC
+# 4. ANALYSIS CACHE
+# Keyed by the content hash computed during /upload: remembers the remote File API handle
+# (until it expires) and finished reports per (hash, directives, model, prompt version)
+analysis_cache = DiskLRUCache(str(resolve_path(settings.analysis_cache_dir)), settings.analysis_cache_max_bytes)
+
+# Uploaded files live 48h on Google's side; stop reusing a handle this long before expiry
+FILE_HANDLE_MARGIN = 15 * 60
+FILE_HANDLE_DEFAULT_TTL = 47 * 3600
+
+def _report_key(video_hash: str, directives: Optional[str], variant: str) -> str:
+    directives_hash = hashlib.sha256((directives or "").strip().encode("utf-8")).hexdigest()
+    return f"report:{video_hash}:{directives_hash}:{MODEL_NAME}:{PROMPT_VERSION}:{variant}"
+
+def get_cached_analysis(video_hash: Optional[str], directives: str = None, variant: str = None) -> Optional[VideoAnalysisReport]:
+    """Returns a previously generated report for the same video, directives and input variant, if any."""
+    if not video_hash:
+        return None
+    data = analysis_cache.get(_report_key(video_hash, directives, variant or preanalysis_variant()))
+    return VideoAnalysisReport.model_validate(data) if data else None
+
+def _file_key(video_hash: str, variant: str) -> str:
+    return f"file:{video_hash}" if variant == "off" else f"file:{video_hash}:{variant}"
+
+def _get_cached_file(file_key: str):
+    entry = analysis_cache.get(file_key)
+    return SimpleNamespace(**entry) if entry else None
+
+def _remember_file(file_key: str, video_file):
+    ttl = FILE_HANDLE_DEFAULT_TTL
+    if getattr(video_file, "expiration_time", None):
+        ttl = (video_file.expiration_time - datetime.now(timezone.utc)).total_seconds() - FILE_HANDLE_MARGIN
+    if ttl > 0:
+        analysis_cache.set(
+            file_key,
+            {"name": video_file.name, "uri": video_file.uri, "mime_type": video_file.mime_type},
+            ttl_seconds=ttl
+        )
+
+# 5. OPERATIONAL LOGIC
+async def upload_video(video_path: str, timeout: float = None):
+    """Uploads through the async client and polls with exponential backoff until the file is ACTIVE."""
+    timeout = timeout or settings.file_processing_timeout
+    loop = asyncio.get_running_loop()
+
+    size = os.path.getsize(video_path)
+    log.info("Uploading to Google File API", path=video_path, bytes=size)
+
+    # Upload material using new client (non-blocking)
+    client = registry.genai_client()
+    files, status = resilience.guard("gemini:files"), resilience.guard("gemini:files_status")
+    with track_call("gemini", "file_upload"):
+        video_file = await files.call(client.aio.files.upload, file=video_path)
+    BYTES_TOTAL.inc(size, kind="upload")
+
+    # Waiting for file processing (polling without blocking the event loop), within the job's deadline
+    left = time_left()
+    if left is not None:
+        timeout = min(timeout, left)
+    deadline = loop.time() + timeout
+    delay = POLL_INITIAL_DELAY
+    with track_call("gemini", "file_processing"):
+        while video_file.state.name == "PROCESSING":
+            if loop.time() + delay > deadline:
+                raise TimeoutError(f"Error: File {video_file.name} still PROCESSING after {timeout:.0f}s.")
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, POLL_MAX_DELAY)
+            video_file = await status.call(client.aio.files.get, name=video_file.name)
+
+    if video_file.state.name == "FAILED":
+        raise RuntimeError("Error: Google API could not process the uploaded video.")
+
+    return video_file
+
 @observe(name="Agent_Analyst_Run")
-async def run_analysis(video_path: str, directives: str = None) -> VideoAnalysisReport:
-    """Sends video to Gemini through new SDK and performs multimodal analysis."""
+async def run_analysis(
+    video_path: str,
+    directives: str = None,
+    video_hash: str = None,
+    preanalysis: Optional[PreAnalysis] = None
+) -> VideoAnalysisReport:
+    """Sends video to Gemini through new SDK and performs multimodal analysis.
+
+    With a pre-analysis, the low-res proxy is uploaded instead of the source, its candidate
+    index goes into the prompt, and returned timestamps are mapped back and snapped to cuts.
+    """
     
     if not os.path.exists(video_path):
         raise FileNotFoundError(f"Error: File {video_path} not found")
 
-    print(f"LOG: Uploading {video_path} to Google File API (new SDK)...")
-    
-    # Upload material using new client
-    video_file = client.files.upload(file=video_path)
-    
-    # Waiting for file processing (polling)
-    while video_file.state.name == "PROCESSING":
-        print(".", end="", flush=True)
-        time.sleep(2)
-        video_file = client.files.get(name=video_file.name)
-        
-    if video_file.state.name == "FAILED":
-        raise RuntimeError("Error: Google API could not process the uploaded video.")
+    variant = preanalysis.variant if preanalysis else "off"
+    cached_report = get_cached_analysis(video_hash, directives, variant)
+    if cached_report:
+        log.info("Analysis cache hit", video_hash=video_hash[:12])
+        return cached_report
+
+    upload_path = preanalysis.proxy_path if preanalysis else video_path
+    file_key = _file_key(video_hash, variant) if video_hash else None
+    video_file = _get_cached_file(file_key) if file_key else None
+    if video_file:
+        log.info("Reusing uploaded file", file=video_file.name, video_hash=video_hash[:12])
+    else:
+        video_file = await upload_video(upload_path)
+        if file_key:
+            _remember_file(file_key, video_file)
         
-    print("\nLOG: Gemini 3 Flash Preview begins multimodal analysis...")
+    log.info("Multimodal analysis started", model=MODEL_NAME, variant=variant)
     
     # Agent invocation with video passed
     # PydanticAI for GoogleModel accepts list of objects in contents
     prompt = "Perform full analysis of this video for Shorts editing."
+    if preanalysis:
+        if preanalysis.windows:
+            prompt += (
+                "\n\nThe video is a low-resolution proxy made of the most promising windows of the "
+                "source, joined back to back. Report timestamps in this video's timeline."
+            )
+        else:
+            prompt += "\n\nThe video is a low-resolution proxy of the source with the same timeline."
+        prompt += (
+            "\nLocal scene detection found these candidate windows and scene cuts (JSON). "
+            "Prefer them and start/end clips on scene cuts: " + preanalysis.prompt_context()
+        )
     if directives:
         prompt += f"\n\nCRITICAL OPERATOR DIRECTIVES: {directives}"
         
-    result = await analyst_agent.run(
-        prompt,
-        model_settings={"contents": [{"file_data": {"mime_type": video_file.mime_type, "file_uri": video_file.uri}}]}
-    )
+    with track_call("llm", "analyst"):
+        result = await analyst_agent.run(
+            prompt,
+            model=registry.google_model(MODEL_NAME),
+            model_settings={"contents": [{"file_data": {"mime_type": video_file.mime_type, "file_uri": video_file.uri}}]}
+        )
+
+    report = result.output
+    if preanalysis:
+        for clip in report.clips:
+            clip.start, clip.end = preanalysis.resolve_clip(clip.start, clip.end)
+
+    if video_hash:
+        analysis_cache.set(_report_key(video_hash, directives, variant), report.model_dump())
     
-    return result.output
\ No newline at end of file
+    return report
@@ -1,15 +1,22 @@
 import os
-from typing import List
+import json
+import asyncio
+from typing import Callable, Dict, List, Optional
 from pydantic import BaseModel, Field
 from pydantic_ai import Agent
-from pydantic_ai.models.google import GoogleModel
 from langfuse.decorators import observe
-from src.core.config import settings
+from src.core.config import settings, resolve_path
+from src.core.registry import registry
+from src.core.resilience import CircuitOpenError, DeadlineExceeded, backoff_delay
+from src.core.telemetry import CACHE_HIT_RATE, get_logger, metrics, track_call
+from src.services.response_cache import ResponseCache, canonical_hash
 
 # 1. ENVIRONMENT CONFIGURATION
 # PydanticAI requires GOOGLE_API_KEY in os.environ
 os.environ["GOOGLE_API_KEY"] = settings.gemini_api_key
 
+log = get_logger("COPYWRITER")
+
 # 2. DATA MODELS (Structured Output)
 class PlatformPost(BaseModel):
     """Single content optimized for given platform's algorithm."""
@@ -30,45 +37,278 @@ class CampaignBrief(BaseModel):
 
 # 3. ENGINE AND AGENT INITIALIZATION
 # We use the gemini-3-flash-preview model
-model = GoogleModel('gemini-3-flash-preview')
+# The model itself comes from the registry at run time (shared client, built lazily)
+MODEL_NAME = 'gemini-3-flash-preview'
+
+SYSTEM_PROMPT = (
+    "You are the Chief Strategy Officer at OPERATORS' FORGE. Your goal is to maximize reach while maintaining absolute consistency with the visuals.\n\n"
+    
+    "YOUR TOOLS:\n"
+    "You will receive a 'VideoAnalysisReport'. You must use the 'visual_description' and 'narrative_hook' fields contained within "
+    "to prove to the viewer that the description relates exactly to what they see on screen.\n\n"
+    
+    "LENGTH LOGIC (Critical):\n"
+    "- Clips < 15s: Apply 'Ultra-Short-Impact'. One provocative hook, no introduction, immediate CTA.\n"
+    "- Clips 15-60s: Add one substantive Insight resulting from the action in the video before CTA.\n\n"
+    
+    "PLATFORM REQUIREMENTS:\n"
+    "1. TikTok/Reels: Aggressive style, 'fast-paced', use engineering slang, strong visual hook at the start.\n"
+    "2. YouTube Shorts: SEO-friendly, clear value promise, write what the viewer will gain by watching the whole thing.\n"
+    "3. LinkedIn: Expert tone, storytelling based on technology visible in the clip. Build OPERATORS' FORGE authority.\n\n"
+    
+    "CRITICAL RULE: If the video shows robots, write about robotics. If it shows drones, write about drones. "
+    "Never assume the topic in advance. Adapt Forge values to the video context.\n"
+    "Write exclusively in English."
+)
 
 copywriter_agent = Agent(
-    model=model,
     output_type=CampaignBrief,
-    system_prompt=(
-        "You are the Chief Strategy Officer at OPERATORS' FORGE. Your goal is to maximize reach while maintaining absolute consistency with the visuals.\n\n"
-        
-        "YOUR TOOLS:\n"
-        "You will receive a 'VideoAnalysisReport'. You must use the 'visual_description' and 'narrative_hook' fields contained within "
-        "to prove to the viewer that the description relates exactly to what they see on screen.\n\n"
-        
-        "LENGTH LOGIC (Critical):\n"
-        "- Clips < 15s: Apply 'Ultra-Short-Impact'. One provocative hook, no introduction, immediate CTA.\n"
-        "- Clips 15-60s: Add one substantive Insight resulting from the action in the video before CTA.\n\n"
-        
-        "PLATFORM REQUIREMENTS:\n"
-        "1. TikTok/Reels: Aggressive style, 'fast-paced', use engineering slang, strong visual hook at the start.\n"
-        "2. YouTube Shorts: SEO-friendly, clear value promise, write what the viewer will gain by watching the whole thing.\n"
-        "3. LinkedIn: Expert tone, storytelling based on technology visible in the clip. Build OPERATORS' FORGE authority.\n\n"
-        
-        "CRITICAL RULE: If the video shows robots, write about robotics. If it shows drones, write about drones. "
-        "Never assume the topic in advance. Adapt Forge values to the video context.\n"
-        "Write exclusively in English."
+    system_prompt=SYSTEM_PROMPT
+)
+
+# Fan-out mode: one small structured call per clip plus one for the overall strategy
+CLIP_SYSTEM_PROMPT = SYSTEM_PROMPT + (
+    "\n\nYou receive ONE clip at a time. Return a single ClipStrategy for it with one post "
+    "per platform (TikTok/Reels, YouTube Shorts, LinkedIn)."
+)
+
+clip_agent = Agent(
+    output_type=ClipStrategy,
+    system_prompt=CLIP_SYSTEM_PROMPT
+)
+
+STRATEGY_SYSTEM_PROMPT = (
+    "You are the Chief Strategy Officer at OPERATORS' FORGE. Based on the video analysis, "
+    "describe the main idea and tone of the social media campaign in 2-3 sentences. "
+    "Write exclusively in English."
+)
+
+strategy_agent = Agent(
+    output_type=str,
+    system_prompt=STRATEGY_SYSTEM_PROMPT
+)
+
+# 4. PROMPT ENCODING AND RESPONSE CACHE
+# Only the fields the system prompt refers to are sent, as compact JSON
+PROMPT_CLIP_FIELDS = ("start", "end", "visual_description", "narrative_hook")
+
+def compact_analysis(analysis_data: dict) -> dict:
+    """Strips the analysis report down to what the copywriter prompt uses."""
+    return {
+        "main_topic": analysis_data.get("main_topic", ""),
+        "clips": [
+            {"clip_index": i, **{k: clip.get(k) for k in PROMPT_CLIP_FIELDS}}
+            for i, clip in enumerate(analysis_data.get("clips", []), 1)
+        ]
+    }
+
+def normalize_directives(directives: str = None) -> str:
+    return " ".join((directives or "").split())
+
+def build_prompt(payload: dict, directives: str = None) -> str:
+    prompt = (
+        "Prepare marketing campaign based on the following analytical data (VideoAnalysisReport, JSON): "
+        + json.dumps(payload, separators=(",", ":"), ensure_ascii=False)
     )
+    if directives:
+        prompt += f"\n\nCRITICAL OPERATOR DIRECTIVES: {directives}"
+    return prompt
+
+def _embed_for_cache(text: str) -> List[float]:
+    # Imported lazily: the semantic tier is optional and memory opens Qdrant/Gemini clients
+    from src.services.retrieval import embed_query
+    return embed_query(text)
+
+copy_cache = ResponseCache(
+    str(resolve_path(settings.copy_cache_dir)),
+    settings.copy_cache_max_bytes,
+    ttl_seconds=settings.copy_cache_ttl_seconds,
+    semantic=settings.copy_semantic_cache,
+    threshold=settings.copy_semantic_threshold,
+    semantic_size=settings.copy_semantic_cache_size,
+    embed=_embed_for_cache
 )
 
-# 4. OPERATIONAL LOGIC
+# Lookup levels: whole briefs (exact + semantic) and single clips in fan-out mode
+BRIEF_LEVEL, CLIP_LEVEL = "brief", "clip"
+
+@metrics.collector
+def _copy_cache_metrics():
+    CACHE_HIT_RATE.set(copy_cache.stats(BRIEF_LEVEL)["hit_rate"], cache="copywriter")
+    CACHE_HIT_RATE.set(copy_cache.stats(CLIP_LEVEL)["hit_rate"], cache="copywriter_clip")
+
+# 5. OPERATIONAL LOGIC
 @observe(name="Agent_Copywriter_Run")
-async def run_copywriting(analysis_data: dict, directives: str = None) -> CampaignBrief:
-    """Transforms analytical data into complete post campaign."""
-    
-    print("LOG: Gemini 3 Flash Preview generating strategy and social media posts...")
-    
-    prompt = f"Prepare marketing campaign based on the following analytical data: {analysis_data}"
+async def run_copywriting(
+    analysis_data: dict,
+    directives: str = None,
+    on_event: Optional[Callable[[dict], None]] = None,
+    mode: str = None,
+    reuse_clips: Optional[Dict[int, dict]] = None,
+    reuse_strategy: Optional[str] = None
+) -> CampaignBrief:
+    """Transforms analytical data into complete post campaign.
+
+    mode "single" asks for the whole CampaignBrief in one call; "fanout" writes each clip
+    separately (bounded concurrency, per-clip retries) and reports posts through `on_event`
+    as they stream in. A job derived from a parent passes the parent's ClipStrategy per
+    unchanged clip index (`reuse_clips`) and its overall strategy, only when the directives
+    match the parent's; only the remaining clips are written, always in fan-out mode.
+    """
+    mode = "fanout" if reuse_clips or reuse_strategy else (mode or settings.copy_mode)
+    payload = compact_analysis(analysis_data)
+    directives = normalize_directives(directives)
+    prompt = build_prompt(payload, directives)
+
+    # Exact tier: identical prompt, system prompt and model
+    cache_key = canonical_hash(payload, directives, SYSTEM_PROMPT, MODEL_NAME)
+    cached = copy_cache.get_exact(cache_key, BRIEF_LEVEL)
+    if cached:
+        log.info("Cache hit", tier="exact")
+        return CampaignBrief.model_validate(cached)
+
+    # Semantic tier: same clip layout, near-identical analysis + directives
+    scope = canonical_hash([(c["start"], c["end"]) for c in payload["clips"]], SYSTEM_PROMPT, MODEL_NAME)
+    vector = None
+    if copy_cache.semantic is not None:
+        try:
+            cached, vector = await asyncio.to_thread(copy_cache.get_semantic, scope, prompt, BRIEF_LEVEL)
+        except Exception as e:
+            log.warning("Semantic cache unavailable", error=str(e))
+        if cached:
+            log.info("Cache hit", tier="semantic")
+            return CampaignBrief.model_validate(cached)
+    copy_cache.miss(BRIEF_LEVEL)
+
+    log.info("Generating strategy and posts", model=MODEL_NAME, mode=mode, clips=len(payload["clips"]))
+
+    if mode == "fanout":
+        brief, complete = await write_fanout(payload, directives, on_event, reuse_clips, reuse_strategy)
+    else:
+        with track_call("llm", "copywriter"):
+            result = await copywriter_agent.run(prompt, model=registry.google_model(MODEL_NAME))
+        # According to version 1.39.0 the result is in .output
+        brief, complete = result.output, True
+
+    # A brief with dropped clips (or carried over from a parent job) is returned but never cached
+    if complete and not (reuse_clips or reuse_strategy):
+        copy_cache.put(cache_key, brief.model_dump(), scope=scope, vector=vector)
+    return brief
+
+# 6. FAN-OUT MODE
+def _emit(on_event, event: dict):
+    if on_event:
+        try:
+            on_event(event)
+        except Exception as e:
+            log.warning("Event callback failed", error=str(e))
+
+async def _with_retries(label: str, fn, *args, **kwargs):
+    """Retries a whole call (invalid output, a stream that broke half-way).
+
+    Single model requests are already retried by the model's resilience guard.
+    """
+    attempts = settings.copy_clip_retries + 1
+    for attempt in range(1, attempts + 1):
+        try:
+            return await fn(*args, **kwargs)
+        except Exception as e:
+            # Out of time, or the endpoint is down for longer than the job can wait
+            if attempt == attempts or isinstance(e, (DeadlineExceeded, CircuitOpenError)):
+                raise
+            delay = round(backoff_delay(attempt), 2)
+            log.warning(f"{label} failed, retrying", attempt=attempt, attempts=attempts, delay_s=delay, error=str(e))
+            await asyncio.sleep(delay)
+
+async def stream_clip(clip: dict, main_topic: str, directives: str, on_event=None) -> ClipStrategy:
+    """Writes one clip's posts, forwarding partial structured output as it streams."""
+    prompt = (
+        "Prepare posts for this clip (JSON): "
+        + json.dumps({"main_topic": main_topic, "clip": clip}, separators=(",", ":"), ensure_ascii=False)
+    )
     if directives:
         prompt += f"\n\nCRITICAL OPERATOR DIRECTIVES: {directives}"
-        
-    result = await copywriter_agent.run(prompt)
-    
-    # According to version 1.39.0 the result is in .output
-    return result.output
\ No newline at end of file
+
+    with track_call("llm", "copywriter_clip"):
+        async with clip_agent.run_stream(prompt, model=registry.google_model(MODEL_NAME)) as result:
+            if on_event:
+                async for partial in result.stream_output(debounce_by=0.2):
+                    posts = [p.model_dump() for p in (partial.posts or [])]
+                    _emit(on_event, {"type": "copy_partial", "clip": clip["clip_index"], "posts": posts})
+            return await result.get_output()
+
+async def write_overall_strategy(prompt: str) -> str:
+    with track_call("llm", "copywriter_strategy"):
+        result = await strategy_agent.run(prompt, model=registry.google_model(MODEL_NAME))
+    return result.output
+
+async def write_fanout(
+    payload: dict,
+    directives: str,
+    on_event=None,
+    reuse_clips: Optional[Dict[int, dict]] = None,
+    reuse_strategy: Optional[str] = None
+):
+    """Per-clip calls plus an overall_strategy call, merged into one CampaignBrief.
+
+    Returns (brief, complete). Clips that still fail after retries are dropped from the
+    brief instead of failing it; only if every clip fails is the error raised. Clips in
+    `reuse_clips` (and the strategy, if `reuse_strategy` is set) are taken as they are.
+    """
+    semaphore = asyncio.Semaphore(settings.copy_fanout_concurrency)
+    main_topic = payload["main_topic"]
+    reuse_clips = reuse_clips or {}
+
+    async def write_clip(clip: dict) -> ClipStrategy:
+        key = canonical_hash(main_topic, clip, directives, CLIP_SYSTEM_PROMPT, MODEL_NAME)
+        cached = reuse_clips.get(clip["clip_index"]) or copy_cache.get_exact(key, CLIP_LEVEL)
+        if cached:
+            strategy = ClipStrategy.model_validate(cached)
+        else:
+            copy_cache.miss(CLIP_LEVEL)
+            async with semaphore:
+                strategy = await _with_retries(
+                    f"Copywriting clip {clip['clip_index']}", stream_clip, clip, main_topic, directives, on_event
+                )
+            strategy.clip_index = clip["clip_index"]
+            copy_cache.put(key, strategy.model_dump())
+
+        _emit(on_event, {"type": "copy_ready", "clip": clip["clip_index"], "strategy": strategy.model_dump()})
+        return strategy
+
+    async def write_strategy():
+        if reuse_strategy:
+            _emit(on_event, {"type": "copy_strategy", "overall_strategy": reuse_strategy})
+            return reuse_strategy, True
+        prompt = build_prompt(payload, directives)
+        async with semaphore:
+            try:
+                overall = await _with_retries("Overall strategy", write_overall_strategy, prompt)
+                _emit(on_event, {"type": "copy_strategy", "overall_strategy": overall})
+                return overall, True
+            except Exception as e:
+                log.warning("Overall strategy failed, falling back to main topic", error=str(e))
+                return main_topic, False
+
+    outcomes = await asyncio.gather(
+        write_strategy(),
+        *(write_clip(clip) for clip in payload["clips"]),
+        return_exceptions=True
+    )
+    strategy_outcome, clip_outcomes = outcomes[0], outcomes[1:]
+    if isinstance(strategy_outcome, BaseException):
+        raise strategy_outcome
+    overall_strategy, strategy_ok = strategy_outcome
+
+    strategies = []
+    for clip, outcome in zip(payload["clips"], clip_outcomes):
+        if isinstance(outcome, BaseException):
+            log.error("Clip failed, dropping it from the brief", clip=clip["clip_index"], error=str(outcome))
+        else:
+            strategies.append(outcome)
+
+    if payload["clips"] and not strategies:
+        raise next(o for o in clip_outcomes if isinstance(o, BaseException))
+
+    complete = strategy_ok and len(strategies) == len(payload["clips"])
+    return CampaignBrief(overall_strategy=overall_strategy, clip_strategies=strategies), complete
@@ -1,24 +1,31 @@
 import os
-import shutil
-from typing import List
+import json
+from typing import List, Tuple
 from pydantic_ai import Agent, Tool
-from pydantic_ai.models.google import GoogleModel
 from langfuse.decorators import observe
 from src.core.config import settings
+from src.core.registry import registry
+from src.core.telemetry import BYTES_TOTAL, get_logger, track_call
+from src.services.renditions import link_or_copy
 
 # 1. ENGINE INITIALIZATION
-model = GoogleModel('gemini-3-flash-preview')
+# Built on first agent-mode dispatch through the shared registry
+MODEL_NAME = 'gemini-3-flash-preview'
+
+log = get_logger("DISPATCHER")
 
 class DistributionCenter:
     """Handles physical file operations for content distribution."""
     
     def __init__(self, job_output_dir: str):
         self.job_output_dir = job_output_dir
+        self.manifest = []
 
     def move_to_platform_folder(self, filename: str, platform: str) -> str:
         """
-        Copies a video clip to a platform-specific subfolder with a descriptive name.
+        Links a video clip into a platform-specific subfolder with a descriptive name.
         Example: short_1.mp4 -> {job_dir}/tiktok/tiktok_short_1.mp4
+        The platform's own rendition (short_1_tiktok.mp4) is used when the ladder produced one.
         """
         platform = platform.lower().strip()
         target_dir = os.path.join(self.job_output_dir, platform)
@@ -28,49 +35,100 @@ class DistributionCenter:
         new_filename = f"{platform}_{filename}"
         
         src_path = os.path.join(self.job_output_dir, filename)
+        stem, ext = os.path.splitext(filename)
+        rendition_path = os.path.join(self.job_output_dir, f"{stem}_{platform}{ext}")
+        if os.path.exists(rendition_path):
+            src_path = rendition_path
         dst_path = os.path.join(target_dir, new_filename)
         
         if os.path.exists(src_path):
-            shutil.copy2(src_path, dst_path)
+            method = link_or_copy(src_path, dst_path)
+            BYTES_TOTAL.inc(os.path.getsize(dst_path), kind=f"dispatch_{method}")
+            self.manifest.append({
+                "platform": platform,
+                "source": os.path.basename(src_path),
+                "file": os.path.join(platform, new_filename),
+                "method": method
+            })
             return f"SUCCESS: {new_filename} distributed to {platform.upper()}."
         return f"ERROR: File {filename} not found."
 
+    def write_manifest(self, job_id: str) -> str:
+        """Writes {job_dir}/manifest.json describing where every clip was distributed."""
+        manifest_path = os.path.join(self.job_output_dir, "manifest.json")
+        with open(manifest_path, "w", encoding="utf-8") as f:
+            json.dump({"job_id": job_id, "assignments": self.manifest}, f, indent=2)
+        return manifest_path
+
+def build_assignments(campaign_data: dict) -> List[Tuple[int, str]]:
+    """Flattens clip_strategies into unique (clip_index, platform) pairs, in campaign order."""
+    assignments = []
+    for cs in campaign_data.get('clip_strategies', []):
+        if isinstance(cs, dict):
+            c_idx = cs.get('clip_index')
+            plats = [p.get('platform', '') for p in cs.get('posts', [])]
+        else:
+            c_idx = cs.clip_index
+            plats = [p.platform for p in cs.posts]
+
+        for platform in plats:
+            pair = (c_idx, platform.lower().strip())
+            if c_idx is not None and pair[1] and pair not in assignments:
+                assignments.append(pair)
+    return assignments
+
 @observe(name="Agent_Dispatcher_Run")
-async def run_dispatch(job_id: str, web_output_root: str, campaign_data: dict):
+async def run_dispatch(job_id: str, web_output_root: str, campaign_data: dict, mode: str = None):
     """
-    Dispatcher Agent: Analyzes the campaign strategy and physically organizes files 
-    into platform-specific folders.
+    Dispatcher: organizes produced clips into platform-specific folders according to
+    the campaign strategy. "direct" mode executes the assignment deterministically;
+    "agent" mode lets the LLM Logistics Coordinator call the distribution tool.
     """
-    print(f"LOG [{job_id}]: Entering run_dispatch function...", flush=True)
+    mode = mode or settings.dispatch_mode
+    log.info("Dispatch started", job_id=job_id, mode=mode)
     
     # 1. Organization in web folder (for Next.js)
     job_web_dir = os.path.join(web_output_root, job_id)
-    print(f"LOG [{job_id}]: Web job directory: {job_web_dir}", flush=True)
     distributor_web = DistributionCenter(job_web_dir)
     
     # 2. Organization in root 'output' folder (for the Operator)
     root_output_dir = os.path.join(os.getcwd(), "output", job_id)
     os.makedirs(root_output_dir, exist_ok=True)
-    print(f"LOG [{job_id}]: Root output directory: {root_output_dir}", flush=True)
     
-    # Copy original files to root output first
-    files_to_copy = os.listdir(job_web_dir)
-    print(f"LOG [{job_id}]: Found {len(files_to_copy)} files in web dir.", flush=True)
-    for f in files_to_copy:
+    # Link original files into root output first
+    files_to_link = os.listdir(job_web_dir)
+    log.debug("Linking into root output", job_id=job_id, web_dir=job_web_dir, root_dir=root_output_dir, files=len(files_to_link))
+    for f in files_to_link:
         if f.endswith(".mp4") and os.path.isfile(os.path.join(job_web_dir, f)):
-            print(f"LOG [{job_id}]: Copying {f} to root output...", flush=True)
-            shutil.copy2(os.path.join(job_web_dir, f), os.path.join(root_output_dir, f))
+            link_or_copy(os.path.join(job_web_dir, f), os.path.join(root_output_dir, f))
             
     distributor_root = DistributionCenter(root_output_dir)
     
     def dual_distribute(filename: str, platform: str) -> str:
-        print(f"TOOL_CALL [{job_id}]: Distributing {filename} to {platform}...", flush=True)
         res1 = distributor_web.move_to_platform_folder(filename, platform)
         res2 = distributor_root.move_to_platform_folder(filename, platform)
         result = f"Web: {res1} | Root: {res2}"
-        print(f"TOOL_RESULT [{job_id}]: {result}", flush=True)
+        log.info("Distributed", job_id=job_id, file=filename, platform=platform, result=result)
         return result
 
+    assignments = build_assignments(campaign_data)
+
+    if mode == "agent":
+        await _run_dispatch_agent(job_id, assignments, dual_distribute)
+    else:
+        # Deterministic fast path: the strategy already is the exact assignment
+        for clip_index, platform in assignments:
+            dual_distribute(f"short_{clip_index}.mp4", platform)
+
+    distributor_web.write_manifest(job_id)
+    distributor_root.write_manifest(job_id)
+    
+    log.info("Dispatch finished", job_id=job_id, assignments=len(assignments))
+    
+    return True
+
+async def _run_dispatch_agent(job_id: str, assignments: List[Tuple[int, str]], dual_distribute):
+    """Optional LLM mode: the agent decides which tool calls to make."""
     distribution_tool = Tool(
         dual_distribute,
         name="move_video_to_platform",
@@ -78,7 +136,7 @@ async def run_dispatch(job_id: str, web_output_root: str, campaign_data: dict):
     )
     
     dispatcher_agent = Agent(
-        model=model,
+        model=registry.google_model(MODEL_NAME),
         tools=[distribution_tool],
         system_prompt=(
             "You are the Logistics Coordinator at OPERATORS' FORGE. "
@@ -94,24 +152,13 @@ async def run_dispatch(job_id: str, web_output_root: str, campaign_data: dict):
         )
     )
     
-    print(f"LOG [{job_id}]: Agent Dispatcher starting selective distribution...", flush=True)
+    log.info("Agent dispatcher starting selective distribution", job_id=job_id)
     
     # We pass only necessary data to save tokens and potentially quota impact
-    strategies = campaign_data.get('clip_strategies', [])
-    minimal_strategy = []
-    
-    for cs in strategies:
-        if isinstance(cs, dict):
-            c_idx = cs.get('clip_index')
-            plats = [p.get('platform', '').lower().strip() for p in cs.get('posts', [])]
-        else:
-            c_idx = cs.clip_index
-            plats = [p.platform.lower().strip() for p in cs.posts]
-            
-        minimal_strategy.append({
-            "clip_index": c_idx,
-            "platforms": plats
-        })
+    minimal_strategy = {}
+    for clip_index, platform in assignments:
+        minimal_strategy.setdefault(clip_index, []).append(platform)
+    minimal_strategy = [{"clip_index": c, "platforms": p} for c, p in minimal_strategy.items()]
     
     prompt = (
         f"Analyze this assignment strategy: {minimal_strategy}. "
@@ -120,8 +167,5 @@ async def run_dispatch(job_id: str, web_output_root: str, campaign_data: dict):
         "Execute now for all pairs."
     )
     
-    result = await dispatcher_agent.run(prompt)
-    
-    print(f"LOG [{job_id}]: Agent Dispatcher finished selective mission.", flush=True)
-    
-    return True
+    with track_call("llm", "dispatcher"):
+        await dispatcher_agent.run(prompt)
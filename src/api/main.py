@@ -1,13 +1,19 @@
 import os
 import sys
 import uuid
-import shutil
+import json
+import time
 import asyncio
+import hashlib
+from datetime import datetime
 from pathlib import Path
+from typing import Optional
 from dotenv import load_dotenv
-from fastapi import FastAPI, UploadFile, File, BackgroundTasks, HTTPException, Form
+from fastapi import FastAPI, UploadFile, File, HTTPException, Form, Header, Request
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
+from fastapi.responses import PlainTextResponse, StreamingResponse
 
 # 1. CRITICAL: PROJECT PATH SETUP
 # Allows importing modules from 'src' folder regardless of launch location
@@ -18,11 +24,23 @@ if root_path not in sys.path:
 # Loading environment variables from .env file in ROOT
 load_dotenv(os.path.join(root_path, ".env"))
 
-from src.core.config import settings
-from src.agents.analyst import run_analysis
-from src.agents.copywriter import run_copywriting
-from src.services.video_proc import process_video_segments
-from src.agents.dispatcher import run_dispatch
+from src.core.config import settings, resolve_path
+from src.core.registry import registry
+from src.core.resilience import deadline, resilience
+from src.core.telemetry import (
+    BYTES_TOTAL, HTTP_REQUEST_SECONDS, JOBS_IN_FLIGHT, JOBS_TOTAL, STAGE_ACTIVE, STAGE_QUEUE_DEPTH,
+    STAGE_SECONDS, get_logger, metrics
+)
+from src.services.job_store import FINISHED_STATUSES, WORKER_ID, create_job_store
+from src.services.scheduler import STAGES, StageScheduler, QueueFullError
+from src.services.pipeline import PipelineStage, run_pipeline
+from src.services.events import event_bus
+from src.services.rerun import RerunRequest
+from src.services.storage import StorageManager
+from src.services.ingest import (
+    IngestSink, UploadTooLarge, UnsupportedMedia, UPLOAD_CHUNK_SIZE, SNIFF_BYTES,
+    safe_filename, sniff_container, hash_file
+)
 
 # 2. ENVIRONMENT CONFIGURATION FOR LANGFUSE AND GEMINI
 os.environ["GOOGLE_API_KEY"] = settings.gemini_api_key
@@ -50,13 +68,239 @@ output_dir = root_path_obj / "web" / "public" / "output"
 temp_dir.mkdir(parents=True, exist_ok=True)
 output_dir.mkdir(parents=True, exist_ok=True)
 
-print(f"LOG: Serving static files from: {output_dir}")
+log = get_logger("API")
+log.info("Serving static files", directory=str(output_dir))
 
 # WE SERVE STATIC FILES (MAINLY VIDEO)
 app.mount("/output", StaticFiles(directory=str(output_dir)), name="output")
 
-# Job database in RAM
-jobs = {}
+# Job database (SQLite/WAL by default, shared by all uvicorn workers)
+job_store = create_job_store(
+    settings.job_store_backend,
+    str(resolve_path(settings.job_store_path)),
+    ttl_seconds=settings.job_ttl_seconds
+)
+
+# Stage scheduler: bounded admission, per-stage queues, shared render pool
+scheduler = StageScheduler(
+    concurrency={
+        "prepare": settings.prepare_concurrency,
+        "analyze": settings.analyze_concurrency,
+        "write": settings.write_concurrency,
+        "render": settings.render_concurrency,
+        "dispatch": settings.dispatch_concurrency,
+        "remember": settings.remember_concurrency,
+    },
+    max_pending=settings.max_pending_jobs,
+    thread_workers=settings.scheduler_threads,
+    render_workers=settings.render_workers
+)
+
+# Storage lifecycle: uploads in temp/, renders here and the dispatcher's platform copies
+HOUR = 3600
+storage = StorageManager(
+    str(temp_dir),
+    [str(output_dir), os.path.join(os.getcwd(), "output")],
+    retention_seconds={
+        "source": settings.storage_source_retention_hours * HOUR,
+        "renders": settings.storage_render_retention_hours * HOUR,
+        "platform": settings.storage_platform_retention_hours * HOUR,
+    },
+    quota_bytes=settings.storage_quota_bytes,
+    dedup=settings.storage_dedup,
+    job_lookup=job_store.get,
+    # A live job is updated on every stage transition, and each stage's calls end by its deadline
+    stale_seconds=settings.stage_deadline_seconds * len(STAGES),
+    caches={
+        "analysis": (str(resolve_path(settings.analysis_cache_dir)), settings.analysis_cache_max_bytes),
+        "copy": (str(resolve_path(settings.copy_cache_dir)), settings.copy_cache_max_bytes),
+        "preanalysis": (str(resolve_path(settings.preanalysis_dir)), settings.preanalysis_cache_max_bytes),
+        "renditions": (str(resolve_path(settings.rendition_cache_dir)), settings.rendition_cache_max_bytes),
+        "roi_tracks": (str(resolve_path(settings.smart_crop_cache_dir)), settings.smart_crop_cache_max_bytes),
+    }
+)
+
+@metrics.collector
+def scheduler_metrics():
+    snapshot = scheduler.snapshot()
+    JOBS_IN_FLIGHT.set(snapshot["jobs_in_flight"])
+    for stage, state in snapshot["stages"].items():
+        STAGE_QUEUE_DEPTH.set(state["waiting"], stage=stage)
+        STAGE_ACTIVE.set(state["active"], stage=stage)
+
+@app.middleware("http")
+async def time_requests(request: Request, call_next):
+    """Request latency per route template (streaming responses are timed until headers)."""
+    if not metrics.enabled:
+        return await call_next(request)
+    t0 = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        route = request.scope.get("route")
+        HTTP_REQUEST_SECONDS.observe(
+            time.perf_counter() - t0,
+            method=request.method,
+            route=getattr(route, "path", "unmatched"),
+            status=status
+        )
+
+@app.on_event("startup")
+async def bind_event_bus():
+    event_bus.bind(asyncio.get_running_loop())
+
+@app.on_event("startup")
+async def recover_jobs():
+    # Jobs whose worker stopped mid-flight would otherwise stay unfinished forever: never
+    # evicted, never swept and never sending a terminal event
+    await run_in_threadpool(job_store.recover_interrupted, settings.storage_source_retention_hours * HOUR)
+
+# Agents, media and Qdrant modules are imported on first use (or by warm-up), so the API
+# starts listening without paying for pydantic_ai / google-genai / MoviePy imports
+@registry.on_warm_up("agents")
+def warm_agents():
+    import src.agents.analyst, src.agents.copywriter, src.agents.dispatcher
+
+@registry.on_warm_up("media")
+def warm_media():
+    import moviepy.video.io.ffmpeg_reader
+    import src.services.video_proc, src.services.preanalysis
+    from imageio_ffmpeg import get_ffmpeg_exe
+    get_ffmpeg_exe()
+
+@registry.on_warm_up("models")
+def warm_models():
+    from src.agents.analyst import MODEL_NAME
+    registry.google_model(MODEL_NAME)
+
+@registry.on_warm_up("memory")
+def warm_memory():
+    from src.services.memory import ensure_collection
+    # Collection is checked once here instead of on every save
+    ensure_collection()
+
+@app.on_event("startup")
+async def start_warm_up():
+    if settings.warm_up_on_startup:
+        # Runs after startup returns: the pod reports live while clients and models are built
+        asyncio.get_running_loop().create_task(run_in_threadpool(registry.warm_up))
+
+async def storage_sweeper():
+    while True:
+        try:
+            await run_in_threadpool(storage.sweep)
+        except Exception as e:
+            log.warning("Storage sweep failed", error=str(e))
+        await asyncio.sleep(settings.storage_sweep_interval_seconds)
+
+storage_task: Optional[asyncio.Task] = None
+
+@app.on_event("startup")
+async def start_storage_sweeper():
+    global storage_task
+    if settings.storage_sweep_interval_seconds > 0:
+        storage_task = asyncio.get_running_loop().create_task(storage_sweeper())
+
+@app.on_event("shutdown")
+async def shutdown_scheduler():
+    if storage_task is not None:
+        storage_task.cancel()
+    memory = sys.modules.get("src.services.memory")
+    if memory is not None:
+        await memory.memory_writer.stop()
+    scheduler.shutdown()
+
+@app.get("/health")
+async def health():
+    """Liveness plus whether the warm-up finished (first jobs are slower before that)."""
+    return {"status": "ok", "warm": registry.warm}
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    """Prometheus text exposition: stage timings, queue depth, external calls, render throughput."""
+    if not metrics.enabled:
+        raise HTTPException(status_code=404, detail="Metrics disabled")
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+# Running hashers of resumable uploads: upload_id -> (offset, hasher).
+# Per process and lost on restart; the file is rehashed on completion in that case.
+upload_hashers = {}
+
+# One writer per resumable upload: two PATCHes at the same offset would both pass the offset
+# check and append the same range twice. upload_id -> asyncio.Lock, dropped when the session ends.
+upload_locks = {}
+
+# --- INGESTION HELPERS ---
+
+def ensure_capacity():
+    """Backpressure: reject before touching the disk when the factory is full."""
+    if not scheduler.has_capacity():
+        raise HTTPException(status_code=429, detail="Factory at capacity. Retry later.", headers={"Retry-After": "30"})
+
+def register_upload(filename: str, directives: str = None):
+    """Creates the job record for an incoming upload and returns (job_id, temp_path)."""
+    job_id = str(uuid.uuid4())[:8]
+    temp_path = os.path.join(temp_dir, f"{job_id}_{safe_filename(filename)}")
+
+    # Task state initialization
+    job_store.create({
+        "job_id": job_id,
+        "status": "UPLOADING",
+        "video_path": temp_path,
+        "directives": directives,
+        "result": None
+    })
+    return job_id, temp_path
+
+def reject_upload(job_id: str, sink: IngestSink, error: Exception) -> HTTPException:
+    """Deletes the partial file, fails the job and maps the error to an HTTP status."""
+    sink.abort()
+    upload_hashers.pop(job_id, None)
+    upload_locks.pop(job_id, None)
+    job_store.update(job_id, status="FAILED", error=str(error))
+    status_code = 413 if isinstance(error, UploadTooLarge) else 415
+    return HTTPException(status_code=status_code, detail=str(error))
+
+def submit_workflow(job_id: str, *args) -> int:
+    """Launches the "Editing Train" for a queued job on the scheduler. Returns its queue position."""
+    try:
+        return scheduler.submit(job_id, execute_workflow, *args)
+    except QueueFullError as e:
+        job_store.update(job_id, status="FAILED", error=str(e))
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": "30"})
+
+def launch_mission(job_id: str, video_hash: str) -> dict:
+    """Queues a fully received upload on the scheduler."""
+    job = job_store.update(job_id, status="QUEUED", video_hash=video_hash, worker=WORKER_ID)
+    BYTES_TOTAL.inc(os.path.getsize(job["video_path"]), kind="ingest")
+
+    position = submit_workflow(job_id, job["video_path"], job["directives"], video_hash)
+    return {"job_id": job_id, "status": "STARTED", "queue_position": position}
+
+def get_upload_session(upload_id: str) -> dict:
+    job = job_store.get(upload_id)
+    if job is None or job["status"] != "UPLOADING":
+        upload_locks.pop(upload_id, None)
+        raise HTTPException(status_code=404, detail="Upload session not found")
+    if not os.path.exists(job["video_path"]):
+        # Idle sessions are reclaimed by the storage sweeper
+        upload_locks.pop(upload_id, None)
+        job_store.update(upload_id, status="FAILED", error="Upload session expired")
+        raise HTTPException(status_code=404, detail="Upload session expired")
+    return job
+
+def claim_upload(upload_id: str) -> asyncio.Lock:
+    """Returns the session's lock, or 423 while another PATCH or completion holds it.
+
+    Nothing awaits between this check and `async with`, so the lock is taken atomically.
+    """
+    lock = upload_locks.setdefault(upload_id, asyncio.Lock())
+    if lock.locked():
+        raise HTTPException(status_code=423, detail="Upload is busy with another request. Retry from GET /uploads/{id}.")
+    return lock
 
 # --- ENDPOINTS ---
 
@@ -66,93 +310,540 @@ async def health_check():
 
 @app.post("/upload")
 async def start_mission(
-    background_tasks: BackgroundTasks, 
     file: UploadFile = File(...),
     directives: str = Form(None)
 ):
-    """Accepts video file and initiates asynchronous workflow."""
+    """Accepts video file (multipart form) and initiates asynchronous workflow."""
+    ensure_capacity()
+    job_id, temp_path = register_upload(file.filename, directives)
+
+    # Saving file on server disk: size-capped, sniffed and hashed on the way
+    sink = IngestSink(temp_path, settings.max_upload_bytes)
+    try:
+        while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+            sink.write(chunk)
+        video_hash = sink.finalize()
+    except (UploadTooLarge, UnsupportedMedia) as e:
+        raise reject_upload(job_id, sink, e)
+    except Exception as e:
+        # Client disconnected mid-upload
+        sink.abort()
+        job_store.update(job_id, status="FAILED", error=f"Upload interrupted: {e}")
+        raise
+
+    return launch_mission(job_id, video_hash)
+
+@app.post("/upload/stream")
+async def start_mission_stream(request: Request, filename: str, directives: str = None):
+    """Accepts a raw video body and initiates asynchronous workflow.
+
+    Chunks go from the socket straight to temp/, with no multipart spooling in between.
+    """
+    ensure_capacity()
+
+    declared_size = int(request.headers.get("content-length") or 0)
+    if declared_size > settings.max_upload_bytes:
+        raise HTTPException(status_code=413, detail=f"Upload exceeds the {settings.max_upload_bytes} byte limit.")
+
+    job_id, temp_path = register_upload(filename, directives)
+
+    sink = IngestSink(temp_path, settings.max_upload_bytes)
+    try:
+        async for chunk in request.stream():
+            sink.write(chunk)
+        video_hash = sink.finalize()
+    except (UploadTooLarge, UnsupportedMedia) as e:
+        raise reject_upload(job_id, sink, e)
+    except Exception as e:
+        # Client disconnected mid-stream
+        sink.abort()
+        job_store.update(job_id, status="FAILED", error=f"Upload interrupted: {e}")
+        raise
+
+    return launch_mission(job_id, video_hash)
+
+# --- RESUMABLE UPLOADS ---
+# POST /uploads -> PATCH /uploads/{id} (Upload-Offset header, raw chunk body) ... -> POST /uploads/{id}/complete
+
+@app.post("/uploads")
+async def create_upload(filename: str = Form(...), directives: str = Form(None), size: int = Form(None)):
+    """Opens a resumable upload session."""
+    if size and size > settings.max_upload_bytes:
+        raise HTTPException(status_code=413, detail=f"Upload exceeds the {settings.max_upload_bytes} byte limit.")
+    ensure_capacity()
+
+    upload_id, temp_path = register_upload(filename, directives)
+    open(temp_path, "wb").close()
+    upload_hashers[upload_id] = (0, hashlib.sha256())
+
+    return {"upload_id": upload_id, "offset": 0}
+
+@app.get("/uploads/{upload_id}")
+async def get_upload(upload_id: str):
+    """Returns how many bytes the server holds, i.e. where the client should resume."""
+    job = get_upload_session(upload_id)
+    return {"upload_id": upload_id, "offset": os.path.getsize(job["video_path"])}
+
+@app.patch("/uploads/{upload_id}")
+async def append_upload(upload_id: str, request: Request, upload_offset: int = Header(...)):
+    """Appends a chunk at Upload-Offset. A mismatched offset returns 409 with the real one,
+    a session another request is writing to returns 423."""
+    async with claim_upload(upload_id):
+        job = get_upload_session(upload_id)
+        temp_path = job["video_path"]
+
+        offset = os.path.getsize(temp_path)
+        if upload_offset != offset:
+            raise HTTPException(status_code=409, detail={"offset": offset})
+
+        # Keep hashing incrementally only if the running hasher covers exactly the bytes on disk
+        entry = upload_hashers.pop(upload_id, None)
+        hasher = entry[1] if entry and entry[0] == offset else None
+
+        sink = IngestSink(temp_path, settings.max_upload_bytes, offset=offset, hasher=hasher)
+        try:
+            async for chunk in request.stream():
+                sink.write(chunk)
+        except (UploadTooLarge, UnsupportedMedia) as e:
+            raise reject_upload(upload_id, sink, e)
+        finally:
+            # Bytes written so far stay on disk so a dropped connection can resume
+            sink.close()
+            if hasher is not None and os.path.exists(temp_path):
+                upload_hashers[upload_id] = (sink.size, sink.hasher)
+
+    return {"upload_id": upload_id, "offset": sink.size}
+
+@app.post("/uploads/{upload_id}/complete")
+async def complete_upload(upload_id: str):
+    """Finishes a resumable upload and initiates asynchronous workflow."""
+    async with claim_upload(upload_id):
+        job = get_upload_session(upload_id)
+        ensure_capacity()
+
+        temp_path = job["video_path"]
+        entry = upload_hashers.pop(upload_id, None)
+        if entry and entry[0] == os.path.getsize(temp_path):
+            video_hash = entry[1].hexdigest()
+        else:
+            video_hash = await run_in_threadpool(hash_file, temp_path)
+
+        upload_locks.pop(upload_id, None)
+        with open(temp_path, "rb") as f:
+            if sniff_container(f.read(SNIFF_BYTES)) is None:
+                os.remove(temp_path)
+                job_store.update(upload_id, status="FAILED", error="Uploaded file is not a recognised video container.")
+                raise HTTPException(status_code=415, detail="Uploaded file is not a recognised video container.")
+
+        return launch_mission(upload_id, video_hash)
+
+# --- DERIVED JOBS ---
+
+@app.post("/jobs/{parent_id}/rerun")
+async def rerun_mission(parent_id: str, request: RerunRequest):
+    """Derives a new job from a completed one: same source, new directives and/or clip edits.
+
+    Clips whose (start, end, crop, branding) are unchanged are linked from the parent's
+    output folder and keep their posts; only the changed clips are rendered and written.
+    """
+    parent = job_store.get(parent_id)
+    if parent is None:
+        raise HTTPException(status_code=404, detail="Mission not found")
+    if parent["status"] != "COMPLETED" or not parent.get("report"):
+        raise HTTPException(status_code=409, detail="Only completed missions can be re-run")
+    if not os.path.exists(parent["video_path"]):
+        raise HTTPException(status_code=410, detail="Source video of the parent mission is gone")
+    ensure_capacity()
+
     job_id = str(uuid.uuid4())[:8]
-    temp_path = os.path.join(temp_dir, f"{job_id}_{file.filename}")
-    
-    # Saving file on server disk
-    with open(temp_path, "wb") as buffer:
-        shutil.copyfileobj(file.file, buffer)
-    
-    # Task state initialization
-    jobs[job_id] = {
+    directives = request.directives if request.directives is not None else parent.get("directives")
+    clip_edits = [edit.model_dump() for edit in request.clips] if request.clips is not None else None
+    job_store.create({
         "job_id": job_id,
-        "status": "ANALYZING",
-        "video_path": temp_path,
+        "status": "QUEUED",
+        "video_path": parent["video_path"],
+        "video_hash": parent.get("video_hash"),
         "directives": directives,
+        "parent_job_id": parent_id,
+        "clip_edits": clip_edits,
+        "worker": WORKER_ID,
         "result": None
-    }
-    
-    # Launching "Editing Train" in background
-    background_tasks.add_task(execute_workflow, job_id, temp_path, directives)
-    
-    return {"job_id": job_id, "status": "STARTED"}
+    })
+
+    position = submit_workflow(job_id, parent["video_path"], directives, parent.get("video_hash"), parent_id, clip_edits)
+    return {"job_id": job_id, "parent_job_id": parent_id, "status": "STARTED", "queue_position": position}
 
 @app.get("/status/{job_id}")
 async def get_status(job_id: str):
     """Returns current task state for frontend."""
-    if job_id not in jobs:
+    job = job_store.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Mission not found")
+    if job["status"] == "QUEUED":
+        job["queue_position"] = scheduler.position(job_id)
+    return job
+
+# Seconds between SSE keep-alive comments
+SSE_KEEPALIVE = 15
+# Seconds between job store reads in an SSE stream. With several uvicorn workers the job may
+# run in another process, whose in-process event bus never reaches this stream.
+SSE_STORE_POLL = 2.0
+
+def format_sse(event: dict) -> str:
+    return f"event: {event['type']}\ndata: {json.dumps(event, default=str)}\n\n"
+
+def store_events(job_id: str, job: dict, last_status: tuple) -> list:
+    """Events implied by the stored job: a status change and/or the terminal event."""
+    if job["status"] in FINISHED_STATUSES:
+        final_type = "completed" if job["status"] == "COMPLETED" else "failed"
+        return [{"type": final_type, "job_id": job_id, "status": job["status"],
+                 "result": job.get("result"), "error": job.get("error")}]
+    if (job["status"], job.get("active_stages", [])) == last_status:
+        return []
+    return [{"type": "status", "job_id": job_id, "status": job["status"],
+             "active_stages": job.get("active_stages", []), "queue_position": scheduler.position(job_id)}]
+
+@app.get("/events/{job_id}")
+async def stream_events(job_id: str, request: Request):
+    """Server-Sent Events: status changes, stage timings, per-clip render progress and
+    finished clip URLs as they happen. Ends after the completed/failed event.
+
+    Detailed events come from the in-process bus; status and the terminal event are also
+    read from the job store, so a stream served by another worker than the job's still ends.
+    """
+    if job_store.get(job_id) is None:
         raise HTTPException(status_code=404, detail="Mission not found")
-    return jobs[job_id]
+
+    async def event_stream():
+        # Subscribe before taking the snapshot so nothing published in between is lost
+        sub = event_bus.subscribe(job_id)
+        try:
+            last_status = None
+            idle = 0.0
+            while True:
+                job = job_store.get(job_id)
+                for event in store_events(job_id, job, last_status):
+                    yield format_sse(event)
+                    if event["type"] in ("completed", "failed"):
+                        return
+                    last_status = (event["status"], event["active_stages"])
+
+                if await request.is_disconnected():
+                    return
+                batch = await sub.next_batch(timeout=SSE_STORE_POLL)
+                if not batch:
+                    idle += SSE_STORE_POLL
+                    if idle >= SSE_KEEPALIVE:
+                        yield ": keep-alive\n\n"
+                        idle = 0.0
+                    continue
+                idle = 0.0
+                for event in batch:
+                    yield format_sse(event)
+                    if event["type"] in ("completed", "failed"):
+                        return
+                    if event["type"] == "status":
+                        last_status = (event["status"], event["active_stages"])
+        finally:
+            event_bus.unsubscribe(sub)
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.get("/scheduler")
+async def get_scheduler_state():
+    """Queue depth and active slots per pipeline stage."""
+    return scheduler.snapshot()
+
+@app.get("/resilience")
+async def get_resilience_state():
+    """Circuit state, in-flight calls and rate-limit tokens per external endpoint."""
+    return resilience.snapshot()
+
+@app.get("/cache")
+async def get_cache_stats():
+    """Hit rates of the copywriter response cache, per lookup level (whole brief, single clip)."""
+    from src.agents.copywriter import BRIEF_LEVEL, CLIP_LEVEL, copy_cache
+    return {"copywriter": copy_cache.stats(BRIEF_LEVEL), "copywriter_clip": copy_cache.stats(CLIP_LEVEL)}
+
+@app.get("/storage")
+async def get_storage_state():
+    """Usage per storage class and the outcome of the last sweep."""
+    report = storage.last_report or await run_in_threadpool(storage.sweep)
+    cache_max_bytes = {name: max_bytes for name, (_, max_bytes) in storage.caches.items()}
+    return {"quota_bytes": storage.quota_bytes, "cache_max_bytes": cache_max_bytes, **report.model_dump()}
+
+@app.get("/memory/similar")
+async def get_similar_campaigns(
+    topic: str,
+    limit: int = 5,
+    platform: Optional[str] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    campaign_type: str = "campaign_brief",
+    score_threshold: Optional[float] = None
+):
+    """Past campaigns most similar to a topic, with optional payload filters."""
+    from src.services.retrieval import find_similar_campaigns, retrieval_stats
+
+    try:
+        matches = await run_in_threadpool(
+            find_similar_campaigns,
+            topic,
+            limit=min(max(limit, 1), 50),
+            campaign_type=campaign_type or None,
+            platform=platform,
+            since=since,
+            until=until,
+            score_threshold=score_threshold
+        )
+    except Exception as e:
+        log.error("Similarity search failed", topic=topic, error=str(e))
+        raise HTTPException(status_code=503, detail="Memory search unavailable")
+
+    return {"results": [m.model_dump() for m in matches], "stats": retrieval_stats()}
 
 # --- CONDUCTOR WORKFLOW ---
 
-async def execute_workflow(job_id: str, video_path: str, directives: str = None):
-    """Orchestration of all system modules."""
+# Status label shown while a stage holds a slot
+STAGE_STATUS = {
+    "prepare": "PREPARING",
+    "analyze": "ANALYZING",
+    "write": "WRITING",
+    "render": "RENDERING",
+    "dispatch": "DISTRIBUTING",
+    "remember": "REMEMBERING",
+}
+
+# Stages currently running per job (the workflow of a job always runs in one process)
+active_stages = {}
+# Wall-clock seconds per finished stage, and start times of running ones
+stage_timings = {}
+stage_started = {}
+
+def leading_status(stages: list) -> str:
+    """'status' for older clients: the earliest running stage in pipeline order, so the
+    label never runs ahead of work still in progress (e.g. remembering while rendering)."""
+    return min(stages, key=list(STAGE_STATUS.values()).index)
+
+def enter_stage(job_id: str, stage: str):
+    stages = active_stages.setdefault(job_id, [])
+    stages.append(STAGE_STATUS[stage])
+    stage_started[(job_id, stage)] = time.perf_counter()
+    status = leading_status(stages)
+    job_store.update(job_id, status=status, active_stages=list(stages))
+    event_bus.publish(job_id, "status", key="status", status=status, active_stages=list(stages))
+    event_bus.publish(job_id, "stage", key=f"stage:{stage}", stage=stage, state="started")
+
+def leave_stage(job_id: str, stage: str):
+    stages = active_stages.get(job_id, [])
+    if STAGE_STATUS[stage] in stages:
+        stages.remove(STAGE_STATUS[stage])
+
+    elapsed = time.perf_counter() - stage_started.pop((job_id, stage), time.perf_counter())
+    timings = stage_timings.setdefault(job_id, {})
+    timings[stage] = round(elapsed, 3)
+    STAGE_SECONDS.observe(elapsed, stage=stage)
+    log.info("Stage finished", job_id=job_id, stage=stage, seconds=timings[stage])
+
+    # The status follows the stages still running; with none left it stays until the next one
+    # starts or the job finishes
+    fields = {"status": leading_status(stages)} if stages else {}
+    job_store.update(job_id, active_stages=list(stages), stage_timings=dict(timings), **fields)
+    if stages:
+        event_bus.publish(job_id, "status", key="status", status=fields["status"], active_stages=list(stages))
+    event_bus.publish(job_id, "stage", key=f"stage:{stage}", stage=stage, state="finished", seconds=timings[stage])
+
+def render_event_forwarder(job_id: str):
+    """Forwards render_progress / clip_ready events from the render thread to the event bus."""
+    def forward(event: dict):
+        event = dict(event)
+        event_type = event.pop("type")
+        prefix = "render" if event_type == "render_progress" else "clip"
+        event_bus.publish(job_id, event_type, key=f"{prefix}:{event.get('clip')}", **event)
+    return forward
+
+def copy_event_forwarder(job_id: str):
+    """Publishes per-clip posts from fan-out copywriting as they stream in."""
+    def forward(event: dict):
+        event = dict(event)
+        event_type = event.pop("type")
+        key = "copy:strategy" if event_type == "copy_strategy" else f"copy:{event.get('clip')}"
+        event_bus.publish(job_id, event_type, key=key, **event)
+    return forward
+
+def with_stage_deadline(fn, mode: str):
+    """Bounds the Gemini/Qdrant calls of a stage, retries and waits included, by
+    STAGE_DEADLINE_SECONDS from when it holds its slot: queueing under load never counts."""
+    seconds = settings.stage_deadline_seconds
+    if mode == "async":
+        async def bounded(*args, **kwargs):
+            with deadline(seconds):
+                return await fn(*args, **kwargs)
+        return bounded
+    if mode == "thread":
+        def bounded(*args, **kwargs):
+            with deadline(seconds):
+                return fn(*args, **kwargs)
+        return bounded
+    # Process pool: no guarded calls, and the function must stay picklable
+    return fn
+
+async def run_stage(job_id: str, stage: str, fn, *args, **kwargs):
+    """Runs a stage through its scheduler queue and tracks it in the job's active_stages."""
+    entered = False
+
+    def on_start():
+        nonlocal entered
+        entered = True
+        enter_stage(job_id, stage)
+
     try:
-        # STEP 1: Multimodal Analysis Gemini 3 Flash Preview
-        print(f"LOG [{job_id}]: Starting visual analysis...")
-        analysis_report = await run_analysis(video_path, directives)
-        
-        # STEP 2: Strategy and Posts Generation (Copywriter Agent)
-        jobs[job_id]["status"] = "WRITING"
-        print(f"LOG [{job_id}]: Gemini generating social media posts...")
-        campaign = await run_copywriting(analysis_report.model_dump(), directives)
-        
-        # STEP 3: Physical FFmpeg Editing (Video Proc)
-        jobs[job_id]["status"] = "RENDERING"
-        print(f"LOG [{job_id}]: System cutting video into fragments...")
-        video_results = process_video_segments(
-            video_path, 
-            analysis_report.model_dump()['clips'], 
+        bounded = with_stage_deadline(fn, kwargs.get("mode", "async"))
+        return await scheduler.run(stage, job_id, bounded, *args, on_start=on_start, **kwargs)
+    finally:
+        if entered:
+            leave_stage(job_id, stage)
+
+async def execute_workflow(
+    job_id: str,
+    video_path: str,
+    directives: str = None,
+    video_hash: str = None,
+    parent_job_id: str = None,
+    clip_edits: list = None
+):
+    """Orchestration of all system modules as a dependency graph.
+
+    analyze -> (write || render) -> dispatch; memory save runs off the critical path.
+    A job derived from `parent_job_id` reuses the parent's analysis when `clip_edits`
+    are given, and the parent's renders and posts for every unchanged clip.
+    """
+    from src.agents.analyst import VideoAnalysisReport, run_analysis, get_cached_analysis
+    from src.agents.copywriter import run_copywriting
+    from src.agents.dispatcher import run_dispatch
+    from src.services.video_proc import process_video_segments
+    from src.services.preanalysis import run_preanalysis
+    from src.services.rerun import apply_clip_edits, reusable_copy
+
+    parent = job_store.get(parent_job_id) if parent_job_id else None
+    # Neither this job's files nor the parent's it reuses are swept while it runs
+    storage.acquire(job_id, parent_job_id)
+
+    # STEP 1: Multimodal Analysis Gemini 3 Flash Preview
+    async def analyze():
+        if parent and clip_edits is not None:
+            # Operator fixed clip boundaries by hand: the parent's analysis stays valid
+            report = VideoAnalysisReport.model_validate(apply_clip_edits(parent["report"], clip_edits))
+            job_store.update(job_id, topic=report.main_topic, report=report.model_dump())
+            return report
+
+        # Same video + directives already analyzed: skip the ANALYZING stage entirely
+        report = get_cached_analysis(video_hash, directives)
+        if report:
+            log.info("Analysis cache hit, skipping visual analysis", job_id=job_id)
+        else:
+            preanalysis = None
+            if settings.preanalysis_mode != "off":
+                # Scene cuts, candidate index and proxy are computed locally before any upload
+                preanalysis = await run_stage(
+                    job_id, "prepare", run_preanalysis, video_path, video_hash or job_id, mode="thread"
+                )
+            report = await run_stage(
+                job_id, "analyze", run_analysis, video_path, directives, video_hash, preanalysis=preanalysis
+            )
+        # Kept on the job so memory backfills can re-embed it and derived jobs can diff against it
+        job_store.update(job_id, topic=report.main_topic, report=report.model_dump())
+        return report
+
+    # STEP 2: Strategy and Posts Generation (Copywriter Agent)
+    async def write(report):
+        reuse_clips, reuse_strategy = None, None
+        # Posts and strategy follow the directives (language, tone, audience): with new ones every
+        # post is rewritten, while unchanged clips still reuse the parent's renders
+        if parent and directives == parent.get("directives"):
+            parent_campaign = parent["result"]["campaign"]
+            reuse_clips = reusable_copy(report.model_dump()["clips"], parent["report"], parent_campaign)
+            reuse_strategy = parent_campaign.get("overall_strategy")
+            log.info("Posts reused from parent job", job_id=job_id, clips=len(reuse_clips), of=len(report.clips))
+        return await run_stage(
+            job_id, "write", run_copywriting,
+            report.model_dump(),
+            directives,
+            on_event=copy_event_forwarder(job_id),
+            reuse_clips=reuse_clips,
+            reuse_strategy=reuse_strategy
+        )
+
+    # STEP 3: Physical FFmpeg Editing (Video Proc) - needs only the clips, so it runs alongside STEP 2
+    # Planning runs on a thread; the clips themselves go to the shared render process pool
+    async def render(report):
+        return await run_stage(
+            job_id, "render", process_video_segments,
+            video_path,
+            report.model_dump()['clips'],
             job_id,
-            output_root=output_dir
+            output_root=output_dir,
+            executor=scheduler.process_pool,
+            on_event=render_event_forwarder(job_id),
+            source_hash=video_hash,
+            parent_job_id=parent_job_id,
+            parent_videos=parent["result"]["videos"] if parent else None,
+            mode="thread"
         )
-        
-        # STEP 4: Strategic Distribution (Dispatcher Agent / MCP)
-        jobs[job_id]["status"] = "DISTRIBUTING"
-        print(f"LOG [{job_id}]: Agent Dispatcher organizing assets...", flush=True)
-        await run_dispatch(job_id, output_dir, campaign.model_dump())
-        
-        # FINALIZATION: Saving results for frontend
-        jobs[job_id]["status"] = "COMPLETED"
-        jobs[job_id]["result"] = {
-            "campaign": campaign.model_dump(),
-            "videos": video_results
-        }
-        
-        # STEP 4: Long-term Memory (Qdrant)
+
+    # STEP 4: Strategic Distribution (Dispatcher Agent / MCP)
+    async def dispatch(campaign, video_results):
+        await run_stage(job_id, "dispatch", run_dispatch, job_id, output_dir, campaign.model_dump())
+
+    # STEP 5: Long-term Memory (Qdrant)
+    async def remember(report, campaign):
+        from src.services.memory import memory_writer
+        # Queued straight into the writer, which batches across jobs and flushes one batch at a
+        # time; waiting for the batch in a "remember" slot would cap batches at REMEMBER_CONCURRENCY
+        enter_stage(job_id, "remember")
         try:
-            from src.services.memory import save_campaign_to_memory
             # We use topic from analytical report as key
-            topic = analysis_report.main_topic
-            save_campaign_to_memory(
-                {**campaign.model_dump(), "job_id": job_id}, 
-                topic
-            )
+            await memory_writer.submit({**campaign.model_dump(), "job_id": job_id}, report.main_topic)
         except Exception as mem_err:
-            print(f"WARN [{job_id}]: Failed to save in Qdrant memory: {mem_err}")
+            log.warning("Failed to save in Qdrant memory", job_id=job_id, error=str(mem_err))
+        finally:
+            leave_stage(job_id, "remember")
+
+    try:
+        run = await run_pipeline([
+            PipelineStage("analyze", analyze),
+            PipelineStage("write", write, after=("analyze",)),
+            PipelineStage("render", render, after=("analyze",)),
+            PipelineStage("dispatch", dispatch, after=("write", "render")),
+            PipelineStage("remember", remember, after=("analyze", "write"), critical=False),
+        ])
+
+        # FINALIZATION: Saving results for frontend
+        result = {
+            "campaign": run.results["write"].model_dump(),
+            "videos": run.results["render"]
+        }
+        job_store.update(job_id, status="COMPLETED", active_stages=list(active_stages.get(job_id, [])), result=result)
+        event_bus.publish(job_id, "completed", key="final", status="COMPLETED", result=result)
+        JOBS_TOTAL.inc(status="completed")
+        log.info("Mission completed", job_id=job_id, stage_timings=stage_timings.get(job_id, {}))
 
-        print(f"✅ LOG [{job_id}]: Mission completed successfully.")
+        # Keep the job admitted until background stages finish
+        await run.drain()
 
     except Exception as e:
-        jobs[job_id]["status"] = "FAILED"
-        jobs[job_id]["error"] = str(e)
-        print(f"❌ LOG [{job_id}]: CRITICAL ERROR: {e}")
+        job_store.update(job_id, status="FAILED", error=str(e))
+        event_bus.publish(job_id, "failed", key="final", status="FAILED", error=str(e))
+        JOBS_TOTAL.inc(status="failed")
+        log.error("Mission failed", job_id=job_id, error=str(e))
+    finally:
+        storage.release(job_id, parent_job_id)
+        active_stages.pop(job_id, None)
+        stage_timings.pop(job_id, None)
 
 # --- SERVER START ---
 
@@ -1,6 +1,16 @@
+from typing import Any, Dict, Literal, Optional
+from pathlib import Path
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from pydantic import Field
 
+# Repository root; relative paths in settings are resolved against it
+PROJECT_ROOT = Path(__file__).resolve().parent.parent.parent
+
+def resolve_path(path: str) -> Path:
+    """Makes a settings path absolute relative to the project root."""
+    p = Path(path)
+    return p if p.is_absolute() else PROJECT_ROOT / p
+
 class Settings(BaseSettings):
     model_config = SettingsConfigDict(env_file=".env", extra="ignore")
 
@@ -10,4 +20,142 @@ class Settings(BaseSettings):
     langfuse_host: str = Field(default="http://localhost:3000", alias="LANGFUSE_HOST")
     qdrant_url: str = Field(default="http://localhost:6333", alias="QDRANT_URL")
 
-settings = Settings()
\ No newline at end of file
+    # Render engine (0 = one worker per CPU core)
+    render_workers: int = Field(default=0, alias="RENDER_WORKERS")
+    # exact = frame-accurate cuts, fast = keyframe-snapped cuts with stream-copied extraction
+    video_extract_mode: Literal["exact", "fast"] = Field(default="exact", alias="VIDEO_EXTRACT_MODE")
+
+    # Job store ("sqlite" persists across restarts and workers, "memory" for tests)
+    job_store_backend: Literal["sqlite", "memory"] = Field(default="sqlite", alias="JOB_STORE_BACKEND")
+    job_store_path: str = Field(default="data/jobs.db", alias="JOB_STORE_PATH")
+    # Finished jobs are evicted after this many seconds (0 = keep forever)
+    job_ttl_seconds: int = Field(default=7 * 24 * 3600, alias="JOB_TTL_SECONDS")
+
+    # Scheduler: admission cap and per-stage concurrency
+    max_pending_jobs: int = Field(default=32, alias="MAX_PENDING_JOBS")
+    analyze_concurrency: int = Field(default=4, alias="ANALYZE_CONCURRENCY")
+    write_concurrency: int = Field(default=8, alias="WRITE_CONCURRENCY")
+    render_concurrency: int = Field(default=2, alias="RENDER_CONCURRENCY")
+    dispatch_concurrency: int = Field(default=8, alias="DISPATCH_CONCURRENCY")
+    remember_concurrency: int = Field(default=4, alias="REMEMBER_CONCURRENCY")
+    scheduler_threads: int = Field(default=8, alias="SCHEDULER_THREADS")
+
+    # Gemini File API: max seconds to wait for an uploaded video to leave PROCESSING
+    file_processing_timeout: float = Field(default=600, alias="FILE_PROCESSING_TIMEOUT")
+
+    # Analysis cache (content-addressed by video hash)
+    analysis_cache_dir: str = Field(default="data/analysis_cache", alias="ANALYSIS_CACHE_DIR")
+    analysis_cache_max_bytes: int = Field(default=256 * 1024 * 1024, alias="ANALYSIS_CACHE_MAX_BYTES")
+
+    # Upload ingestion hard limit (bytes)
+    max_upload_bytes: int = Field(default=8 * 1024 ** 3, alias="MAX_UPLOAD_BYTES")
+
+    # Dispatcher: "direct" executes clip_strategies deterministically, "agent" uses the LLM
+    dispatch_mode: Literal["direct", "agent"] = Field(default="direct", alias="DISPATCH_MODE")
+
+    # Memory writer: campaigns are embedded/upserted in batches of this size or after this many seconds
+    memory_batch_size: int = Field(default=16, alias="MEMORY_BATCH_SIZE")
+    memory_flush_interval: float = Field(default=2.0, alias="MEMORY_FLUSH_INTERVAL")
+
+    # Retrieval: query embeddings kept in a local LRU cache keyed by text hash
+    embedding_cache_size: int = Field(default=4096, alias="EMBEDDING_CACHE_SIZE")
+
+    # content_memory layout, applied idempotently on startup (see memory_schema.apply_schema)
+    qdrant_quantization: Literal["none", "int8"] = Field(default="int8", alias="QDRANT_QUANTIZATION")
+    qdrant_on_disk: bool = Field(default=False, alias="QDRANT_ON_DISK")
+    qdrant_hnsw_m: int = Field(default=16, alias="QDRANT_HNSW_M")
+    qdrant_hnsw_ef_construct: int = Field(default=100, alias="QDRANT_HNSW_EF_CONSTRUCT")
+    qdrant_hnsw_ef_search: Optional[int] = Field(default=None, alias="QDRANT_HNSW_EF_SEARCH")
+
+    # Copywriter response cache: exact tier on disk, optional semantic tier (embedding similarity)
+    copy_cache_dir: str = Field(default="data/copy_cache", alias="COPY_CACHE_DIR")
+    copy_cache_max_bytes: int = Field(default=64 * 1024 * 1024, alias="COPY_CACHE_MAX_BYTES")
+    copy_cache_ttl_seconds: int = Field(default=7 * 24 * 3600, alias="COPY_CACHE_TTL_SECONDS")
+    copy_semantic_cache: bool = Field(default=False, alias="COPY_SEMANTIC_CACHE")
+    copy_semantic_threshold: float = Field(default=0.97, alias="COPY_SEMANTIC_THRESHOLD")
+    copy_semantic_cache_size: int = Field(default=512, alias="COPY_SEMANTIC_CACHE_SIZE")
+
+    # Copywriter: "fanout" writes every clip in its own call, "single" asks for the whole brief at once
+    copy_mode: Literal["fanout", "single"] = Field(default="fanout", alias="COPY_MODE")
+    copy_fanout_concurrency: int = Field(default=4, alias="COPY_FANOUT_CONCURRENCY")
+    copy_clip_retries: int = Field(default=2, alias="COPY_CLIP_RETRIES")
+
+    # Local pre-analysis before ANALYZING: "proxy" uploads a low-res proxy, "windows" only the top-K
+    # candidate windows, "off" (default) uploads the original source. The other modes decode the
+    # source locally before the upload (frames, audio, proxy); index and proxy are cached per
+    # content and settings in PREANALYSIS_DIR, evicted least recently used beyond the cap
+    preanalysis_mode: Literal["off", "proxy", "windows"] = Field(default="off", alias="PREANALYSIS_MODE")
+    preanalysis_dir: str = Field(default="data/preanalysis", alias="PREANALYSIS_DIR")
+    preanalysis_cache_max_bytes: int = Field(default=2 * 1024 ** 3, alias="PREANALYSIS_CACHE_MAX_BYTES")
+    preanalysis_fps: float = Field(default=4.0, alias="PREANALYSIS_FPS")
+    preanalysis_candidates: int = Field(default=20, alias="PREANALYSIS_CANDIDATES")
+    preanalysis_top_k: int = Field(default=6, alias="PREANALYSIS_TOP_K")
+    prepare_concurrency: int = Field(default=2, alias="PREPARE_CONCURRENCY")
+    scene_cut_threshold: float = Field(default=0.3, alias="SCENE_CUT_THRESHOLD")
+    min_scene_seconds: float = Field(default=1.0, alias="MIN_SCENE_SECONDS")
+    scene_snap_tolerance: float = Field(default=1.5, alias="SCENE_SNAP_TOLERANCE")
+    proxy_height: int = Field(default=360, alias="PROXY_HEIGHT")
+    proxy_fps: int = Field(default=15, alias="PROXY_FPS")
+    proxy_crf: int = Field(default=32, alias="PROXY_CRF")
+
+    # Shared client registry: HTTP pool size for google-genai, background warm-up after startup
+    genai_max_connections: int = Field(default=32, alias="GENAI_MAX_CONNECTIONS")
+    warm_up_on_startup: bool = Field(default=True, alias="WARM_UP_ON_STARTUP")
+
+    # Telemetry: Prometheus metrics on /metrics (no-op when disabled) and structured logs
+    metrics_enabled: bool = Field(default=True, alias="METRICS_ENABLED")
+    log_format: Literal["json", "text"] = Field(default="json", alias="LOG_FORMAT")
+    log_level: str = Field(default="INFO", alias="LOG_LEVEL")
+
+    # Rendition ladder: one decode per clip, one encode per distinct platform profile (see
+    # services/renditions.py). Off by default: the three default profiles cost three x264 encodes
+    # per clip instead of one. RENDITION_PROFILES is JSON merged over the defaults, e.g.
+    # {"linkedin": {"aspect": "16:9"}}; platforms with identical profiles share one encode
+    rendition_ladder: bool = Field(default=False, alias="RENDITION_LADDER")
+    rendition_profiles: Dict[str, Dict[str, Any]] = Field(default_factory=dict, alias="RENDITION_PROFILES")
+    rendition_primary: str = Field(default="tiktok", alias="RENDITION_PRIMARY")
+    rendition_cache_dir: str = Field(default="data/renditions", alias="RENDITION_CACHE_DIR")
+    rendition_cache_max_bytes: int = Field(default=4 * 1024 ** 3, alias="RENDITION_CACHE_MAX_BYTES")
+
+    # Crop placement: "center" keeps the fixed centered window, "smart" follows a saliency/motion
+    # ROI track computed on a low-res sample of each clip (see services/smart_crop.py)
+    crop_mode: Literal["center", "smart"] = Field(default="center", alias="CROP_MODE")
+    smart_crop_fps: float = Field(default=5.0, alias="SMART_CROP_FPS")
+    smart_crop_width: int = Field(default=128, alias="SMART_CROP_WIDTH")
+    smart_crop_smoothing: float = Field(default=0.8, alias="SMART_CROP_SMOOTHING")
+    smart_crop_cache_dir: str = Field(default="data/roi_tracks", alias="SMART_CROP_CACHE_DIR")
+    smart_crop_cache_max_bytes: int = Field(default=64 * 1024 ** 2, alias="SMART_CROP_CACHE_MAX_BYTES")
+
+    # Storage lifecycle (see services/storage.py): retention per class in hours (0 = keep forever),
+    # a quota over temp/ and the output roots enforced by evicting least recently used jobs
+    # (0 = no quota), hardlink dedup of identical files; swept in the background (0 = no sweeper).
+    # The data/ caches are not part of the quota: each evicts on its own *_MAX_BYTES cap, and
+    # /storage reports their usage next to it
+    storage_source_retention_hours: float = Field(default=24, alias="STORAGE_SOURCE_RETENTION_HOURS")
+    storage_render_retention_hours: float = Field(default=168, alias="STORAGE_RENDER_RETENTION_HOURS")
+    storage_platform_retention_hours: float = Field(default=72, alias="STORAGE_PLATFORM_RETENTION_HOURS")
+    storage_quota_bytes: int = Field(default=50 * 1024 ** 3, alias="STORAGE_QUOTA_BYTES")
+    storage_dedup: bool = Field(default=True, alias="STORAGE_DEDUP")
+    storage_sweep_interval_seconds: int = Field(default=600, alias="STORAGE_SWEEP_INTERVAL_SECONDS")
+
+    # Resilience of Gemini/Qdrant calls (see core/resilience.py): token bucket per model/endpoint
+    # (requests per minute, 0 = unlimited), in-flight cap (0 = unbounded), jittered retries of
+    # transient errors, and a circuit breaker that holds calls back while an endpoint is down.
+    # Every call is bounded by CALL_DEADLINE_SECONDS and by its stage's STAGE_DEADLINE_SECONDS, counted
+    # from when the stage gets its scheduler slot, so time queued under load never counts (0 = none).
+    # CALL_DEADLINE_SECONDS is also the socket timeout of the shared Gemini HTTP clients
+    resilience_enabled: bool = Field(default=True, alias="RESILIENCE_ENABLED")
+    gemini_rpm: float = Field(default=60, alias="GEMINI_RPM")
+    gemini_concurrency: int = Field(default=8, alias="GEMINI_CONCURRENCY")
+    gemini_files_rpm: float = Field(default=60, alias="GEMINI_FILES_RPM")
+    gemini_embed_rpm: float = Field(default=300, alias="GEMINI_EMBED_RPM")
+    qdrant_concurrency: int = Field(default=16, alias="QDRANT_CONCURRENCY")
+    call_max_attempts: int = Field(default=4, alias="CALL_MAX_ATTEMPTS")
+    call_retry_base_delay: float = Field(default=1.0, alias="CALL_RETRY_BASE_DELAY")
+    call_retry_max_delay: float = Field(default=30.0, alias="CALL_RETRY_MAX_DELAY")
+    call_deadline_seconds: float = Field(default=600, alias="CALL_DEADLINE_SECONDS")
+    circuit_failure_threshold: int = Field(default=5, alias="CIRCUIT_FAILURE_THRESHOLD")
+    circuit_cooldown_seconds: float = Field(default=30.0, alias="CIRCUIT_COOLDOWN_SECONDS")
+    stage_deadline_seconds: float = Field(default=1800, alias="STAGE_DEADLINE_SECONDS")
+
+settings = Settings()
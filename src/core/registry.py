@@ -0,0 +1,104 @@
+import time
+import threading
+from typing import Any, Callable, Dict, List, Tuple
+from src.core.config import settings
+from src.core.resilience import guard_model
+from src.core.telemetry import get_logger
+
+log = get_logger("REGISTRY")
+
+class Registry:
+    """Process-wide, lazily built clients and models shared by all agents and services.
+
+    Nothing heavy is imported or connected until first use. Each instance is built
+    once under a lock; `override()` swaps one in (benchmarks, tests). Warm-up hooks
+    let the API build everything in the background after it starts listening.
+    """
+
+    def __init__(self):
+        self._instances: Dict[str, Any] = {}
+        self._lock = threading.RLock()
+        self._warmups: List[Tuple[str, Callable[[], Any]]] = []
+        self.warm = False
+
+    def get(self, name: str, factory: Callable[[], Any]) -> Any:
+        instance = self._instances.get(name)
+        if instance is None:
+            with self._lock:
+                instance = self._instances.get(name)
+                if instance is None:
+                    instance = factory()
+                    self._instances[name] = instance
+        return instance
+
+    def override(self, name: str, instance: Any):
+        with self._lock:
+            self._instances[name] = instance
+
+    # --- CLIENTS ---
+
+    def genai_client(self):
+        """One google-genai client (sync + async pooled HTTP transports) for the whole process."""
+        def build():
+            import httpx
+            from google import genai
+            from google.genai import types
+
+            limits = httpx.Limits(
+                max_connections=settings.genai_max_connections,
+                max_keepalive_connections=settings.genai_max_connections
+            )
+            # A stalled socket is dropped instead of holding a pool slot forever. genai sends its
+            # own per-request timeout (ms, None = unbounded) over the client default, so both are set
+            timeout = settings.call_deadline_seconds or None
+            return genai.Client(
+                api_key=settings.gemini_api_key,
+                http_options=types.HttpOptions(
+                    timeout=int(timeout * 1000) if timeout else None,
+                    httpx_client=httpx.Client(limits=limits, timeout=timeout),
+                    httpx_async_client=httpx.AsyncClient(limits=limits, timeout=timeout)
+                )
+            )
+        return self.get("genai_client", build)
+
+    def google_model(self, model_name: str):
+        """PydanticAI GoogleModel on top of the shared genai client.
+
+        Every request goes through the model's resilience guard (rate limit, retries, circuit).
+        """
+        def build():
+            from pydantic_ai.models.google import GoogleModel
+            from pydantic_ai.providers.google import GoogleProvider
+            return GoogleModel(model_name, provider=GoogleProvider(client=self.genai_client()))
+        return guard_model(self.get(f"google_model:{model_name}", build), f"gemini:{model_name}")
+
+    def qdrant_client(self):
+        def build():
+            from src.services.memory import create_qdrant_client
+            return create_qdrant_client(settings.qdrant_url)
+        return self.get("qdrant_client", build)
+
+    # --- WARM-UP ---
+
+    def on_warm_up(self, name: str):
+        """Decorator registering a warm-up step."""
+        def register(fn: Callable[[], Any]):
+            self._warmups.append((name, fn))
+            return fn
+        return register
+
+    def warm_up(self) -> Dict[str, float]:
+        """Runs every warm-up step once; failures are logged, never raised. Returns seconds per step."""
+        timings = {}
+        for name, fn in self._warmups:
+            t0 = time.perf_counter()
+            try:
+                fn()
+            except Exception as e:
+                log.warning("Warm-up step failed", step=name, error=str(e))
+            timings[name] = round(time.perf_counter() - t0, 3)
+        self.warm = True
+        log.info("Warm-up finished", seconds=round(sum(timings.values()), 3), steps=timings)
+        return timings
+
+registry = Registry()
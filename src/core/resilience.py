@@ -0,0 +1,404 @@
+import time
+import random
+import asyncio
+import threading
+from contextlib import AsyncExitStack, asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from functools import lru_cache
+from typing import Any, Callable, Dict, Optional
+from pydantic import BaseModel
+from src.core.config import settings
+from src.core.telemetry import (
+    CIRCUIT_STATE, EXTERNAL_CALL_RETRIES, EXTERNAL_CALL_WAIT_SECONDS, EXTERNAL_CALLS_IN_FLIGHT, get_logger
+)
+
+# HTTP statuses worth another attempt: timeouts, rate limits and server errors
+TRANSIENT_STATUS = (408, 429)
+# Transport failures of httpx (google-genai) and qdrant-client, matched by name so neither is imported here
+TRANSIENT_ERRORS = ("TransportError", "TimeoutException", "ResponseHandlingException")
+# How often a call waiting for a concurrency slot or a half-open probe looks again
+POLL_INTERVAL = 0.05
+# A full bucket holds this many seconds of quota, so short bursts are not paced
+BURST_SECONDS = 10
+
+CIRCUIT_STATES = {"closed": 0, "half_open": 1, "open": 2}
+
+log = get_logger("RESILIENCE")
+
+class DeadlineExceeded(TimeoutError):
+    """The call's deadline passed while it was waiting for a permit or a retry, or during an attempt."""
+
+class CircuitOpenError(Exception):
+    """The endpoint's circuit stays open past the call's deadline, so waiting is pointless."""
+
+# 1. DEADLINES
+_deadline: ContextVar[Optional[float]] = ContextVar("call_deadline", default=None)
+
+@contextmanager
+def deadline(seconds: Optional[float]):
+    """Bounds every guarded call in the block, waits and retries included, to `seconds` from now.
+
+    The deadline follows the context into tasks and scheduler threads; nested blocks keep
+    the earlier one. None or 0 adds no bound.
+    """
+    if not seconds:
+        yield
+        return
+    until = time.monotonic() + seconds
+    current = _deadline.get()
+    token = _deadline.set(until if current is None else min(current, until))
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+def time_left() -> Optional[float]:
+    """Seconds until the current deadline, or None without one."""
+    until = _deadline.get()
+    return None if until is None else until - time.monotonic()
+
+# 2. ERROR CLASSIFICATION
+def status_code(exc: BaseException) -> Optional[int]:
+    """HTTP status of a pydantic-ai, google-genai or qdrant-client error, if it carries one."""
+    for attr in ("status_code", "code"):
+        value = getattr(exc, attr, None)
+        if isinstance(value, int):
+            return value
+    value = getattr(getattr(exc, "response", None), "status_code", None)
+    return value if isinstance(value, int) else None
+
+def is_transient(exc: BaseException) -> bool:
+    if isinstance(exc, (DeadlineExceeded, CircuitOpenError)):
+        return False
+    code = status_code(exc)
+    if code is not None:
+        return code in TRANSIENT_STATUS or code >= 500
+    if isinstance(exc, (ConnectionError, TimeoutError)):
+        return True
+    return any(cls.__name__ in TRANSIENT_ERRORS for cls in type(exc).__mro__)
+
+def retry_after(exc: BaseException) -> Optional[float]:
+    """Server-requested delay (Retry-After in seconds), if the error exposes its response headers."""
+    headers = getattr(getattr(exc, "response", None), "headers", None)
+    try:
+        return float(headers.get("retry-after")) if headers else None
+    except (TypeError, ValueError):
+        return None
+
+def backoff_delay(attempt: int, base: float = None, cap: float = None) -> float:
+    """Exponential backoff with equal jitter: half the step is fixed, half random."""
+    base = settings.call_retry_base_delay if base is None else base
+    cap = settings.call_retry_max_delay if cap is None else cap
+    step = min(cap, base * 2 ** (attempt - 1))
+    return step / 2 + random.uniform(0, step / 2)
+
+# 3. DATA MODELS
+class CallPolicy(BaseModel):
+    """Client-side limits of one model/endpoint (0 = unlimited)."""
+    rate_per_minute: float = 0
+    concurrency: int = 0
+
+def policy_for(endpoint: str) -> CallPolicy:
+    """Gemini quotas are per model, so every generative model gets its own bucket."""
+    if endpoint == "gemini:files":
+        return CallPolicy(rate_per_minute=settings.gemini_files_rpm, concurrency=settings.gemini_concurrency)
+    if endpoint == "gemini:files_status":
+        # Status polls are cheap and must not eat the upload quota
+        return CallPolicy(concurrency=settings.gemini_concurrency)
+    if endpoint == "gemini:embed":
+        return CallPolicy(rate_per_minute=settings.gemini_embed_rpm, concurrency=settings.gemini_concurrency)
+    if endpoint.startswith("gemini:"):
+        return CallPolicy(rate_per_minute=settings.gemini_rpm, concurrency=settings.gemini_concurrency)
+    if endpoint == "qdrant":
+        return CallPolicy(concurrency=settings.qdrant_concurrency)
+    return CallPolicy()
+
+# 4. GUARD
+class Guard:
+    """Token bucket, concurrency cap, retries and circuit breaker in front of one endpoint.
+
+    A call first takes a permit: a token, a free slot and a closed (or probing) circuit.
+    Transient failures are retried with jittered backoff (or the server's Retry-After)
+    while the deadline allows. After `circuit_failure_threshold` consecutive transient
+    failures the circuit opens: calls are held back, not failed, until the cooldown
+    ends and one probe call succeeds. Only a call whose deadline ends before the
+    cooldown fails fast with CircuitOpenError.
+
+    State is shared by the event loop and worker threads; waits poll, so async callers
+    never block the loop.
+    """
+
+    def __init__(self, endpoint: str, policy: CallPolicy):
+        self.endpoint = endpoint
+        self.policy = policy
+        self.state = "closed"
+        self.in_flight = 0
+        self.failures = 0
+        self._rate = policy.rate_per_minute / 60
+        self._burst = max(1.0, self._rate * BURST_SECONDS)
+        self._tokens = self._burst
+        self._refilled = time.monotonic()
+        self._opened_at = 0.0
+        self._probing = False
+        self._lock = threading.Lock()
+        CIRCUIT_STATE.set(0, endpoint=endpoint)
+
+    # --- PERMITS ---
+
+    def _set_state(self, state: str):
+        if state == self.state:
+            return
+        self.state = state
+        CIRCUIT_STATE.set(CIRCUIT_STATES[state], endpoint=self.endpoint)
+        if state == "open":
+            log.warning(
+                "Circuit opened", endpoint=self.endpoint, failures=self.failures,
+                cooldown_s=settings.circuit_cooldown_seconds
+            )
+        else:
+            log.info(f"Circuit {state.replace('_', '-')}", endpoint=self.endpoint)
+
+    def _try_enter(self) -> Optional[float]:
+        """Takes a permit. Returns None on success, else how long to wait before trying again."""
+        with self._lock:
+            now = time.monotonic()
+            if self.state == "open":
+                wait = self._opened_at + settings.circuit_cooldown_seconds - now
+                if wait > 0:
+                    return wait
+                self._set_state("half_open")
+            if self.state == "half_open" and self._probing:
+                return POLL_INTERVAL
+            if self.policy.concurrency and self.in_flight >= self.policy.concurrency:
+                return POLL_INTERVAL
+            if self._rate:
+                self._tokens = min(self._burst, self._tokens + (now - self._refilled) * self._rate)
+                self._refilled = now
+                if self._tokens < 1:
+                    return (1 - self._tokens) / self._rate
+                self._tokens -= 1
+
+            self.in_flight += 1
+            self._probing = self.state == "half_open"
+            EXTERNAL_CALLS_IN_FLIGHT.set(self.in_flight, endpoint=self.endpoint)
+            return None
+
+    def _release(self, failed: bool):
+        """Returns the permit. Only transient failures count towards opening the circuit."""
+        with self._lock:
+            self.in_flight -= 1
+            self._probing = False
+            EXTERNAL_CALLS_IN_FLIGHT.set(self.in_flight, endpoint=self.endpoint)
+            if not failed:
+                self.failures = 0
+                self._set_state("closed")
+                return
+            self.failures += 1
+            if self.state == "half_open" or self.failures >= settings.circuit_failure_threshold:
+                self._opened_at = time.monotonic()
+                self._set_state("open")
+
+    def _until(self) -> float:
+        until = time.monotonic() + settings.call_deadline_seconds
+        current = _deadline.get()
+        return until if current is None else min(until, current)
+
+    def _wait(self, until: float) -> Optional[float]:
+        """None once a permit is taken, else how long to sleep. Raises if the deadline won't allow it."""
+        wait = self._try_enter()
+        if wait is None:
+            return None
+        left = until - time.monotonic()
+        if self.state == "open" and wait > left:
+            raise CircuitOpenError(f"{self.endpoint} circuit is open for another {wait:.0f}s")
+        if left <= 0:
+            raise DeadlineExceeded(f"{self.endpoint}: deadline reached while waiting for a permit")
+        return min(wait, left)
+
+    def _failed(self, exc: BaseException, attempt: int, until: float) -> Optional[float]:
+        """Returns the permit after a failed attempt. Returns the retry delay, or None to give up."""
+        transient = is_transient(exc)
+        self._release(failed=transient)
+        if not transient or attempt >= settings.call_max_attempts:
+            return None
+        delay = max(backoff_delay(attempt), retry_after(exc) or 0)
+        if time.monotonic() + delay >= until:
+            return None
+        EXTERNAL_CALL_RETRIES.inc(endpoint=self.endpoint)
+        log.warning(
+            "Call failed, retrying", endpoint=self.endpoint, attempt=attempt,
+            attempts=settings.call_max_attempts, delay_s=round(delay, 2), error=str(exc)[:200]
+        )
+        return delay
+
+    async def _acquire(self, until: float):
+        t0 = time.monotonic()
+        while (wait := self._wait(until)) is not None:
+            await asyncio.sleep(wait)
+        EXTERNAL_CALL_WAIT_SECONDS.observe(time.monotonic() - t0, endpoint=self.endpoint)
+
+    def _acquire_sync(self, until: float):
+        t0 = time.monotonic()
+        while (wait := self._wait(until)) is not None:
+            time.sleep(wait)
+        EXTERNAL_CALL_WAIT_SECONDS.observe(time.monotonic() - t0, endpoint=self.endpoint)
+
+    # --- CALLS ---
+
+    async def _attempt(self, fn: Callable, args, kwargs, until: float) -> Any:
+        """Awaits one attempt, cut off at the deadline with DeadlineExceeded: the caller ran
+        out of time, the endpoint did not fail, so the cut-off never counts towards the circuit."""
+        try:
+            return await asyncio.wait_for(fn(*args, **kwargs), until - time.monotonic())
+        except TimeoutError as e:
+            if time.monotonic() < until:
+                raise
+            raise DeadlineExceeded(f"{self.endpoint}: deadline reached during the call") from e
+
+    async def call(self, fn: Callable, *args, **kwargs) -> Any:
+        """Awaits fn(*args, **kwargs) under this guard. Each attempt is cut off at the deadline."""
+        if not settings.resilience_enabled:
+            return await fn(*args, **kwargs)
+        until = self._until()
+        attempt = 0
+        while True:
+            attempt += 1
+            await self._acquire(until)
+            try:
+                result = await self._attempt(fn, args, kwargs, until)
+            except Exception as e:
+                delay = self._failed(e, attempt, until)
+                if delay is None:
+                    raise
+                await asyncio.sleep(delay)
+            except BaseException:
+                self._release(failed=False)
+                raise
+            else:
+                self._release(failed=False)
+                return result
+
+    def call_sync(self, fn: Callable, *args, **kwargs) -> Any:
+        """Blocking variant for SDK calls made on worker threads."""
+        if not settings.resilience_enabled:
+            return fn(*args, **kwargs)
+        until = self._until()
+        attempt = 0
+        while True:
+            attempt += 1
+            self._acquire_sync(until)
+            try:
+                result = fn(*args, **kwargs)
+            except Exception as e:
+                delay = self._failed(e, attempt, until)
+                if delay is None:
+                    raise
+                time.sleep(delay)
+            except BaseException:
+                self._release(failed=False)
+                raise
+            else:
+                self._release(failed=False)
+                return result
+
+    @asynccontextmanager
+    async def stream(self, open_stream: Callable):
+        """Enters the async context manager returned by open_stream() under this guard.
+
+        Opening the stream is retried; once data flows, a failure is recorded but not
+        retried, since part of the response was already consumed. The permit is held
+        until the stream closes.
+        """
+        if not settings.resilience_enabled:
+            async with open_stream() as response:
+                yield response
+            return
+
+        until = self._until()
+        attempt = 0
+        while True:
+            attempt += 1
+            await self._acquire(until)
+            stack = AsyncExitStack()
+            try:
+                response = await stack.enter_async_context(open_stream())
+                break
+            except Exception as e:
+                delay = self._failed(e, attempt, until)
+                if delay is None:
+                    raise
+                await asyncio.sleep(delay)
+            except BaseException:
+                self._release(failed=False)
+                raise
+
+        failed = False
+        try:
+            async with stack:
+                yield response
+        except Exception as e:
+            failed = is_transient(e)
+            raise
+        finally:
+            self._release(failed)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "state": self.state,
+                "in_flight": self.in_flight,
+                "consecutive_failures": self.failures,
+                "tokens": round(self._tokens, 2) if self._rate else None,
+                **self.policy.model_dump()
+            }
+
+class Resilience:
+    """Process-wide guards, one per model/endpoint, built on first use from the settings."""
+
+    def __init__(self):
+        self._guards: Dict[str, Guard] = {}
+        self._lock = threading.Lock()
+
+    def guard(self, endpoint: str) -> Guard:
+        guard = self._guards.get(endpoint)
+        if guard is None:
+            with self._lock:
+                guard = self._guards.setdefault(endpoint, Guard(endpoint, policy_for(endpoint)))
+        return guard
+
+    def reset(self):
+        """Drops all guards, e.g. after changing the settings they were built from."""
+        with self._lock:
+            self._guards.clear()
+
+    def snapshot(self) -> Dict[str, dict]:
+        return {endpoint: guard.snapshot() for endpoint, guard in list(self._guards.items())}
+
+resilience = Resilience()
+
+# 5. PYDANTIC-AI MODELS
+@lru_cache(maxsize=None)
+def _guarded_model_class():
+    # pydantic_ai is imported on first use, like the models themselves
+    from pydantic_ai.models.wrapper import WrapperModel
+
+    class GuardedModel(WrapperModel):
+        """Routes every model request (each step of an agent run) through a guard."""
+
+        def __init__(self, wrapped, guard: Guard):
+            super().__init__(wrapped)
+            self.guard = guard
+
+        async def request(self, *args, **kwargs):
+            return await self.guard.call(self.wrapped.request, *args, **kwargs)
+
+        @asynccontextmanager
+        async def request_stream(self, *args, **kwargs):
+            async with self.guard.stream(lambda: self.wrapped.request_stream(*args, **kwargs)) as response:
+                yield response
+
+    return GuardedModel
+
+def guard_model(model, endpoint: str):
+    """Wraps a pydantic-ai model so agent runs retry and queue per request, not per run."""
+    return _guarded_model_class()(model, resilience.guard(endpoint))
@@ -0,0 +1,281 @@
+import sys
+import json
+import time
+import bisect
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, List, Sequence, Tuple
+from src.core.config import settings
+
+# 1. METRICS (Prometheus text exposition, no external dependency)
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600)
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def _label_str(names: Sequence[str], values: Tuple[str, ...], le: str = None) -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if le is not None:
+        parts.append(f'le="{le}"')
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, registry: "Metrics", name: str, help_text: str, labels: Sequence[str] = ()):
+        self.registry = registry
+        self.name = name
+        self.help = help_text
+        self.labels = tuple(labels)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: dict) -> Tuple[str, ...]:
+        return tuple(str(labels.get(n, "")) for n in self.labels)
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1.0, **labels):
+        if not self.registry.enabled:
+            return
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            items = list(self._values.items())
+        return [f"{self.name}{_label_str(self.labels, k)} {v:g}" for k, v in items]
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def set(self, value: float, **labels):
+        if not self.registry.enabled:
+            return
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, *args, buckets: Iterable[float] = DEFAULT_BUCKETS, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.buckets = tuple(sorted(buckets))
+        # key -> [bucket counts..., +Inf count, sum]
+        self._values: Dict[Tuple[str, ...], List[float]] = {}
+
+    def observe(self, value: float, **labels):
+        if not self.registry.enabled:
+            return
+        key = self._key(labels)
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            row = self._values.get(key)
+            if row is None:
+                row = self._values[key] = [0] * (len(self.buckets) + 1) + [0.0]
+            row[i] += 1
+            row[-1] += value
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            items = [(k, list(v)) for k, v in self._values.items()]
+        lines = []
+        for key, row in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets, row):
+                cumulative += count
+                lines.append(f"{self.name}_bucket{_label_str(self.labels, key, f'{bound:g}')} {cumulative}")
+            cumulative += row[len(self.buckets)]
+            lines.append(f"{self.name}_bucket{_label_str(self.labels, key, '+Inf')} {cumulative}")
+            lines.append(f"{self.name}_sum{_label_str(self.labels, key)} {row[-1]:g}")
+            lines.append(f"{self.name}_count{_label_str(self.labels, key)} {cumulative}")
+        return lines
+
+class Metrics:
+    """Process-local metric registry rendered in Prometheus text format.
+
+    With enabled=False every update returns immediately (no locking, no clock
+    reads in timers), so instrumented code paths cost a single attribute check.
+    Collectors are called at scrape time for values that are cheaper to read
+    than to track (queue depth, cache sizes).
+    """
+
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self._metrics: List[_Metric] = []
+        self._collectors: List[Callable[[], None]] = []
+
+    def counter(self, name: str, help_text: str, labels: Sequence[str] = ()) -> Counter:
+        return self._add(Counter(self, name, help_text, labels))
+
+    def gauge(self, name: str, help_text: str, labels: Sequence[str] = ()) -> Gauge:
+        return self._add(Gauge(self, name, help_text, labels))
+
+    def histogram(self, name: str, help_text: str, labels: Sequence[str] = (), buckets=DEFAULT_BUCKETS) -> Histogram:
+        return self._add(Histogram(self, name, help_text, labels, buckets=buckets))
+
+    def _add(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def collector(self, fn: Callable[[], None]):
+        """Registers a scrape-time callback (usually setting gauges)."""
+        self._collectors.append(fn)
+        return fn
+
+    @contextmanager
+    def timer(self, histogram: Histogram, **labels):
+        if not self.enabled:
+            yield
+            return
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            histogram.observe(time.perf_counter() - t0, **labels)
+
+    def render(self) -> str:
+        if not self.enabled:
+            return ""
+        for fn in self._collectors:
+            try:
+                fn()
+            except Exception as e:
+                get_logger("METRICS").warning("Collector failed", error=str(e))
+        lines = []
+        for metric in self._metrics:
+            lines += metric.header() + metric.samples()
+        return "\n".join(lines) + "\n"
+
+metrics = Metrics(enabled=settings.metrics_enabled)
+
+# 2. INSTRUMENTS (shared by agents, services and the API)
+STAGE_SECONDS = metrics.histogram("omni_stage_seconds", "Wall time per pipeline stage", ["stage"])
+STAGE_QUEUE_DEPTH = metrics.gauge("omni_stage_queue_depth", "Jobs waiting for a stage slot", ["stage"])
+STAGE_ACTIVE = metrics.gauge("omni_stage_active", "Jobs holding a stage slot", ["stage"])
+JOBS_IN_FLIGHT = metrics.gauge("omni_jobs_in_flight", "Admitted jobs not yet finished")
+JOBS_TOTAL = metrics.counter("omni_jobs_total", "Finished jobs by outcome", ["status"])
+
+EXTERNAL_CALL_SECONDS = metrics.histogram(
+    "omni_external_call_seconds", "Latency of calls to external services", ["service", "operation"]
+)
+EXTERNAL_CALL_ERRORS = metrics.counter(
+    "omni_external_call_errors_total", "Failed calls to external services", ["service", "operation"]
+)
+EXTERNAL_CALL_RETRIES = metrics.counter(
+    "omni_external_call_retries_total", "Retried attempts per rate-limited endpoint", ["endpoint"]
+)
+EXTERNAL_CALL_WAIT_SECONDS = metrics.histogram(
+    "omni_external_call_wait_seconds", "Time a call waited for its rate, concurrency or circuit permit", ["endpoint"]
+)
+EXTERNAL_CALLS_IN_FLIGHT = metrics.gauge("omni_external_calls_in_flight", "Calls holding a permit", ["endpoint"])
+CIRCUIT_STATE = metrics.gauge("omni_circuit_state", "Circuit breaker (0 closed, 1 half-open, 2 open)", ["endpoint"])
+
+CLIP_RENDER_SECONDS = metrics.histogram("omni_clip_render_seconds", "FFmpeg wall time per rendered clip", ["mode"])
+CLIP_RENDER_FPS = metrics.histogram(
+    "omni_clip_render_fps", "Encoded frames per second per clip", ["mode"],
+    buckets=(5, 10, 25, 50, 100, 200, 400, 800)
+)
+BYTES_TOTAL = metrics.counter("omni_bytes_total", "Bytes processed", ["kind"])
+
+HTTP_REQUEST_SECONDS = metrics.histogram(
+    "omni_http_request_seconds", "API latency until response headers", ["method", "route", "status"]
+)
+
+CACHE_HIT_RATE = metrics.gauge("omni_cache_hit_rate", "Hit rate per cache", ["cache"])
+
+STORAGE_BYTES = metrics.gauge(
+    "omni_storage_bytes", "Bytes held per storage class (hardlinked files counted once)", ["storage_class"]
+)
+STORAGE_FILES = metrics.gauge("omni_storage_files", "Files per storage class", ["storage_class"])
+STORAGE_FREED_BYTES = metrics.counter("omni_storage_freed_bytes_total", "Bytes released by the sweeper", ["reason"])
+STORAGE_SWEEP_SECONDS = metrics.histogram("omni_storage_sweep_seconds", "Wall time per storage sweep")
+DISK_FREE_BYTES = metrics.gauge("omni_disk_free_bytes", "Free space on the volume of a storage root", ["root"])
+
+@contextmanager
+def track_call(service: str, operation: str):
+    """Times one external call and counts it as an error if it raises."""
+    if not metrics.enabled:
+        yield
+        return
+    t0 = time.perf_counter()
+    try:
+        yield
+    except BaseException:
+        EXTERNAL_CALL_ERRORS.inc(service=service, operation=operation)
+        raise
+    finally:
+        EXTERNAL_CALL_SECONDS.observe(time.perf_counter() - t0, service=service, operation=operation)
+
+# 3. STRUCTURED LOGS
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line: ts, level, component, msg plus any structured fields."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": round(record.created, 3),
+            "level": record.levelname.lower(),
+            "component": record.name.rsplit(".", 1)[-1],
+            "msg": record.getMessage(),
+            **getattr(record, "fields", {})
+        }
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+class TextFormatter(logging.Formatter):
+    """Human-readable fallback in the old console style: LOG [COMPONENT]: msg key=value."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        fields = " ".join(f"{k}={v}" for k, v in getattr(record, "fields", {}).items())
+        prefix = "LOG" if record.levelno < logging.WARNING else record.levelname
+        line = f"{prefix} [{record.name.rsplit('.', 1)[-1]}]: {record.getMessage()}"
+        return f"{line} {fields}" if fields else line
+
+class StructLogger:
+    """Thin wrapper so call sites pass fields as keyword arguments."""
+
+    def __init__(self, logger: logging.Logger):
+        self._logger = logger
+
+    def _log(self, level: int, msg: str, fields: dict, exc_info=None):
+        if self._logger.isEnabledFor(level):
+            self._logger.log(level, msg, extra={"fields": fields}, exc_info=exc_info)
+
+    def debug(self, msg: str, **fields):
+        self._log(logging.DEBUG, msg, fields)
+
+    def info(self, msg: str, **fields):
+        self._log(logging.INFO, msg, fields)
+
+    def warning(self, msg: str, **fields):
+        self._log(logging.WARNING, msg, fields)
+
+    def error(self, msg: str, exc_info=None, **fields):
+        self._log(logging.ERROR, msg, fields, exc_info=exc_info)
+
+_root = logging.getLogger("omni")
+if not _root.handlers:
+    _handler = logging.StreamHandler(sys.stdout)
+    _handler.setFormatter(JsonFormatter() if settings.log_format == "json" else TextFormatter())
+    _root.addHandler(_handler)
+    _root.setLevel(settings.log_level.upper())
+    _root.propagate = False
+
+_loggers: Dict[str, StructLogger] = {}
+
+def get_logger(component: str) -> StructLogger:
+    """Logger for one component (e.g. "MEMORY", job ids go into fields)."""
+    logger = _loggers.get(component)
+    if logger is None:
+        logger = _loggers[component] = StructLogger(logging.getLogger(f"omni.{component}"))
+    return logger
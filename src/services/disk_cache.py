@@ -0,0 +1,92 @@
+import os
+import json
+import time
+import hashlib
+import threading
+from typing import Optional, Tuple, Union
+
+def evict_lru(directory: str, max_bytes: int, suffix: Union[str, Tuple[str, ...]], keep: Tuple[str, ...] = ()) -> int:
+    """Removes the least recently used (oldest mtime) files ending in `suffix` until they
+    fit in max_bytes. Files named in `keep` count but stay. Returns how many were removed."""
+    entries = []
+    for name in os.listdir(directory):
+        if not name.endswith(suffix):
+            continue
+        try:
+            st = os.stat(os.path.join(directory, name))
+        except FileNotFoundError:
+            continue
+        entries.append((st.st_mtime, st.st_size, name))
+
+    total = sum(size for _, size, _ in entries)
+    removed = 0
+    for _, size, name in sorted(entries):
+        if total <= max_bytes:
+            break
+        if name in keep:
+            continue
+        # Already removed by another worker sharing the directory: it no longer counts either way
+        total -= size
+        try:
+            os.remove(os.path.join(directory, name))
+            removed += 1
+        except FileNotFoundError:
+            pass
+    return removed
+
+class DiskLRUCache:
+    """JSON key/value cache on disk with size-based LRU eviction.
+
+    Each entry is one file named by the SHA-256 of its key; the file mtime is bumped
+    on every hit so the least recently used entries are evicted first once the
+    directory grows beyond max_bytes.
+    """
+
+    def __init__(self, directory: str, max_bytes: int):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, hashlib.sha256(key.encode("utf-8")).hexdigest() + ".json")
+
+    def get(self, key: str) -> Optional[dict]:
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+        expires_at = entry.get("expires_at")
+        if expires_at is not None and expires_at <= time.time():
+            self.delete(key)
+            return None
+
+        os.utime(path)
+        return entry["value"]
+
+    def set(self, key: str, value: dict, ttl_seconds: float = None):
+        entry = {
+            "key": key,
+            "value": value,
+            "expires_at": time.time() + ttl_seconds if ttl_seconds else None
+        }
+        path = self._path(key)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(entry, f)
+        os.replace(tmp_path, path)
+        self.evict()
+
+    def delete(self, key: str):
+        try:
+            os.remove(self._path(key))
+        except FileNotFoundError:
+            pass
+
+    def evict(self) -> int:
+        """Removes least recently used entries until the cache fits in max_bytes."""
+        with self._lock:
+            return evict_lru(self.directory, self.max_bytes, ".json")
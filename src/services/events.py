@@ -0,0 +1,82 @@
+import time
+import asyncio
+from typing import Dict, List, Optional, Set
+
+class Subscription:
+    """Per-client mailbox that coalesces events by key.
+
+    A newer event with the same key replaces the undelivered older one (e.g. render
+    progress for a clip), so a slow client holds at most one pending event per key
+    instead of an unbounded backlog.
+    """
+
+    def __init__(self, job_id: str):
+        self.job_id = job_id
+        self._pending: Dict[str, dict] = {}
+        self._ready = asyncio.Event()
+
+    def push(self, event: dict):
+        key = event.get("key") or event["type"]
+        # Re-insert so the dict keeps delivery order by latest update
+        self._pending.pop(key, None)
+        self._pending[key] = event
+        self._ready.set()
+
+    async def next_batch(self, timeout: float = None) -> List[dict]:
+        """Waits for pending events and returns them all. Empty list on timeout."""
+        try:
+            await asyncio.wait_for(self._ready.wait(), timeout)
+        except asyncio.TimeoutError:
+            return []
+        batch = list(self._pending.values())
+        self._pending.clear()
+        self._ready.clear()
+        return batch
+
+class EventBus:
+    """In-process pub/sub for job progress, safe to publish from worker threads."""
+
+    def __init__(self):
+        self._subscribers: Dict[str, Set[Subscription]] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def bind(self, loop: asyncio.AbstractEventLoop):
+        """Attaches the bus to the API event loop (call once at startup)."""
+        self._loop = loop
+
+    def subscribe(self, job_id: str) -> Subscription:
+        sub = Subscription(job_id)
+        self._subscribers.setdefault(job_id, set()).add(sub)
+        return sub
+
+    def unsubscribe(self, sub: Subscription):
+        subs = self._subscribers.get(sub.job_id)
+        if subs:
+            subs.discard(sub)
+            if not subs:
+                del self._subscribers[sub.job_id]
+
+    def publish(self, job_id: str, event_type: str, key: str = None, **data):
+        """Fans an event out to every subscriber of the job."""
+        event = {"type": event_type, "job_id": job_id, "ts": time.time(), **data}
+        if key:
+            event["key"] = key
+
+        loop = self._loop
+        if loop is None or loop.is_closed():
+            return
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+
+        if running is loop:
+            self._dispatch(job_id, event)
+        else:
+            loop.call_soon_threadsafe(self._dispatch, job_id, event)
+
+    def _dispatch(self, job_id: str, event: dict):
+        for sub in list(self._subscribers.get(job_id, ())):
+            sub.push(event)
+
+event_bus = EventBus()
@@ -0,0 +1,97 @@
+import os
+import hashlib
+from typing import Optional
+
+# Read size when draining an already-spooled upload (1 MiB)
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+# Bytes needed before the container can be identified (MPEG-TS needs two 188-byte packets' sync bytes)
+SNIFF_BYTES = 189
+
+class UploadTooLarge(Exception):
+    """The upload exceeds MAX_UPLOAD_BYTES."""
+
+class UnsupportedMedia(Exception):
+    """The upload does not start with a known video container header."""
+
+def sniff_container(header: bytes) -> Optional[str]:
+    """Identifies the video container from its first bytes, or None if it isn't video."""
+    if len(header) >= 8 and header[4:8] in (b"ftyp", b"moov", b"mdat", b"wide", b"free"):
+        return "mp4"
+    if header[:4] == b"\x1a\x45\xdf\xa3":
+        return "matroska"
+    if header[:4] == b"RIFF" and header[8:12] == b"AVI ":
+        return "avi"
+    if header[:4] == b"\x00\x00\x01\xba":
+        return "mpeg-ps"
+    if header[:1] == b"\x47" and header[188:189] == b"\x47":
+        return "mpeg-ts"
+    return None
+
+def safe_filename(filename: Optional[str]) -> str:
+    """Strips directories from a client-supplied name."""
+    name = os.path.basename((filename or "").replace("\\", "/")).strip()
+    return name or "upload.mp4"
+
+class IngestSink:
+    """Writes an upload straight to its final path while hashing it, enforcing the size
+    cap and rejecting non-video content as soon as the header bytes arrive.
+
+    Opened in append mode at `offset` so resumable uploads continue where they stopped.
+    """
+
+    def __init__(self, path: str, max_bytes: int, offset: int = 0, hasher=None):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.size = offset
+        self.hasher = hasher or hashlib.sha256()
+        self.container = None
+        self._header = b""
+        self._file = open(path, "ab" if offset else "wb")
+
+        if offset:
+            # Resumed upload: the header is already on disk
+            with open(path, "rb") as f:
+                self._sniff(f.read(SNIFF_BYTES))
+
+    def _sniff(self, data: bytes):
+        self._header += data[:SNIFF_BYTES - len(self._header)]
+        if self.container is None and len(self._header) >= SNIFF_BYTES:
+            self.container = sniff_container(self._header)
+            if self.container is None:
+                raise UnsupportedMedia("Uploaded file is not a recognised video container.")
+
+    def write(self, chunk: bytes):
+        if self.size + len(chunk) > self.max_bytes:
+            raise UploadTooLarge(f"Upload exceeds the {self.max_bytes} byte limit.")
+        if self.container is None:
+            self._sniff(chunk)
+        self.hasher.update(chunk)
+        self._file.write(chunk)
+        self.size += len(chunk)
+
+    def close(self):
+        self._file.close()
+
+    def finalize(self) -> str:
+        """Closes the file and returns its content hash."""
+        self.close()
+        if self.container is None:
+            # Shorter than a container header: can't be a playable video
+            self.container = sniff_container(self._header)
+            if self.container is None:
+                raise UnsupportedMedia("Uploaded file is not a recognised video container.")
+        return self.hasher.hexdigest()
+
+    def abort(self):
+        self.close()
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+def hash_file(path: str) -> str:
+    """Hashes a file already on disk (used when a resumed upload lost its in-memory hasher)."""
+    hasher = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(UPLOAD_CHUNK_SIZE):
+            hasher.update(chunk)
+    return hasher.hexdigest()
@@ -0,0 +1,300 @@
+import os
+import copy
+import json
+import time
+import zlib
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+from typing import List, Optional
+from src.core.telemetry import get_logger
+
+# Statuses after which a job never changes again and becomes eligible for TTL eviction
+FINISHED_STATUSES = ("COMPLETED", "FAILED")
+
+# How often (seconds) writers opportunistically evict expired jobs
+EVICTION_INTERVAL = 60
+
+log = get_logger("JOBS")
+
+def process_identity(pid: int) -> Optional[str]:
+    """'<pid>:<start time>' of a running process on this host, None once it has exited.
+
+    The start time (Linux /proc) tells a worker that reused a dead worker's pid, e.g. after
+    a container restart, apart from it.
+    """
+    if os.path.isdir("/proc"):
+        try:
+            with open(f"/proc/{pid}/stat") as f:
+                return f"{pid}:{f.read().rsplit(')', 1)[1].split()[19]}"
+        except (FileNotFoundError, ProcessLookupError):
+            return None
+    if os.name == "posix":
+        try:
+            os.kill(pid, 0)
+        except ProcessLookupError:
+            return None
+        except PermissionError:
+            pass
+    return f"{pid}:"
+
+# Identity stored on the jobs this process runs (their workflow never leaves the process)
+WORKER_ID = process_identity(os.getpid())
+
+def worker_alive(worker: Optional[str]) -> bool:
+    return bool(worker) and process_identity(int(worker.split(":", 1)[0])) == worker
+
+class JobStore(ABC):
+    """Persistence interface for mission state shared by the API and the workflow."""
+
+    def __init__(self, ttl_seconds: int = 0):
+        self.ttl_seconds = ttl_seconds
+        self._last_eviction = 0.0
+
+    @abstractmethod
+    def create(self, job: dict) -> dict:
+        """Inserts a new job. The dict must contain 'job_id' and 'status'."""
+
+    @abstractmethod
+    def get(self, job_id: str) -> Optional[dict]:
+        """Returns the job as a plain dict or None if unknown/evicted."""
+
+    @abstractmethod
+    def update(self, job_id: str, **fields) -> Optional[dict]:
+        """Merges fields into the job and returns the new state."""
+
+    @abstractmethod
+    def list_by_status(self, status: str, limit: int = 100, offset: int = 0) -> List[dict]:
+        """Returns jobs in a given status, oldest first."""
+
+    @abstractmethod
+    def list_unfinished(self) -> List[dict]:
+        """Returns every job not in FINISHED_STATUSES, oldest first."""
+
+    @abstractmethod
+    def evict_expired(self) -> int:
+        """Deletes finished jobs older than the TTL. Returns the number removed."""
+
+    def recover_interrupted(self, upload_idle_seconds: float = 0) -> int:
+        """Fails jobs a stopped process left unfinished. Called on startup.
+
+        Jobs past UPLOADING whose worker is no longer alive are marked FAILED, so they get
+        a terminal event, TTL eviction and storage sweeps again. Upload sessions (resumable
+        from any worker) expire once their file has been idle for upload_idle_seconds
+        (0 = never). Returns the number of jobs failed.
+        """
+        now = time.time()
+        interrupted, expired = 0, 0
+        for job in self.list_unfinished():
+            if job["status"] == "UPLOADING":
+                try:
+                    last_active = max(job["updated_at"], os.path.getmtime(job["video_path"]))
+                except (KeyError, OSError):
+                    last_active = job["updated_at"]
+                if not upload_idle_seconds or now - last_active <= upload_idle_seconds:
+                    continue
+                self.update(job["job_id"], status="FAILED", error="Upload session expired")
+                expired += 1
+            elif not worker_alive(job.get("worker")):
+                self.update(job["job_id"], status="FAILED", error=f"Interrupted by restart while {job['status']}")
+                interrupted += 1
+        if interrupted or expired:
+            log.warning("Recovered unfinished jobs", interrupted=interrupted, expired_uploads=expired)
+        return interrupted + expired
+
+    def _maybe_evict(self):
+        if self.ttl_seconds <= 0:
+            return
+        now = time.time()
+        if now - self._last_eviction >= EVICTION_INTERVAL:
+            self._last_eviction = now
+            self.evict_expired()
+
+# --- IN-MEMORY BACKEND (tests, single process) ---
+
+class InMemoryJobStore(JobStore):
+    """Dict-backed store. Returns copies so callers can't mutate shared state."""
+
+    def __init__(self, ttl_seconds: int = 0):
+        super().__init__(ttl_seconds)
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def create(self, job: dict) -> dict:
+        now = time.time()
+        record = {**job, "created_at": now, "updated_at": now}
+        with self._lock:
+            self._jobs[job["job_id"]] = record
+        self._maybe_evict()
+        return copy.deepcopy(record)
+
+    def get(self, job_id: str) -> Optional[dict]:
+        with self._lock:
+            record = self._jobs.get(job_id)
+            return copy.deepcopy(record) if record else None
+
+    def update(self, job_id: str, **fields) -> Optional[dict]:
+        with self._lock:
+            record = self._jobs.get(job_id)
+            if record is None:
+                return None
+            record.update(fields)
+            record["updated_at"] = time.time()
+            return copy.deepcopy(record)
+
+    def list_by_status(self, status: str, limit: int = 100, offset: int = 0) -> List[dict]:
+        with self._lock:
+            matches = [j for j in self._jobs.values() if j.get("status") == status]
+        matches.sort(key=lambda j: j["created_at"])
+        return copy.deepcopy(matches[offset:offset + limit])
+
+    def list_unfinished(self) -> List[dict]:
+        with self._lock:
+            matches = [j for j in self._jobs.values() if j.get("status") not in FINISHED_STATUSES]
+        matches.sort(key=lambda j: j["created_at"])
+        return copy.deepcopy(matches)
+
+    def evict_expired(self) -> int:
+        cutoff = time.time() - self.ttl_seconds
+        with self._lock:
+            expired = [
+                job_id for job_id, j in self._jobs.items()
+                if j.get("status") in FINISHED_STATUSES and j["updated_at"] < cutoff
+            ]
+            for job_id in expired:
+                del self._jobs[job_id]
+        return len(expired)
+
+# --- SQLITE BACKEND (default, safe across uvicorn workers) ---
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    job_id      TEXT PRIMARY KEY,
+    status      TEXT NOT NULL,
+    created_at  REAL NOT NULL,
+    updated_at  REAL NOT NULL,
+    data        TEXT NOT NULL,
+    result      BLOB
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs (status, created_at);
+CREATE INDEX IF NOT EXISTS idx_jobs_updated ON jobs (updated_at);
+"""
+
+def _pack_result(result) -> Optional[bytes]:
+    """Large 'result' payloads (campaign + videos) are stored as zlib-compressed JSON."""
+    if result is None:
+        return None
+    return zlib.compress(json.dumps(result, separators=(",", ":")).encode("utf-8"))
+
+def _unpack_result(blob: Optional[bytes]):
+    if blob is None:
+        return None
+    return json.loads(zlib.decompress(blob).decode("utf-8"))
+
+class SQLiteJobStore(JobStore):
+    """Embedded SQLite store in WAL mode: readers never block the writer, and several
+    API processes can share one file."""
+
+    def __init__(self, path: str, ttl_seconds: int = 0):
+        super().__init__(ttl_seconds)
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+        # One connection per process, serialized by a lock (workflow threads + event loop)
+        self._conn = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._lock = threading.Lock()
+
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript(SCHEMA)
+
+    def _row_to_job(self, row: sqlite3.Row) -> dict:
+        job = json.loads(row["data"])
+        job["result"] = _unpack_result(row["result"])
+        job["created_at"] = row["created_at"]
+        job["updated_at"] = row["updated_at"]
+        return job
+
+    @staticmethod
+    def _split(job: dict):
+        data = {k: v for k, v in job.items() if k not in ("result", "created_at", "updated_at")}
+        return json.dumps(data), _pack_result(job.get("result"))
+
+    def create(self, job: dict) -> dict:
+        now = time.time()
+        data, result = self._split(job)
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO jobs (job_id, status, created_at, updated_at, data, result) VALUES (?, ?, ?, ?, ?, ?)",
+                (job["job_id"], job["status"], now, now, data, result)
+            )
+        self._maybe_evict()
+        return {**job, "created_at": now, "updated_at": now}
+
+    def get(self, job_id: str) -> Optional[dict]:
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+        return self._row_to_job(row) if row else None
+
+    def update(self, job_id: str, **fields) -> Optional[dict]:
+        with self._lock:
+            # IMMEDIATE takes the write lock up front so the read-modify-write is atomic
+            # across processes sharing the database file
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute("SELECT * FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+                if row is None:
+                    self._conn.execute("ROLLBACK")
+                    return None
+
+                job = self._row_to_job(row)
+                job.update(fields)
+                job["updated_at"] = time.time()
+                data, result = self._split(job)
+
+                self._conn.execute(
+                    "UPDATE jobs SET status = ?, updated_at = ?, data = ?, result = ? WHERE job_id = ?",
+                    (job["status"], job["updated_at"], data, result, job_id)
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return job
+
+    def list_by_status(self, status: str, limit: int = 100, offset: int = 0) -> List[dict]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT * FROM jobs WHERE status = ? ORDER BY created_at LIMIT ? OFFSET ?", (status, limit, offset)
+            ).fetchall()
+        return [self._row_to_job(r) for r in rows]
+
+    def list_unfinished(self) -> List[dict]:
+        placeholders = ",".join("?" for _ in FINISHED_STATUSES)
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT * FROM jobs WHERE status NOT IN ({placeholders}) ORDER BY created_at", FINISHED_STATUSES
+            ).fetchall()
+        return [self._row_to_job(r) for r in rows]
+
+    def evict_expired(self) -> int:
+        cutoff = time.time() - self.ttl_seconds
+        placeholders = ",".join("?" for _ in FINISHED_STATUSES)
+        with self._lock:
+            cur = self._conn.execute(
+                f"DELETE FROM jobs WHERE status IN ({placeholders}) AND updated_at < ?",
+                (*FINISHED_STATUSES, cutoff)
+            )
+        if cur.rowcount:
+            log.info("Evicted finished jobs", count=cur.rowcount, ttl_seconds=self.ttl_seconds)
+        return cur.rowcount
+
+def create_job_store(backend: str, path: str, ttl_seconds: int = 0) -> JobStore:
+    """Builds the configured job store backend."""
+    if backend == "memory":
+        return InMemoryJobStore(ttl_seconds)
+    if backend == "sqlite":
+        return SQLiteJobStore(path, ttl_seconds)
+    raise ValueError(f"Unknown job store backend: {backend}")
@@ -1,87 +1,237 @@
 import os
 import uuid
+import time
+import asyncio
+import contextvars
+import threading
 from datetime import datetime
+from typing import List, Optional
 from qdrant_client import QdrantClient
-from qdrant_client.models import Distance, VectorParams, PointStruct
-from google import genai
+from qdrant_client.models import PointStruct
 from src.core.config import settings
+from src.core.registry import registry
+from src.core.resilience import resilience
+from src.core.telemetry import get_logger, track_call
+from src.services.memory_schema import apply_schema, schema_from_settings
 
 # 1. CLIENT INITIALIZATION
-qclient = QdrantClient(url=settings.qdrant_url, timeout=60)
-gclient = genai.Client(api_key=settings.gemini_api_key)
+# Qdrant and genai clients are shared through the registry and built on first use
+def create_qdrant_client(url: str) -> QdrantClient:
+    """QDRANT_URL=":memory:" gives a local in-process Qdrant (offline tests/benchmarks)."""
+    if url == ":memory:":
+        return QdrantClient(location=":memory:")
+    return QdrantClient(url=url, timeout=60)
 
 COLLECTION_NAME = "content_memory"
+collection_schema = schema_from_settings()
+EMBEDDING_MODEL = "text-embedding-004"
+
+log = get_logger("MEMORY")
+
+# Max texts per embed_content request
+EMBED_BATCH_LIMIT = 100
+
+# Stable ids per job make re-embedding (backfill) overwrite instead of duplicating
+POINT_NAMESPACE = uuid.UUID("6f1c1d0e-8a52-4d1b-9a55-0d6f3c9e2b7a")
+
+_collection_ready = False
+_collection_lock = threading.Lock()
 
 def init_memory():
-    """Creates collection in Qdrant if it doesn't exist yet."""
+    """Creates the collection or migrates it to the configured schema (indexes, quantization, HNSW)."""
     try:
-        collections = qclient.get_collections().collections
-        exists = any(c.name == COLLECTION_NAME for c in collections)
-        
-        if not exists:
-            print(f"LOG [MEMORY]: Creating new collection: {COLLECTION_NAME}")
-            qclient.create_collection(
-                collection_name=COLLECTION_NAME,
-                vectors_config=VectorParams(size=768, distance=Distance.COSINE),
-            )
-            print("✅ LOG [MEMORY]: Collection created.")
+        changes = apply_schema(registry.qdrant_client(), COLLECTION_NAME, collection_schema)
+        for change in changes:
+            log.info("Schema change applied", collection=COLLECTION_NAME, change=change)
+        if changes:
+            log.info("Collection schema up to date", collection=COLLECTION_NAME, changes=len(changes))
+        return True
     except Exception as e:
-        print(f"❌ LOG [MEMORY]: Database initialization error: {e}")
+        log.error("Database initialization error", error=str(e))
+        return False
+
+def ensure_collection():
+    """Checks/creates the collection once per process and caches the result."""
+    global _collection_ready
+    if _collection_ready:
+        return
+    with _collection_lock:
+        if not _collection_ready:
+            _collection_ready = init_memory()
 
 def get_embedding(text: str):
     """Generates vector for given text."""
-    result = gclient.models.embed_content(
-        model="text-embedding-004",
-        contents=text
+    return get_embeddings([text])[0]
+
+def get_embeddings(texts: List[str]) -> List[List[float]]:
+    """Generates vectors for many texts, EMBED_BATCH_LIMIT per request."""
+    vectors = []
+    for i in range(0, len(texts), EMBED_BATCH_LIMIT):
+        with track_call("gemini", "embed"):
+            result = resilience.guard("gemini:embed").call_sync(
+                registry.genai_client().models.embed_content,
+                model=EMBEDDING_MODEL,
+                contents=texts[i:i + EMBED_BATCH_LIMIT]
+            )
+        vectors.extend(e.values for e in result.embeddings)
+    return vectors
+
+# 2. POINT CONSTRUCTION
+def memory_text(brief_data: dict, topic: str) -> str:
+    """Text that gets embedded (based on topic and overall strategy)."""
+    return f"Topic: {topic}. Strategy: {brief_data.get('overall_strategy', '')}"
+
+def point_id_for(brief_data: dict) -> str:
+    job_id = brief_data.get('job_id')
+    return str(uuid.uuid5(POINT_NAMESPACE, job_id)) if job_id else str(uuid.uuid4())
+
+def build_point(brief_data: dict, topic: str, vector: List[float], timestamp_str: str = None) -> PointStruct:
+    """Builds the Qdrant point with full campaign metadata."""
+    timestamp_str = timestamp_str or datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+    # Extraction of clip metadata
+    clips_meta = []
+    platforms = []
+    for c in brief_data.get('clip_strategies', []):
+        clips_meta.append({
+            "idx": c.get('clip_index'),
+            "duration": c.get('duration_seconds'),
+            "hook_sample": (c.get('posts') or [{}])[0].get('content', '')[:100]
+        })
+        for post in c.get('posts', []):
+            platform = post.get('platform', '').lower().strip()
+            if platform and platform not in platforms:
+                platforms.append(platform)
+
+    return PointStruct(
+        id=point_id_for(brief_data),
+        vector=vector,
+        payload={
+            "topic": topic,
+            "strategy": brief_data.get('overall_strategy'),
+            "clips": clips_meta,
+            "platforms": platforms,
+            "type": "campaign_brief",
+            "timestamp": timestamp_str,
+            # Numeric copy of the timestamp for range filters
+            "created_ts": datetime.strptime(timestamp_str, "%Y-%m-%d %H:%M:%S").timestamp(),
+            "job_id": brief_data.get('job_id', 'unknown')
+        }
     )
-    return result.embeddings[0].values
+
+def save_campaigns_to_memory(items: List[dict]) -> List[str]:
+    """Embeds a batch of campaigns in one request and bulk-upserts them in one call.
+
+    Each item: {"brief": dict, "topic": str, "timestamp": optional str}.
+    """
+    if not items:
+        return []
+
+    ensure_collection()
+
+    texts = [memory_text(item["brief"], item["topic"]) for item in items]
+    vectors = get_embeddings(texts)
+
+    points = [
+        build_point(item["brief"], item["topic"], vector, item.get("timestamp"))
+        for item, vector in zip(items, vectors)
+    ]
+    # Point ids are deterministic per job, so a retried upsert cannot duplicate campaigns
+    with track_call("qdrant", "upsert"):
+        resilience.guard("qdrant").call_sync(
+            registry.qdrant_client().upsert, collection_name=COLLECTION_NAME, points=points, wait=True
+        )
+    return [str(p.id) for p in points]
 
 def save_campaign_to_memory(brief_data: dict, topic: str):
     """Saves campaign report to Qdrant database with full metadata."""
     try:
-        # 1. Initialization (in case collection doesn't exist)
-        init_memory()
-
-        print(f"LOG [MEMORY]: Generating embedding for topic: {topic}...")
-        
-        # 2. We get vector (based on topic and overall strategy)
-        content_to_embed = f"Topic: {topic}. Strategy: {brief_data.get('overall_strategy', '')}"
-        vector = get_embedding(content_to_embed)
-        
-        # 3. We prepare data point
-        point_id = str(uuid.uuid4())
-        timestamp_str = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        
-        # Extraction of clip metadata
-        clips_meta = []
-        for c in brief_data.get('clip_strategies', []):
-            clips_meta.append({
-                "idx": c.get('clip_index'),
-                "duration": c.get('duration_seconds'),
-                "hook_sample": c.get('posts', [{}])[0].get('content', '')[:100]
-            })
-        
-        # 4. Save to database
-        qclient.upsert(
-            collection_name=COLLECTION_NAME,
-            points=[
-                PointStruct(
-                    id=point_id,
-                    vector=vector,
-                    payload={
-                        "topic": topic,
-                        "strategy": brief_data.get('overall_strategy'),
-                        "clips": clips_meta,
-                        "type": "campaign_brief",
-                        "timestamp": timestamp_str,
-                        "job_id": brief_data.get('job_id', 'unknown')
-                    }
-                )
-            ]
-        )
-        print(f"✅ LOG [MEMORY]: Campaign '{topic}' successfully saved to long-term memory.")
+        point_id = save_campaigns_to_memory([{"brief": brief_data, "topic": topic}])[0]
+        log.info("Campaign saved to long-term memory", topic=topic, point_id=point_id)
         return point_id
 
     except Exception as e:
-        print(f"❌ LOG [MEMORY]: Error while saving to memory: {e}")
-        return None
\ No newline at end of file
+        log.error("Error while saving to memory", topic=topic, error=str(e))
+        return None
+
+# 3. BATCHED ASYNC WRITER
+class MemoryWriter:
+    """Collects campaigns from many jobs and writes them in batches.
+
+    A batch is flushed when it reaches `batch_size` items or `flush_interval` seconds
+    after its first item arrived. Embedding + upsert run on a worker thread, so the
+    event loop and the job's critical path never wait on Gemini or Qdrant.
+    """
+
+    def __init__(self, batch_size: int = 16, flush_interval: float = 2.0):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        if self._task is None:
+            self._queue = asyncio.Queue()
+            # Fresh context: batches serve many jobs, so none of their call deadlines applies
+            self._task = asyncio.create_task(self._run(), context=contextvars.Context())
+
+    async def stop(self):
+        """Flushes whatever is queued and stops the background task."""
+        if self._task is None:
+            return
+        await self._queue.put(None)
+        await self._task
+        self._task = None
+
+    async def submit(self, brief_data: dict, topic: str) -> Optional[str]:
+        """Queues a campaign and waits until its batch is written. Returns the point id."""
+        self.start()
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put(({"brief": brief_data, "topic": topic}, future))
+        return await future
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        stopping = False
+
+        while not stopping:
+            first = await self._queue.get()
+            if first is None:
+                break
+
+            batch = [first]
+            deadline = loop.time() + self.flush_interval
+            while len(batch) < self.batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    entry = await asyncio.wait_for(self._queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                if entry is None:
+                    stopping = True
+                    break
+                batch.append(entry)
+
+            await self._flush(batch)
+
+    async def _flush(self, batch: list):
+        items = [item for item, _ in batch]
+        t0 = time.perf_counter()
+        try:
+            point_ids = await asyncio.to_thread(save_campaigns_to_memory, items)
+            log.info("Saved campaign batch", campaigns=len(items), seconds=round(time.perf_counter() - t0, 3))
+            for (_, future), point_id in zip(batch, point_ids):
+                if not future.done():
+                    future.set_result(point_id)
+        except Exception as e:
+            log.error("Error while saving batch to memory", campaigns=len(items), error=str(e))
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+
+memory_writer = MemoryWriter(
+    batch_size=settings.memory_batch_size,
+    flush_interval=settings.memory_flush_interval
+)
@@ -0,0 +1,128 @@
+"""
+Re-embeds historical campaigns into the content_memory collection.
+
+Sources: COMPLETED jobs in the job store (default) and/or a JSONL export with one
+{"job_id", "topic", "campaign", "timestamp"?} object per line.
+
+Resumable: processed job ids are appended to a checkpoint file and skipped on the
+next run. Point ids are derived from job ids, so re-running never duplicates points.
+
+Usage:
+    uv run python -m src.services.memory_backfill [--jsonl export.jsonl] [--batch 64] [--workers 4] [--reset]
+"""
+import sys
+import json
+import time
+import argparse
+from datetime import datetime
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterator
+
+root_path = str(Path(__file__).parent.parent.parent)
+if root_path not in sys.path:
+    sys.path.append(root_path)
+
+from src.core.config import settings, resolve_path
+from src.services.job_store import create_job_store
+from src.services.memory import save_campaigns_to_memory, ensure_collection
+
+PAGE_SIZE = 500
+
+def iter_job_store() -> Iterator[dict]:
+    store = create_job_store(settings.job_store_backend, str(resolve_path(settings.job_store_path)))
+    offset = 0
+    while True:
+        jobs = store.list_by_status("COMPLETED", limit=PAGE_SIZE, offset=offset)
+        if not jobs:
+            return
+        for job in jobs:
+            campaign = (job.get("result") or {}).get("campaign")
+            if campaign:
+                yield {
+                    "job_id": job["job_id"],
+                    "topic": job.get("topic") or campaign.get("overall_strategy", "")[:120],
+                    "campaign": campaign,
+                    "timestamp": datetime.fromtimestamp(job["created_at"]).strftime("%Y-%m-%d %H:%M:%S")
+                }
+        offset += len(jobs)
+
+def iter_jsonl(path: str) -> Iterator[dict]:
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+def load_checkpoint(path: Path) -> set:
+    if not path.exists():
+        return set()
+    return set(path.read_text(encoding="utf-8").split())
+
+def batched(records: list, size: int) -> Iterator[list]:
+    for i in range(0, len(records), size):
+        yield records[i:i + size]
+
+def write_batch(batch: list) -> list:
+    items = [
+        {
+            "brief": {**r["campaign"], "job_id": r["job_id"]},
+            "topic": r["topic"],
+            "timestamp": r.get("timestamp")
+        }
+        for r in batch
+    ]
+    save_campaigns_to_memory(items)
+    return [r["job_id"] for r in batch]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--jsonl", help="Read campaigns from a JSONL export instead of the job store")
+    parser.add_argument("--batch", type=int, default=64, help="Campaigns per embed + upsert request")
+    parser.add_argument("--workers", type=int, default=4, help="Concurrent batches in flight")
+    parser.add_argument("--checkpoint", default="data/memory_backfill.checkpoint")
+    parser.add_argument("--reset", action="store_true", help="Ignore the checkpoint and re-embed everything")
+    args = parser.parse_args()
+
+    checkpoint_path = resolve_path(args.checkpoint)
+    checkpoint_path.parent.mkdir(parents=True, exist_ok=True)
+    if args.reset and checkpoint_path.exists():
+        checkpoint_path.unlink()
+
+    done = load_checkpoint(checkpoint_path)
+    source = iter_jsonl(args.jsonl) if args.jsonl else iter_job_store()
+    pending = [r for r in source if r["job_id"] not in done]
+
+    total = len(pending)
+    print(f"LOG [BACKFILL]: {total} campaigns to embed ({len(done)} already done).")
+    if not total:
+        return
+
+    ensure_collection()
+
+    processed = 0
+    failed = 0
+    t0 = time.perf_counter()
+
+    with open(checkpoint_path, "a", encoding="utf-8") as checkpoint, ThreadPoolExecutor(max_workers=args.workers) as pool:
+        futures = {pool.submit(write_batch, batch): batch for batch in batched(pending, args.batch)}
+        for future, batch in futures.items():
+            try:
+                job_ids = future.result()
+                checkpoint.write("\n".join(job_ids) + "\n")
+                checkpoint.flush()
+                processed += len(job_ids)
+            except Exception as e:
+                failed += len(batch)
+                print(f"❌ LOG [BACKFILL]: Batch failed ({len(batch)} campaigns): {e}")
+
+            elapsed = time.perf_counter() - t0
+            rate = processed / elapsed if elapsed else 0.0
+            eta = (total - processed - failed) / rate if rate else 0.0
+            print(f"LOG [BACKFILL]: {processed}/{total} embedded | {rate:6.1f}/s | ETA {eta:5.0f}s", flush=True)
+
+    print(f"✅ LOG [BACKFILL]: Done. {processed} embedded, {failed} failed (re-run to retry).")
+    if failed:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
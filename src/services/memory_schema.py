@@ -0,0 +1,146 @@
+from typing import Dict, List, Optional
+from pydantic import BaseModel, Field
+from qdrant_client import QdrantClient
+from qdrant_client.models import (
+    CollectionParamsDiff,
+    Disabled,
+    Distance,
+    HnswConfigDiff,
+    PayloadSchemaType,
+    QuantizationSearchParams,
+    ScalarQuantization,
+    ScalarQuantizationConfig,
+    ScalarType,
+    SearchParams,
+    VectorParams,
+    VectorParamsDiff,
+)
+from src.core.config import settings
+
+# 1. SCHEMA DECLARATION
+# Every payload field used in retrieval filters gets an index
+PAYLOAD_INDEXES: Dict[str, PayloadSchemaType] = {
+    "type": PayloadSchemaType.KEYWORD,
+    "topic": PayloadSchemaType.KEYWORD,
+    "job_id": PayloadSchemaType.KEYWORD,
+    "platforms": PayloadSchemaType.KEYWORD,
+    "created_ts": PayloadSchemaType.FLOAT,
+}
+
+class CollectionSchema(BaseModel):
+    """Desired layout of a Qdrant collection. Vector size/distance are fixed at creation."""
+    vector_size: int = 768
+    distance: Distance = Distance.COSINE
+    on_disk: bool = Field(default=False, description="Keep original vectors memmapped on disk")
+    on_disk_payload: bool = False
+    quantization: Optional[str] = Field(default=None, description="None or 'int8'")
+    quantization_always_ram: bool = True
+    hnsw_m: int = 16
+    hnsw_ef_construct: int = 100
+    hnsw_on_disk: bool = False
+    hnsw_ef_search: Optional[int] = None
+    payload_indexes: Dict[str, PayloadSchemaType] = Field(default_factory=lambda: dict(PAYLOAD_INDEXES))
+
+    def quantization_config(self):
+        if self.quantization == "int8":
+            return ScalarQuantization(scalar=ScalarQuantizationConfig(
+                type=ScalarType.INT8,
+                quantile=0.99,
+                always_ram=self.quantization_always_ram
+            ))
+        return None
+
+    def hnsw_config(self) -> HnswConfigDiff:
+        return HnswConfigDiff(m=self.hnsw_m, ef_construct=self.hnsw_ef_construct, on_disk=self.hnsw_on_disk)
+
+    def search_params(self) -> Optional[SearchParams]:
+        """Query-time params matching the collection layout (rescoring when quantized)."""
+        quantization = None
+        if self.quantization:
+            quantization = QuantizationSearchParams(rescore=True, oversampling=2.0)
+        if quantization is None and self.hnsw_ef_search is None:
+            return None
+        return SearchParams(hnsw_ef=self.hnsw_ef_search, quantization=quantization)
+
+def schema_from_settings() -> CollectionSchema:
+    return CollectionSchema(
+        on_disk=settings.qdrant_on_disk,
+        on_disk_payload=settings.qdrant_on_disk,
+        quantization=None if settings.qdrant_quantization == "none" else settings.qdrant_quantization,
+        hnsw_m=settings.qdrant_hnsw_m,
+        hnsw_ef_construct=settings.qdrant_hnsw_ef_construct,
+        hnsw_on_disk=settings.qdrant_on_disk,
+        hnsw_ef_search=settings.qdrant_hnsw_ef_search,
+    )
+
+# 2. MIGRATION
+def is_local(client: QdrantClient) -> bool:
+    """In-process Qdrant (":memory:" or path) ignores payload indexes and quantization."""
+    return client.init_options.get("location") == ":memory:" or bool(client.init_options.get("path"))
+
+def _current_quantization(config) -> Optional[str]:
+    scalar = getattr(config, "scalar", None)
+    if scalar is not None and scalar.type == ScalarType.INT8:
+        return "int8"
+    return None
+
+def apply_schema(client: QdrantClient, collection_name: str, schema: CollectionSchema) -> List[str]:
+    """Creates the collection or migrates an existing one to `schema`.
+
+    Idempotent: only settings that differ are sent, so calling it on every startup
+    is cheap. Returns a list of applied changes (empty when already up to date).
+    """
+    changes = []
+
+    if not client.collection_exists(collection_name):
+        client.create_collection(
+            collection_name=collection_name,
+            vectors_config=VectorParams(size=schema.vector_size, distance=schema.distance, on_disk=schema.on_disk),
+            hnsw_config=schema.hnsw_config(),
+            quantization_config=schema.quantization_config(),
+            on_disk_payload=schema.on_disk_payload,
+        )
+        changes.append("create collection")
+        indexed = {}
+    elif is_local(client):
+        # Local mode keeps no index/quantization state, so there is nothing to migrate
+        return changes
+    else:
+        info = client.get_collection(collection_name)
+        params = info.config.params
+        vectors = params.vectors
+
+        if vectors.size != schema.vector_size or vectors.distance != schema.distance:
+            raise ValueError(
+                f"Collection '{collection_name}' has {vectors.size}-d {vectors.distance} vectors, "
+                f"schema wants {schema.vector_size}-d {schema.distance}; re-create it and run the memory backfill."
+            )
+
+        if bool(vectors.on_disk) != schema.on_disk:
+            client.update_collection(collection_name, vectors_config={"": VectorParamsDiff(on_disk=schema.on_disk)})
+            changes.append(f"vectors on_disk={schema.on_disk}")
+
+        hnsw = info.config.hnsw_config
+        if (hnsw.m, hnsw.ef_construct, bool(hnsw.on_disk)) != (schema.hnsw_m, schema.hnsw_ef_construct, schema.hnsw_on_disk):
+            client.update_collection(collection_name, hnsw_config=schema.hnsw_config())
+            changes.append(f"hnsw m={schema.hnsw_m} ef_construct={schema.hnsw_ef_construct} on_disk={schema.hnsw_on_disk}")
+
+        if _current_quantization(info.config.quantization_config) != schema.quantization:
+            client.update_collection(collection_name, quantization_config=schema.quantization_config() or Disabled.DISABLED)
+            changes.append(f"quantization={schema.quantization or 'none'}")
+
+        if bool(params.on_disk_payload) != schema.on_disk_payload:
+            client.update_collection(collection_name, collection_params=CollectionParamsDiff(on_disk_payload=schema.on_disk_payload))
+            changes.append(f"on_disk_payload={schema.on_disk_payload}")
+
+        indexed = {name: idx.data_type for name, idx in (info.payload_schema or {}).items()}
+
+    if is_local(client):
+        return changes
+
+    for field_name, field_type in schema.payload_indexes.items():
+        if indexed.get(field_name) != field_type:
+            client.create_payload_index(collection_name, field_name=field_name, field_schema=field_type, wait=True)
+            changes.append(f"index {field_name}:{field_type.value}")
+
+    return changes
@@ -0,0 +1,57 @@
+import asyncio
+from typing import Awaitable, Callable, Dict, Iterable, List
+
+class PipelineStage:
+    """One node of the workflow graph.
+
+    `run` receives the results of the stages listed in `after`, in that order.
+    Non-critical stages (e.g. memory save) don't hold back job completion.
+    """
+
+    def __init__(self, name: str, run: Callable[..., Awaitable], after: Iterable[str] = (), critical: bool = True):
+        self.name = name
+        self.run = run
+        self.after = tuple(after)
+        self.critical = critical
+
+class PipelineRun:
+    """Handles to a running graph: critical results plus still-running background stages."""
+
+    def __init__(self, results: Dict[str, object], background: List[asyncio.Task]):
+        self.results = results
+        self.background = background
+
+    async def drain(self):
+        """Waits for background stages. Their failures are returned, never raised."""
+        return await asyncio.gather(*self.background, return_exceptions=True)
+
+async def run_pipeline(stages: List[PipelineStage]) -> PipelineRun:
+    """Starts every stage as soon as its dependencies finish.
+
+    Returns once all critical stages are done. If a critical stage fails, every
+    stage that hasn't finished is cancelled and the error is re-raised.
+    """
+    tasks: Dict[str, asyncio.Task] = {}
+
+    async def execute(stage: PipelineStage):
+        deps = [await tasks[name] for name in stage.after]
+        return await stage.run(*deps)
+
+    for stage in stages:
+        missing = [name for name in stage.after if name not in tasks]
+        if missing:
+            raise ValueError(f"Stage '{stage.name}' depends on undeclared stages {missing} (declare dependencies first)")
+        tasks[stage.name] = asyncio.create_task(execute(stage), name=stage.name)
+
+    critical = {s.name: tasks[s.name] for s in stages if s.critical}
+    background = [tasks[s.name] for s in stages if not s.critical]
+
+    try:
+        await asyncio.gather(*critical.values())
+    except BaseException:
+        for task in tasks.values():
+            task.cancel()
+        await asyncio.gather(*tasks.values(), return_exceptions=True)
+        raise
+
+    return PipelineRun({name: task.result() for name, task in critical.items()}, background)
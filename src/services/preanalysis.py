@@ -0,0 +1,330 @@
+import os
+import json
+import bisect
+import subprocess
+import threading
+from typing import List, Tuple
+import numpy as np
+from pydantic import BaseModel, Field
+from imageio_ffmpeg import get_ffmpeg_exe
+from src.core.config import settings, resolve_path
+from src.core.telemetry import BYTES_TOTAL, get_logger
+from src.services.disk_cache import evict_lru
+from src.services.response_cache import canonical_hash
+from src.services.video_proc import seconds_to_timestamp, timestamp_to_seconds
+
+# Decoded analysis frames: tiny grayscale thumbnails, enough for cuts and motion
+FRAME_W, FRAME_H = 64, 36
+AUDIO_RATE = 8000
+HIST_BINS = 16
+
+log = get_logger("PREP")
+
+# Candidate windows follow the analyst's clip length rules (15-60s)
+MIN_WINDOW_S = 15.0
+MAX_WINDOW_S = 60.0
+
+# 1. DATA MODELS
+class CandidateSegment(BaseModel):
+    """Window of the source worth sending to the analyst, scored locally."""
+    start_s: float
+    end_s: float
+    motion: float = Field(description="Mean normalized frame difference (0-1)")
+    audio: float = Field(description="Mean normalized RMS energy (0-1)")
+    score: float
+
+class PreAnalysis(BaseModel):
+    """Result of local pre-processing: scene cuts, candidate index and the proxy to upload."""
+    variant: str
+    duration_s: float
+    cuts: List[float]
+    segments: List[CandidateSegment]
+    proxy_path: str
+    # Source windows concatenated into the proxy, in order; empty = whole timeline
+    windows: List[Tuple[float, float]] = Field(default_factory=list)
+
+    def to_proxy(self, t: float) -> float:
+        offset = 0.0
+        for start, end in self.windows:
+            if t < end:
+                return offset + max(t - start, 0.0)
+            offset += end - start
+        return offset if self.windows else t
+
+    def to_source(self, t: float) -> float:
+        if not self.windows:
+            return t
+        offset = 0.0
+        for start, end in self.windows:
+            length = end - start
+            if t <= offset + length:
+                return start + (t - offset)
+            offset += length
+        return self.windows[-1][1]
+
+    def prompt_context(self) -> str:
+        """Candidate index in the uploaded video's timeline, as compact JSON."""
+        segments = [
+            {
+                "start": seconds_to_timestamp(self.to_proxy(s.start_s)),
+                "end": seconds_to_timestamp(self.to_proxy(s.end_s)),
+                "score": round(s.score, 2)
+            }
+            for s in self.segments
+            if not self.windows or any(ws <= s.start_s < we for ws, we in self.windows)
+        ]
+        cuts = [round(self.to_proxy(c), 2) for c in self.cuts if not self.windows or any(ws <= c < we for ws, we in self.windows)]
+        return json.dumps({"candidates": segments, "scene_cuts_s": cuts}, separators=(",", ":"))
+
+    def resolve_clip(self, start: str, end: str) -> Tuple[str, str]:
+        """Maps model timestamps back to the source and snaps them to nearby scene cuts."""
+        start_s = self.to_source(timestamp_to_seconds(start))
+        end_s = self.to_source(timestamp_to_seconds(end))
+        start_s, end_s = snap_to_cuts(start_s, end_s, self.cuts, settings.scene_snap_tolerance)
+        return seconds_to_timestamp(start_s), seconds_to_timestamp(min(end_s, self.duration_s))
+
+# 2. DECODING (low-res, one FFmpeg pass per track)
+def decode_frames(source_path: str, fps: float) -> np.ndarray:
+    """Returns (N, FRAME_H, FRAME_W) uint8 grayscale frames sampled at `fps`."""
+    proc = subprocess.run(
+        [get_ffmpeg_exe(), "-hide_banner", "-loglevel", "error", "-i", source_path, "-map", "0:v:0",
+         "-vf", f"fps={fps},scale={FRAME_W}:{FRAME_H},format=gray", "-f", "rawvideo", "-"],
+        capture_output=True, check=True
+    )
+    frame_size = FRAME_W * FRAME_H
+    count = len(proc.stdout) // frame_size
+    return np.frombuffer(proc.stdout[:count * frame_size], dtype=np.uint8).reshape(count, FRAME_H, FRAME_W)
+
+def decode_audio_energy(source_path: str, fps: float, frame_count: int) -> np.ndarray:
+    """RMS energy per analysis frame interval, normalized to 0-1 (zeros without audio)."""
+    proc = subprocess.run(
+        [get_ffmpeg_exe(), "-hide_banner", "-loglevel", "error", "-i", source_path, "-map", "0:a:0",
+         "-ac", "1", "-ar", str(AUDIO_RATE), "-f", "s16le", "-"],
+        capture_output=True
+    )
+    samples = np.frombuffer(proc.stdout[:len(proc.stdout) // 2 * 2], dtype=np.int16).astype(np.float32)
+    per_frame = int(AUDIO_RATE / fps)
+    energy = np.zeros(frame_count, dtype=np.float32)
+    usable = min(len(samples) // per_frame, frame_count)
+    if proc.returncode != 0 or usable == 0:
+        return energy
+
+    blocks = samples[:usable * per_frame].reshape(usable, per_frame)
+    energy[:usable] = np.sqrt(np.mean(blocks ** 2, axis=1))
+    return _normalize(energy)
+
+# 3. SIGNALS
+def _normalize(values: np.ndarray) -> np.ndarray:
+    """Scales by the 95th percentile so a few spikes don't flatten everything else."""
+    scale = np.percentile(values, 95) if len(values) else 0.0
+    return np.clip(values / scale, 0.0, 1.0) if scale > 0 else np.zeros_like(values)
+
+def frame_signals(frames: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Per-frame motion (mean abs pixel delta) and histogram distance to the previous frame."""
+    n = len(frames)
+    motion = np.zeros(n, dtype=np.float32)
+    hist_diff = np.zeros(n, dtype=np.float32)
+    if n < 2:
+        return motion, hist_diff
+
+    pixels = frames.reshape(n, -1)
+    motion[1:] = np.abs(pixels[1:].astype(np.int16) - pixels[:-1]).mean(axis=1) / 255.0
+
+    # One bincount over all frames: bin ids are offset by HIST_BINS per frame
+    bins = (pixels >> 4).astype(np.int32) + (np.arange(n, dtype=np.int32) * HIST_BINS)[:, None]
+    hist = np.bincount(bins.ravel(), minlength=n * HIST_BINS).reshape(n, HIST_BINS) / pixels.shape[1]
+    hist_diff[1:] = 0.5 * np.abs(hist[1:] - hist[:-1]).sum(axis=1)
+    return motion, hist_diff
+
+def detect_cuts(hist_diff: np.ndarray, fps: float, threshold: float, min_scene_s: float) -> List[float]:
+    """Shot boundaries: histogram jumps above `threshold` and well above their neighbourhood."""
+    window = max(3, int(fps * 2) | 1)
+    # Mean of the surrounding frames, excluding the frame itself
+    neighbours = (np.convolve(hist_diff, np.ones(window), mode="same") - hist_diff) / (window - 1)
+    candidates = np.flatnonzero((hist_diff > threshold) & (hist_diff > 3 * neighbours))
+
+    # Strongest cuts first; drop weaker ones closer than min_scene_s
+    accepted = []
+    for i in candidates[np.argsort(-hist_diff[candidates])]:
+        t = i / fps
+        if all(abs(t - a) >= min_scene_s for a in accepted):
+            accepted.append(t)
+    return sorted(accepted)
+
+def snap_to_cuts(start_s: float, end_s: float, cuts: List[float], tolerance: float) -> Tuple[float, float]:
+    """Moves each boundary to the nearest scene cut within `tolerance` seconds."""
+    def nearest(t: float) -> float:
+        i = bisect.bisect_left(cuts, t)
+        best = min((cuts[j] for j in (i - 1, i) if 0 <= j < len(cuts)), key=lambda c: abs(c - t), default=None)
+        return best if best is not None and abs(best - t) <= tolerance else t
+
+    snapped_start, snapped_end = nearest(start_s), nearest(end_s)
+    if snapped_end - snapped_start < 1.0:
+        return start_s, end_s
+    return snapped_start, snapped_end
+
+def candidate_segments(
+    cuts: List[float],
+    duration: float,
+    motion: np.ndarray,
+    audio: np.ndarray,
+    fps: float,
+    limit: int
+) -> List[CandidateSegment]:
+    """Scores windows that start on a scene boundary and span 15-60s of whole scenes.
+
+    Window means come from cumulative sums, so scoring is O(1) per window. The best
+    non-overlapping windows are returned in timeline order.
+    """
+    if duration <= 0 or len(motion) == 0:
+        return []
+    motion_n = _normalize(motion)
+    activity = 0.5 * motion_n + 0.5 * audio
+    cum = np.concatenate([[0.0], np.cumsum(activity)])
+    cum_motion = np.concatenate([[0.0], np.cumsum(motion_n)])
+    cum_audio = np.concatenate([[0.0], np.cumsum(audio)])
+
+    def mean(cumsum, a: float, b: float) -> float:
+        i = min(int(a * fps), len(cumsum) - 2)
+        j = max(i + 1, min(int(b * fps), len(cumsum) - 1))
+        return float((cumsum[j] - cumsum[i]) / (j - i))
+
+    bounds = [0.0] + [c for c in cuts if 0 < c < duration] + [duration]
+    windows = []
+    for i, start in enumerate(bounds[:-1]):
+        # Extend over whole scenes until the window is long enough, capped at MAX_WINDOW_S
+        end = next((b for b in bounds[i + 1:] if b - start >= MIN_WINDOW_S), duration)
+        end = min(end, start + MAX_WINDOW_S)
+        if end - start < min(MIN_WINDOW_S, duration):
+            continue
+        windows.append(CandidateSegment(
+            start_s=round(start, 2),
+            end_s=round(end, 2),
+            motion=round(mean(cum_motion, start, end), 3),
+            audio=round(mean(cum_audio, start, end), 3),
+            score=round(mean(cum, start, end), 3)
+        ))
+
+    chosen = []
+    for w in sorted(windows, key=lambda w: -w.score):
+        if all(w.end_s <= c.start_s or w.start_s >= c.end_s for c in chosen):
+            chosen.append(w)
+        if len(chosen) >= limit:
+            break
+    return sorted(chosen, key=lambda w: w.start_s)
+
+# 4. PROXY
+def build_proxy(source_path: str, target_path: str, windows: List[Tuple[float, float]] = None, has_audio: bool = True):
+    """Encodes a small low-bitrate proxy, optionally only the given windows back to back."""
+    height = settings.proxy_height
+    scale = f"scale=-2:{height},fps={settings.proxy_fps}"
+    cmd = [get_ffmpeg_exe(), "-y", "-hide_banner", "-loglevel", "error", "-i", source_path]
+
+    if windows:
+        parts, labels = [], []
+        for k, (start, end) in enumerate(windows):
+            parts.append(f"[0:v]trim=start={start:.3f}:end={end:.3f},setpts=PTS-STARTPTS,{scale}[v{k}]")
+            labels.append(f"[v{k}]")
+            if has_audio:
+                parts.append(f"[0:a]atrim=start={start:.3f}:end={end:.3f},asetpts=PTS-STARTPTS[a{k}]")
+                labels.append(f"[a{k}]")
+        audio_flag = 1 if has_audio else 0
+        parts.append(f"{''.join(labels)}concat=n={len(windows)}:v=1:a={audio_flag}[vout]" + ("[aout]" if has_audio else ""))
+        cmd += ["-filter_complex", ";".join(parts), "-map", "[vout]"]
+        if has_audio:
+            cmd += ["-map", "[aout]"]
+    else:
+        cmd += ["-vf", scale, "-map", "0:v:0"]
+        if has_audio:
+            cmd += ["-map", "0:a:0"]
+
+    cmd += ["-c:v", "libx264", "-preset", "veryfast", "-crf", str(settings.proxy_crf)]
+    cmd += ["-c:a", "aac", "-b:a", "48k", "-ac", "1"] if has_audio else ["-an"]
+    # Jobs or workers may build the same proxy at once. The .tmp suffix keeps it out of cache
+    # eviction while it is written, so the muxer is named explicitly
+    tmp_path = f"{target_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    cmd += ["-movflags", "+faststart", "-f", "mp4", tmp_path]
+    try:
+        subprocess.run(cmd, check=True, capture_output=True)
+        os.replace(tmp_path, target_path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+# 5. ENTRY POINT
+def preanalysis_variant() -> str:
+    """Identifies what the analyst will see; part of the analysis cache key.
+
+    Every setting that shapes the index, the proxy or the snapped clips is hashed in, so
+    changing one never reuses a stale pre-analysis or analysis report.
+    """
+    mode = settings.preanalysis_mode
+    if mode == "off":
+        return mode
+    fingerprint = canonical_hash(
+        settings.preanalysis_fps, settings.scene_cut_threshold, settings.min_scene_seconds,
+        settings.scene_snap_tolerance, settings.preanalysis_candidates,
+        settings.preanalysis_top_k if mode == "windows" else None,
+        settings.proxy_height, settings.proxy_fps, settings.proxy_crf
+    )
+    return f"{mode}-{fingerprint[:12]}"
+
+def run_preanalysis(source_path: str, video_hash: str) -> PreAnalysis:
+    """Scene cuts, audio/motion scores, candidate index and proxy for one source.
+
+    Results live in PREANALYSIS_DIR as <video_hash>.<variant>.json/.mp4 and are reused for
+    the same content and settings; least recently used ones are evicted beyond
+    PREANALYSIS_CACHE_MAX_BYTES.
+    """
+    variant = preanalysis_variant()
+    work_dir = resolve_path(settings.preanalysis_dir)
+    index_path = work_dir / f"{video_hash}.{variant}.json"
+    try:
+        cached = PreAnalysis.model_validate_json(index_path.read_text(encoding="utf-8"))
+        os.utime(cached.proxy_path)
+        os.utime(index_path)
+        log.info("Reusing pre-analysis", video_hash=video_hash[:12])
+        return cached
+    except (FileNotFoundError, ValueError):
+        pass
+
+    from moviepy.video.io.ffmpeg_reader import ffmpeg_parse_infos
+
+    work_dir.mkdir(parents=True, exist_ok=True)
+    fps = settings.preanalysis_fps
+    infos = ffmpeg_parse_infos(source_path)
+    duration = float(infos["duration"])
+
+    frames = decode_frames(source_path, fps)
+    motion, hist_diff = frame_signals(frames)
+    audio = decode_audio_energy(source_path, fps, len(frames))
+    cuts = detect_cuts(hist_diff, fps, settings.scene_cut_threshold, settings.min_scene_seconds)
+    segments = candidate_segments(cuts, duration, motion, audio, fps, settings.preanalysis_candidates)
+    log.info("Signals computed", video_hash=video_hash[:12], frames=len(frames), cuts=len(cuts), candidates=len(segments))
+
+    windows = []
+    if settings.preanalysis_mode == "windows" and segments:
+        top = sorted(segments, key=lambda s: -s.score)[:settings.preanalysis_top_k]
+        windows = [(s.start_s, s.end_s) for s in sorted(top, key=lambda s: s.start_s)]
+
+    proxy_path = str(work_dir / f"{video_hash}.{variant}.mp4")
+    build_proxy(source_path, proxy_path, windows, has_audio=bool(infos.get("audio_found")))
+    proxy_bytes = os.path.getsize(proxy_path)
+    BYTES_TOTAL.inc(proxy_bytes, kind="proxy")
+    log.info("Proxy built", video_hash=video_hash[:12], proxy_bytes=proxy_bytes, source_bytes=os.path.getsize(source_path))
+
+    result = PreAnalysis(
+        variant=variant,
+        duration_s=duration,
+        cuts=[round(c, 3) for c in cuts],
+        segments=segments,
+        proxy_path=proxy_path,
+        windows=windows
+    )
+    index_path.write_text(result.model_dump_json(), encoding="utf-8")
+    # This job's files are about to be uploaded, so they are never the ones evicted
+    evict_lru(
+        str(work_dir), settings.preanalysis_cache_max_bytes, (".json", ".mp4"),
+        keep=(index_path.name, os.path.basename(proxy_path))
+    )
+    return result
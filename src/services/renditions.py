@@ -0,0 +1,123 @@
+import os
+import shutil
+import threading
+from typing import Dict, Optional, Tuple
+from pydantic import BaseModel, Field
+from src.core.config import settings, resolve_path
+from src.services.disk_cache import evict_lru
+from src.services.response_cache import canonical_hash
+
+# Bump when the filter graph or encoder arguments change, so cached renditions are not reused
+RENDER_VERSION = "1"
+
+# 1. PROFILES
+class RenditionProfile(BaseModel):
+    """Output format of one platform's rendition. Unset fields keep the encoder defaults."""
+    aspect: str = Field(default="9:16", description="Crop aspect ratio W:H (centered unless CROP_MODE=smart)")
+    height: Optional[int] = Field(default=None, description="Output height; never upscales")
+    crf: Optional[int] = None
+    maxrate: Optional[str] = Field(default=None, description="Capped CRF, e.g. '6M' (needs bufsize)")
+    bufsize: Optional[str] = None
+    preset: str = "medium"
+    audio_bitrate: Optional[str] = None
+
+    def ratio(self) -> Tuple[int, int]:
+        w, h = self.aspect.split(":")
+        return int(w), int(h)
+
+# Platform specs: vertical for TikTok/Shorts, square for the LinkedIn feed
+DEFAULT_PROFILES = {
+    "tiktok": {"aspect": "9:16", "height": 1920, "crf": 21, "maxrate": "6M", "bufsize": "12M", "audio_bitrate": "128k"},
+    "youtube": {"aspect": "9:16", "height": 1920, "crf": 20, "maxrate": "10M", "bufsize": "20M", "audio_bitrate": "192k"},
+    "linkedin": {"aspect": "1:1", "height": 1080, "crf": 22, "maxrate": "5M", "bufsize": "10M", "audio_bitrate": "128k"},
+}
+
+def rendition_profiles() -> Dict[str, RenditionProfile]:
+    """DEFAULT_PROFILES with RENDITION_PROFILES (JSON) merged over them, per platform and field."""
+    merged = {name: dict(fields) for name, fields in DEFAULT_PROFILES.items()}
+    for name, fields in settings.rendition_profiles.items():
+        merged.setdefault(name.lower(), {}).update(fields)
+    return {name: RenditionProfile(**fields) for name, fields in merged.items()}
+
+def primary_profile(profiles: Dict[str, RenditionProfile]) -> str:
+    """Profile whose rendition is also published as short_{i}.mp4 (UI preview, legacy clients)."""
+    return settings.rendition_primary if settings.rendition_primary in profiles else next(iter(profiles))
+
+def rendition_key(
+    source_hash: str,
+    start_s: float,
+    end_s: float,
+    extract_mode: str,
+    profile: RenditionProfile,
+    brand: str,
+    crop: str = "center"
+) -> str:
+    """Identity of one encoded rendition. Platforms with identical profiles share it."""
+    return canonical_hash(
+        source_hash, round(start_s, 3), round(end_s, 3), extract_mode, profile.model_dump(), brand, crop, RENDER_VERSION
+    )
+
+# 2. CACHE
+def link_or_copy(src_path: str, dst_path: str) -> str:
+    """Hardlinks dst to src (no data copied); falls back to a copy across filesystems.
+
+    Returns "link" or "copy".
+    """
+    if os.path.exists(dst_path):
+        os.remove(dst_path)
+    try:
+        os.link(src_path, dst_path)
+        return "link"
+    except OSError:
+        shutil.copy2(src_path, dst_path)
+        return "copy"
+
+class RenditionCache:
+    """Content-addressed store of encoded renditions: <directory>/<key>.mp4.
+
+    Entries are hardlinked into job folders, so a cached rendition costs no extra disk
+    while a job still references it. Least recently used entries are evicted once the
+    directory grows beyond max_bytes. Safe to share between render worker processes.
+    """
+
+    def __init__(self, directory: str, max_bytes: int):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.mp4")
+
+    def fetch(self, key: str, dst_path: str) -> bool:
+        """Places the cached rendition at dst_path. Returns False on a miss."""
+        path = self._path(key)
+        try:
+            if os.path.getsize(path) == 0:
+                return False
+            link_or_copy(path, dst_path)
+        except FileNotFoundError:
+            return False
+        os.utime(path)
+        return True
+
+    def store(self, key: str, src_path: str):
+        # Workers may race on the same key, so link aside and rename atomically
+        tmp_path = f"{self._path(key)}.{os.getpid()}.{threading.get_ident()}.tmp"
+        link_or_copy(src_path, tmp_path)
+        os.replace(tmp_path, self._path(key))
+        self.evict()
+
+    def evict(self) -> int:
+        """Removes least recently used renditions until the cache fits in max_bytes."""
+        with self._lock:
+            return evict_lru(self.directory, self.max_bytes, ".mp4")
+
+_cache: Optional[RenditionCache] = None
+
+def rendition_cache() -> RenditionCache:
+    """Per-process cache handle (render workers build their own on first use)."""
+    global _cache
+    if _cache is None:
+        _cache = RenditionCache(str(resolve_path(settings.rendition_cache_dir)), settings.rendition_cache_max_bytes)
+    return _cache
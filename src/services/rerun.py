@@ -0,0 +1,53 @@
+import copy
+from typing import Dict, List, Optional
+from pydantic import BaseModel, Field
+
+# 1. DATA MODELS
+class ClipEdit(BaseModel):
+    """Operator correction of one clip of the parent's analysis (1-based, as in clip_index)."""
+    index: int
+    start: Optional[str] = Field(default=None, description="New start (MM:SS); unset keeps the parent's")
+    end: Optional[str] = Field(default=None, description="New end (MM:SS); unset keeps the parent's")
+
+class RerunRequest(BaseModel):
+    """Derives a job from a completed parent job on the same source video.
+
+    With `clips`, the parent's analysis is reused with those edits applied; without,
+    the source is analyzed again (cached per directives). Unset directives keep the parent's.
+    """
+    directives: Optional[str] = None
+    clips: Optional[List[ClipEdit]] = None
+
+# 2. DIFFING AGAINST THE PARENT
+def apply_clip_edits(report: dict, edits: List[dict]) -> dict:
+    """Parent analysis report with edited clip boundaries. Unknown indexes are ignored."""
+    report = copy.deepcopy(report)
+    clips = report.get("clips", [])
+    for edit in edits:
+        i = edit["index"] - 1
+        if 0 <= i < len(clips):
+            clips[i].update({k: edit[k] for k in ("start", "end") if edit.get(k)})
+    return report
+
+def _span(clip: dict) -> tuple:
+    # Imported here: video_proc pulls in NumPy and FFmpeg, which the API module avoids at startup
+    from src.services.video_proc import timestamp_to_seconds
+    return round(timestamp_to_seconds(clip["start"]), 2), round(timestamp_to_seconds(clip["end"]), 2)
+
+def reusable_copy(clips: List[dict], parent_report: dict, parent_campaign: dict) -> Dict[int, dict]:
+    """Parent ClipStrategy per new clip index, for clips whose span is unchanged.
+
+    Clips are matched by (start, end), not position, so reordered clips keep their copy.
+    """
+    by_index = {cs["clip_index"]: cs for cs in parent_campaign.get("clip_strategies", [])}
+    by_span = {}
+    for i, clip in enumerate(parent_report.get("clips", []), 1):
+        if i in by_index:
+            by_span.setdefault(_span(clip), by_index[i])
+
+    reuse = {}
+    for i, clip in enumerate(clips, 1):
+        strategy = by_span.get(_span(clip))
+        if strategy is not None:
+            reuse[i] = {**strategy, "clip_index": i}
+    return reuse
@@ -0,0 +1,98 @@
+import json
+import hashlib
+import threading
+from typing import Callable, List, Optional, Tuple
+from src.core.cache import LRUCache
+from src.services.disk_cache import DiskLRUCache
+
+def canonical_hash(*parts) -> str:
+    """SHA-256 of JSON-encoded parts with sorted keys, so dict ordering never changes the key."""
+    blob = json.dumps(parts, sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=str)
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+class ResponseCache:
+    """Two-tier cache for structured LLM responses.
+
+    Exact tier: DiskLRUCache keyed by a canonical hash of everything that shapes the
+    response (shared by API workers, survives restarts, TTL + size-based LRU).
+
+    Semantic tier (optional): in-process LRU of (embedding, response) grouped by a
+    `scope` key. A request reuses a response from the same scope when the cosine
+    similarity of their embeddings is at least `threshold`. The scope must pin what
+    may never differ between reused responses (e.g. the clip layout).
+
+    Hits and misses are counted per `level`, so a cache holding both whole responses and
+    their parts (a brief and its clips) reports a hit rate for each instead of a blend.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        max_bytes: int,
+        ttl_seconds: float = None,
+        semantic: bool = False,
+        threshold: float = 0.95,
+        semantic_size: int = 512,
+        embed: Callable[[str], List[float]] = None
+    ):
+        self.ttl_seconds = ttl_seconds
+        self.exact = DiskLRUCache(directory, max_bytes)
+        self.semantic = LRUCache(maxsize=semantic_size, ttl_seconds=ttl_seconds) if semantic else None
+        self.threshold = threshold
+        self.embed = embed
+        self._lock = threading.Lock()
+        self._counters = {}
+
+    def _count(self, level: str, name: str):
+        with self._lock:
+            counters = self._counters.setdefault(level, {"exact_hits": 0, "semantic_hits": 0, "misses": 0})
+            counters[name] += 1
+
+    def get_exact(self, key: str, level: str = "response") -> Optional[dict]:
+        value = self.exact.get(key)
+        if value is not None:
+            self._count(level, "exact_hits")
+        return value
+
+    def get_semantic(self, scope: str, text: str, level: str = "response") -> Tuple[Optional[dict], Optional[List[float]]]:
+        """Returns (best response above threshold or None, embedding of `text` for a later put)."""
+        if self.semantic is None or self.embed is None:
+            return None, None
+
+        import numpy as np
+
+        vector = np.asarray(self.embed(text), dtype=np.float32)
+        vector /= np.linalg.norm(vector) or 1.0
+
+        best, best_score = None, self.threshold
+        for (entry_scope, _), (entry_vector, value) in self.semantic.items():
+            if entry_scope != scope:
+                continue
+            score = float(np.dot(vector, entry_vector))
+            if score >= best_score:
+                best, best_score = value, score
+
+        if best is not None:
+            self._count(level, "semantic_hits")
+        return best, vector
+
+    def miss(self, level: str = "response"):
+        self._count(level, "misses")
+
+    def put(self, key: str, value: dict, scope: str = None, vector=None):
+        self.exact.set(key, value, ttl_seconds=self.ttl_seconds)
+        if self.semantic is not None and scope is not None and vector is not None:
+            self.semantic.set((scope, key), (vector, value))
+
+    def stats(self, level: str = "response") -> dict:
+        with self._lock:
+            counters = dict(self._counters.get(level, {"exact_hits": 0, "semantic_hits": 0, "misses": 0}))
+        total = sum(counters.values())
+        hits = counters["exact_hits"] + counters["semantic_hits"]
+        return {
+            **counters,
+            "hit_rate": round(hits / total, 4) if total else 0.0,
+            "exact_hit_rate": round(counters["exact_hits"] / total, 4) if total else 0.0,
+            "semantic_hit_rate": round(counters["semantic_hits"] / total, 4) if total else 0.0,
+            "semantic_entries": len(self.semantic) if self.semantic is not None else 0
+        }
@@ -0,0 +1,112 @@
+import time
+import hashlib
+from datetime import datetime
+from typing import Callable, List, Optional
+from pydantic import BaseModel, Field
+from qdrant_client.models import FieldCondition, Filter, MatchValue, Range
+from src.core.cache import LRUCache
+from src.core.config import settings
+from src.core.registry import registry
+from src.core.resilience import resilience
+from src.core.stats import LatencyRecorder
+from src.core.telemetry import CACHE_HIT_RATE, metrics, track_call
+from src.services import memory
+
+# 1. DATA MODELS
+class SimilarCampaign(BaseModel):
+    """Past campaign returned by similarity search over content_memory."""
+    score: float = Field(description="Cosine similarity to the query topic")
+    job_id: str
+    topic: str
+    strategy: Optional[str] = None
+    platforms: List[str] = Field(default_factory=list)
+    timestamp: Optional[str] = None
+    clips: List[dict] = Field(default_factory=list)
+
+# 2. EMBEDDING CACHE AND LATENCY
+# Repeat topics never hit text-embedding-004 again while they stay in the LRU
+embedding_cache = LRUCache(maxsize=settings.embedding_cache_size)
+search_latency = LatencyRecorder(window=1000)
+
+@metrics.collector
+def _embedding_cache_metrics():
+    CACHE_HIT_RATE.set(embedding_cache.stats()["hit_rate"], cache="embedding")
+
+def embed_query(text: str, embed: Callable[[str], List[float]] = None) -> List[float]:
+    """Returns the embedding for text, from the local cache when possible."""
+    key = hashlib.sha256(f"{memory.EMBEDDING_MODEL}:{text.strip()}".encode("utf-8")).hexdigest()
+    vector = embedding_cache.get(key)
+    if vector is None:
+        vector = (embed or memory.get_embedding)(text)
+        embedding_cache.set(key, vector)
+    return vector
+
+def build_filter(
+    campaign_type: Optional[str] = "campaign_brief",
+    platform: Optional[str] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None
+) -> Optional[Filter]:
+    """Payload filter on type, platform and creation time."""
+    must = []
+    if campaign_type:
+        must.append(FieldCondition(key="type", match=MatchValue(value=campaign_type)))
+    if platform:
+        must.append(FieldCondition(key="platforms", match=MatchValue(value=platform.lower().strip())))
+    if since or until:
+        must.append(FieldCondition(key="created_ts", range=Range(
+            gte=since.timestamp() if since else None,
+            lte=until.timestamp() if until else None
+        )))
+    return Filter(must=must) if must else None
+
+# 3. RETRIEVAL
+def find_similar_campaigns(
+    topic: str,
+    limit: int = 5,
+    campaign_type: Optional[str] = "campaign_brief",
+    platform: Optional[str] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    score_threshold: Optional[float] = None,
+    client=None,
+    embed: Callable[[str], List[float]] = None
+) -> List[SimilarCampaign]:
+    """Finds past campaigns whose topic/strategy is closest to `topic`.
+
+    `client` and `embed` default to the shared Qdrant client and Gemini embeddings;
+    pass a QdrantClient(":memory:") and a local embedder to run offline.
+    """
+    t0 = time.perf_counter()
+    try:
+        vector = embed_query(topic, embed)
+        with track_call("qdrant", "query"):
+            response = resilience.guard("qdrant").call_sync(
+                (client or registry.qdrant_client()).query_points,
+                collection_name=memory.COLLECTION_NAME,
+                query=vector,
+                query_filter=build_filter(campaign_type, platform, since, until),
+                limit=limit,
+                score_threshold=score_threshold,
+                search_params=memory.collection_schema.search_params(),
+                with_payload=True
+            )
+    finally:
+        search_latency.record(time.perf_counter() - t0)
+
+    return [
+        SimilarCampaign(
+            score=point.score,
+            job_id=str(point.payload.get("job_id", "unknown")),
+            topic=point.payload.get("topic", ""),
+            strategy=point.payload.get("strategy"),
+            platforms=point.payload.get("platforms", []),
+            timestamp=point.payload.get("timestamp"),
+            clips=point.payload.get("clips", [])
+        )
+        for point in response.points
+    ]
+
+def retrieval_stats() -> dict:
+    """Search latency percentiles and embedding cache hit rate."""
+    return {"latency": search_latency.summary(), "embedding_cache": embedding_cache.stats()}
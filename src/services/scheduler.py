@@ -0,0 +1,118 @@
+import os
+import asyncio
+import contextvars
+from collections import deque
+from functools import partial
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Callable, Dict, Optional
+
+# Pipeline stages in execution order (mirrors PREPARING/ANALYZING/WRITING/RENDERING/DISTRIBUTING + memory)
+STAGES = ("prepare", "analyze", "write", "render", "dispatch", "remember")
+
+class QueueFullError(Exception):
+    """Raised when the scheduler cannot admit another job."""
+
+class StageScheduler:
+    """Bounded job scheduler with one queue per pipeline stage.
+
+    - Admission is capped at max_pending jobs; beyond that submit() raises QueueFullError.
+    - Each stage has its own concurrency limit; jobs wait in FIFO order for a slot.
+    - Work runs on the event loop ("async"), on a thread pool for blocking SDK calls
+      ("thread"), or on the shared render process pool ("process").
+    """
+
+    def __init__(self, concurrency: Dict[str, int], max_pending: int, thread_workers: int = 8, render_workers: int = 0):
+        self.max_pending = max_pending
+        self.limits = {stage: asyncio.Semaphore(max(1, concurrency.get(stage, 1))) for stage in STAGES}
+        self.waiting = {stage: deque() for stage in STAGES}
+        self.active = {stage: 0 for stage in STAGES}
+
+        self.thread_pool = ThreadPoolExecutor(max_workers=thread_workers, thread_name_prefix="omni-stage")
+        self._render_workers = render_workers or os.cpu_count() or 1
+        self._process_pool: Optional[ProcessPoolExecutor] = None
+
+        # Strong references to running workflows (asyncio only keeps weak ones)
+        self._tasks: Dict[str, asyncio.Task] = {}
+
+    @property
+    def process_pool(self) -> ProcessPoolExecutor:
+        """Render pool shared by all jobs, created on first use."""
+        if self._process_pool is None:
+            self._process_pool = ProcessPoolExecutor(max_workers=self._render_workers)
+        return self._process_pool
+
+    # --- ADMISSION ---
+
+    def has_capacity(self) -> bool:
+        return len(self._tasks) < self.max_pending
+
+    def submit(self, job_id: str, workflow: Callable, *args) -> int:
+        """Admits a job and starts its workflow coroutine. Returns its queue position."""
+        if not self.has_capacity():
+            raise QueueFullError(f"Scheduler is at capacity ({self.max_pending} jobs in flight)")
+
+        task = asyncio.create_task(workflow(job_id, *args))
+        self._tasks[job_id] = task
+        task.add_done_callback(lambda _: self._tasks.pop(job_id, None))
+
+        # Position counts jobs ahead of this one that are still waiting for their first stage
+        return len(self.waiting["prepare"]) + len(self.waiting["analyze"])
+
+    def position(self, job_id: str, stage: str = None) -> Optional[int]:
+        """0-based position of a job in a stage queue, or None if it isn't waiting there.
+
+        Without a stage, looks at the entry stages (prepare, then analyze).
+        """
+        for name in ((stage,) if stage else ("prepare", "analyze")):
+            try:
+                return list(self.waiting[name]).index(job_id)
+            except ValueError:
+                continue
+        return None
+
+    # --- EXECUTION ---
+
+    async def run(self, stage: str, job_id: str, fn: Callable, *args, mode: str = "async", on_start: Callable = None, **kwargs):
+        """Runs one stage of a job once a slot in that stage's queue frees up."""
+        queue = self.waiting[stage]
+        queue.append(job_id)
+        try:
+            await self.limits[stage].acquire()
+        finally:
+            queue.remove(job_id)
+
+        self.active[stage] += 1
+        try:
+            if on_start:
+                on_start()
+
+            if mode == "async":
+                return await fn(*args, **kwargs)
+
+            loop = asyncio.get_running_loop()
+            if mode == "thread":
+                # Threads see the job's context (e.g. its call deadline), as asyncio.to_thread does
+                context = contextvars.copy_context()
+                return await loop.run_in_executor(self.thread_pool, partial(context.run, fn, *args, **kwargs))
+            return await loop.run_in_executor(self.process_pool, partial(fn, *args, **kwargs))
+        finally:
+            self.active[stage] -= 1
+            self.limits[stage].release()
+
+    def snapshot(self) -> dict:
+        """Queue depth and active slots per stage."""
+        return {
+            "jobs_in_flight": len(self._tasks),
+            "max_pending": self.max_pending,
+            "stages": {
+                stage: {"waiting": len(self.waiting[stage]), "active": self.active[stage]}
+                for stage in STAGES
+            }
+        }
+
+    def shutdown(self):
+        for task in list(self._tasks.values()):
+            task.cancel()
+        self.thread_pool.shutdown(wait=False, cancel_futures=True)
+        if self._process_pool is not None:
+            self._process_pool.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,224 @@
+import time
+import subprocess
+from typing import List, Optional, Tuple
+import numpy as np
+from pydantic import BaseModel
+from imageio_ffmpeg import get_ffmpeg_exe
+from src.core.config import settings, resolve_path
+from src.core.telemetry import get_logger
+from src.services.disk_cache import DiskLRUCache
+from src.services.response_cache import canonical_hash
+
+# Bump when the saliency model or the smoothing changes, so cached ROI tracks are recomputed
+ROI_VERSION = "1"
+
+# Share of motion in the saliency map; the rest is spectral residual (static "stand-out" regions)
+MOTION_WEIGHT = 0.6
+# Sigma of the center prior, as a fraction of the frame: ties and empty frames lean to the middle
+CENTER_BIAS = 0.35
+# The window holds still until the ROI drifts further than this (fraction of the frame) from it;
+# a static window is also what keeps the encoder cost of smart crop low
+DEAD_ZONE = 0.05
+
+log = get_logger("CROP")
+
+# 1. DATA MODELS
+class RoiTrack(BaseModel):
+    """Smoothed region-of-interest center of a clip, in seconds from the clip start.
+
+    cx/cy are fractions of the source width/height and are interpolated linearly
+    between samples; a scene cut is two samples 1 ms apart, i.e. a hard jump.
+    """
+    t: List[float]
+    cx: List[float]
+    cy: List[float]
+
+    def at(self, times: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        return np.interp(times, self.t, self.cx), np.interp(times, self.t, self.cy)
+
+def crop_signature(crop_mode: str) -> str:
+    """Identity of the crop placement, part of the rendition cache key."""
+    if crop_mode != "smart":
+        return "center"
+    return f"smart:{ROI_VERSION}:{settings.smart_crop_fps}:{settings.smart_crop_width}:{settings.smart_crop_smoothing}"
+
+# 2. DECODING
+def decode_clip_frames(
+    source_path: str,
+    start_s: float,
+    end_s: float,
+    source_size: Tuple[int, int],
+    fps: float,
+    width: int
+) -> np.ndarray:
+    """Returns (N, H, width) uint8 grayscale frames of the clip range, sampled at `fps`.
+
+    B-frames and the deblocking filter are skipped: at thumbnail size and a few fps
+    neither matters, and decoding is ~4x cheaper.
+    """
+    src_w, src_h = source_size
+    height = max(2, round(width * src_h / src_w / 2) * 2)
+    proc = subprocess.run(
+        [get_ffmpeg_exe(), "-hide_banner", "-loglevel", "error", "-skip_frame", "bidir", "-skip_loop_filter", "all",
+         "-ss", f"{start_s:.3f}", "-t", f"{end_s - start_s:.3f}", "-i", source_path, "-map", "0:v:0",
+         "-vf", f"fps={fps},scale={width}:{height}:flags=area,format=gray", "-f", "rawvideo", "-"],
+        capture_output=True, check=True
+    )
+    frame_size = width * height
+    count = len(proc.stdout) // frame_size
+    return np.frombuffer(proc.stdout[:count * frame_size], dtype=np.uint8).reshape(count, height, width)
+
+# 3. SALIENCY (batched over all frames of a clip)
+def _box_blur(maps: np.ndarray, radius: int) -> np.ndarray:
+    """Separable box filter over the H and W axes of an (N, H, W) stack, edges clamped."""
+    if radius < 1:
+        return maps
+    size = 2 * radius + 1
+    for axis in (1, 2):
+        moved = np.moveaxis(maps, axis, -1)
+        summed = np.cumsum(np.pad(moved, [(0, 0), (0, 0), (radius + 1, radius)], mode="edge"), axis=-1)
+        maps = np.moveaxis((summed[..., size:] - summed[..., :-size]) / size, -1, axis)
+    return maps
+
+def _unit(maps: np.ndarray) -> np.ndarray:
+    """Scales every map to a peak of 1."""
+    return maps / np.maximum(maps.max(axis=(1, 2), keepdims=True), 1e-6)
+
+def saliency_maps(frames: np.ndarray) -> np.ndarray:
+    """(N, H, W) saliency in 0-1: spectral residual (what stands out) blended with motion (what moves)."""
+    f = frames.astype(np.float32) / 255.0
+    radius = max(1, f.shape[2] // 32)
+
+    # Spectral residual: log amplitude minus its local average keeps the "unexpected" part of each frame
+    spectrum = np.fft.fft2(f, axes=(1, 2))
+    log_amp = np.log(np.abs(spectrum) + 1e-6)
+    residual = log_amp - _box_blur(log_amp, 1)
+    spectral = np.abs(np.fft.ifft2(np.exp(residual + 1j * np.angle(spectrum)), axes=(1, 2))) ** 2
+    spectral = _unit(_box_blur(spectral.astype(np.float32), radius))
+
+    motion = np.zeros_like(f)
+    if len(f) > 1:
+        motion[1:] = np.abs(f[1:] - f[:-1])
+        motion[0] = motion[1]
+    motion = _unit(_box_blur(motion, radius))
+
+    return MOTION_WEIGHT * motion + (1 - MOTION_WEIGHT) * spectral
+
+def roi_centers(maps: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Per-frame ROI center (cx, cy as frame fractions) and a 0-1 confidence.
+
+    Centers are centroids of the squared column/row saliency profiles, which favours
+    the dominant subject over scattered texture. Confidence measures how peaked the
+    profiles are; flat maps (nothing stands out) score near 0.
+    """
+    _, h, w = maps.shape
+    xs = (np.arange(w) + 0.5) / w
+    ys = (np.arange(h) + 0.5) / h
+    cols = maps.sum(axis=1) * np.exp(-0.5 * ((xs - 0.5) / CENTER_BIAS) ** 2)
+    rows = maps.sum(axis=2) * np.exp(-0.5 * ((ys - 0.5) / CENTER_BIAS) ** 2)
+
+    cx = (cols ** 2) @ xs / np.maximum((cols ** 2).sum(axis=1), 1e-9)
+    cy = (rows ** 2) @ ys / np.maximum((rows ** 2).sum(axis=1), 1e-9)
+
+    def peakedness(profile: np.ndarray) -> np.ndarray:
+        return np.clip(profile.max(axis=1) / np.maximum(profile.mean(axis=1), 1e-9) - 1.0, 0.0, 1.0)
+
+    return cx, cy, (peakedness(cols) + peakedness(rows)) / 2
+
+# 4. TRAJECTORY
+def smooth_track(
+    cx: np.ndarray,
+    cy: np.ndarray,
+    confidence: np.ndarray,
+    cut_indices: List[int],
+    fps: float,
+    smoothing_s: float
+) -> RoiTrack:
+    """Confidence-weighted Gaussian smoothing of the centers, independently per shot.
+
+    Low-confidence frames barely pull the window, so it glides instead of hunting.
+    The smoothed path then goes through a dead zone: the window stays put while the
+    subject moves around inside it and is only dragged along once it leaves, so most
+    shots render with a locked-off crop. At cuts the window jumps.
+    """
+    n = len(cx)
+    sigma = max(smoothing_s * fps, 0.5)
+    radius = int(3 * sigma)
+    kernel = np.exp(-0.5 * (np.arange(-radius, radius + 1) / sigma) ** 2)
+    weights = confidence + 0.05
+
+    def smooth(values: np.ndarray, w: np.ndarray) -> np.ndarray:
+        # Normalized convolution: edges are averaged over the samples that exist
+        norm = np.convolve(w, kernel, mode="full")[radius:radius + len(w)]
+        smoothed = np.convolve(w * values, kernel, mode="full")[radius:radius + len(w)] / norm
+
+        # Sequential by nature, but only a few samples per second
+        held = np.empty_like(smoothed)
+        position = float(np.average(smoothed[:max(1, int(fps))], weights=w[:max(1, int(fps))]))
+        for i, target in enumerate(smoothed):
+            if abs(target - position) > DEAD_ZONE:
+                position = target - np.copysign(DEAD_ZONE, target - position)
+            held[i] = position
+        return held
+
+    t, xs, ys = [], [], []
+    bounds = [0, *sorted(i for i in cut_indices if 0 < i < n), n]
+    for a, b in zip(bounds[:-1], bounds[1:]):
+        if b <= a:
+            continue
+        sx, sy = smooth(cx[a:b], weights[a:b]), smooth(cy[a:b], weights[a:b])
+        times = list(np.arange(a, b) / fps)
+        # Hold each shot's position right up to the cut (half-way between samples)
+        if a > 0:
+            times[0] = (a - 0.5) / fps + 0.001
+        if b < n:
+            times.append((b - 0.5) / fps)
+            sx, sy = np.append(sx, sx[-1]), np.append(sy, sy[-1])
+        t += [round(float(v), 3) for v in times]
+        xs += [round(float(v), 4) for v in sx]
+        ys += [round(float(v), 4) for v in sy]
+
+    return RoiTrack(t=t, cx=xs, cy=ys)
+
+# 5. ENTRY POINT
+_cache: Optional[DiskLRUCache] = None
+
+def roi_cache() -> DiskLRUCache:
+    """Per-process handle on the ROI track cache (render workers build their own)."""
+    global _cache
+    if _cache is None:
+        _cache = DiskLRUCache(str(resolve_path(settings.smart_crop_cache_dir)), settings.smart_crop_cache_max_bytes)
+    return _cache
+
+def roi_track(
+    source_path: str,
+    start_s: float,
+    end_s: float,
+    source_size: Tuple[int, int],
+    source_hash: Optional[str] = None
+) -> RoiTrack:
+    """ROI track of one clip range. With a source hash, tracks are cached across re-renders."""
+    fps, width = settings.smart_crop_fps, settings.smart_crop_width
+    key = canonical_hash(source_hash, round(start_s, 3), round(end_s, 3), crop_signature("smart")) if source_hash else None
+    if key:
+        cached = roi_cache().get(key)
+        if cached is not None:
+            return RoiTrack(**cached)
+
+    # Imported here: preanalysis depends on video_proc, which depends on this module
+    from src.services.preanalysis import detect_cuts, frame_signals
+
+    t0 = time.perf_counter()
+    frames = decode_clip_frames(source_path, start_s, end_s, source_size, fps, width)
+    if len(frames) == 0:
+        return RoiTrack(t=[0.0], cx=[0.5], cy=[0.5])
+
+    _, hist_diff = frame_signals(frames)
+    cuts = detect_cuts(hist_diff, fps, settings.scene_cut_threshold, settings.min_scene_seconds)
+    cx, cy, confidence = roi_centers(saliency_maps(frames))
+    track = smooth_track(cx, cy, confidence, [round(c * fps) for c in cuts], fps, settings.smart_crop_smoothing)
+
+    log.info("ROI track computed", frames=len(frames), cuts=len(cuts), seconds=round(time.perf_counter() - t0, 3))
+    if key:
+        roi_cache().set(key, track.model_dump())
+    return track
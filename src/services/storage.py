@@ -0,0 +1,382 @@
+import os
+import time
+import shutil
+import hashlib
+import threading
+from collections import Counter
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional, Tuple
+from pydantic import BaseModel
+from src.core.telemetry import (
+    DISK_FREE_BYTES, STORAGE_BYTES, STORAGE_FILES, STORAGE_FREED_BYTES, STORAGE_SWEEP_SECONDS, get_logger
+)
+from src.services.job_store import FINISHED_STATUSES, worker_alive
+
+# Storage classes, in the order bytes shared through hardlinks are attributed to them
+STORAGE_CLASSES = ("source", "renders", "platform")
+
+# Smaller files (manifests) are never hashed for dedup
+DEDUP_MIN_BYTES = 1024 * 1024
+
+log = get_logger("STORAGE")
+
+# 1. DATA MODELS
+class StoredFile(BaseModel):
+    """One managed file, as seen by a sweep."""
+    path: str
+    job_id: str
+    storage_class: str
+    size: int
+    mtime: float
+    inode: Tuple[int, int]
+    links: int
+
+class SweepReport(BaseModel):
+    """Outcome of one sweep. Usage counts every hardlinked file once; `cache_bytes` holds
+    what the data/ caches add on top (bounded by their own caps, not by the quota)."""
+    usage_bytes: Dict[str, int]
+    files: Dict[str, int]
+    cache_bytes: Dict[str, int] = {}
+    expired_files: int = 0
+    evicted_jobs: List[str] = []
+    freed_bytes: int = 0
+    deduped_bytes: int = 0
+    protected_jobs: int = 0
+    seconds: float = 0.0
+
+# 2. MANAGER
+class StorageManager:
+    """Retention, quota eviction and dedup for the files jobs leave on disk.
+
+    Three classes are managed: uploaded sources in temp/ (`{job_id}_{filename}`),
+    rendered clips in every output root (`{root}/{job_id}/*`) and platform copies
+    (`{root}/{job_id}/{platform}/*`). Each class has its own retention; above the quota,
+    whole jobs are evicted least recently used first. Identical files are hardlinked to
+    one copy.
+
+    Files of running jobs are never touched: workflows hold a lease in this process,
+    and jobs the job store reports as unfinished (possibly in another worker) are
+    skipped as well, unless their worker is gone or they have not been updated for
+    `stale_seconds`. Upload sessions idle for longer than the source retention count
+    as abandoned.
+
+    The content-addressed caches (`caches`: name -> (directory, max_bytes)) evict on
+    their own caps; sweeps only report their usage, so disk use is bounded by the quota
+    plus the sum of those caps.
+    """
+
+    def __init__(
+        self,
+        temp_dir: str,
+        output_roots: List[str],
+        retention_seconds: Dict[str, float],
+        quota_bytes: int = 0,
+        dedup: bool = True,
+        job_lookup: Optional[Callable[[str], Optional[dict]]] = None,
+        stale_seconds: float = 0,
+        caches: Optional[Dict[str, Tuple[str, int]]] = None
+    ):
+        self.temp_dir = temp_dir
+        self.output_roots = output_roots
+        self.retention_seconds = retention_seconds
+        self.quota_bytes = quota_bytes
+        self.dedup = dedup
+        self.job_lookup = job_lookup
+        self.stale_seconds = stale_seconds
+        self.caches = caches or {}
+        self.last_report: Optional[SweepReport] = None
+        self._leases: Counter = Counter()
+        # Held while leases change and while a job's files are deleted or relinked
+        self._lock = threading.Lock()
+        self._sweep_lock = threading.Lock()
+        self._digests: Dict[tuple, str] = {}
+
+    # --- LEASES ---
+
+    def acquire(self, *job_ids: Optional[str]):
+        """Protects the files of these jobs until release(). Waits for a deletion in progress."""
+        with self._lock:
+            self._leases.update(j for j in job_ids if j)
+
+    def release(self, *job_ids: Optional[str]):
+        with self._lock:
+            self._leases.subtract(j for j in job_ids if j)
+            self._leases += Counter()
+
+    @contextmanager
+    def lease(self, *job_ids: Optional[str]):
+        self.acquire(*job_ids)
+        try:
+            yield
+        finally:
+            self.release(*job_ids)
+
+    def _protected(self, job_id: str, last_modified: float, now: float) -> bool:
+        if self._leases[job_id]:
+            return True
+        job = self.job_lookup(job_id) if self.job_lookup else None
+        status = job.get("status") if job else None
+        if status == "UPLOADING":
+            idle_limit = self.retention_seconds.get("source", 0)
+            return not idle_limit or now - last_modified <= idle_limit
+        if status is None or status in FINISHED_STATUSES:
+            return False
+        # Unfinished: running in a sibling worker, unless that worker is gone or the job stopped
+        # making progress (every stage transition updates it)
+        if not worker_alive(job.get("worker")):
+            return False
+        return not self.stale_seconds or now - job.get("updated_at", now) <= self.stale_seconds
+
+    # --- SCANNING ---
+
+    def scan(self) -> List[StoredFile]:
+        files = []
+
+        def add(entry: os.DirEntry, job_id: str, storage_class: str):
+            try:
+                st = entry.stat()
+            except FileNotFoundError:
+                return
+            files.append(StoredFile(
+                path=entry.path, job_id=job_id, storage_class=storage_class, size=st.st_size,
+                mtime=st.st_mtime, inode=(st.st_dev, st.st_ino), links=st.st_nlink
+            ))
+
+        if os.path.isdir(self.temp_dir):
+            for entry in os.scandir(self.temp_dir):
+                if entry.is_file() and "_" in entry.name:
+                    add(entry, entry.name.split("_", 1)[0], "source")
+
+        for root in self.output_roots:
+            if not os.path.isdir(root):
+                continue
+            for job in os.scandir(root):
+                if not job.is_dir():
+                    continue
+                for entry in os.scandir(job.path):
+                    if entry.is_file():
+                        add(entry, job.name, "renders")
+                    elif entry.is_dir():
+                        for copy in os.scandir(entry.path):
+                            if copy.is_file():
+                                add(copy, job.name, "platform")
+        return files
+
+    # --- SWEEP ---
+
+    def sweep(self) -> SweepReport:
+        """Applies retention, dedup and the quota once. Safe to call from any thread."""
+        with self._sweep_lock:
+            t0 = time.perf_counter()
+            now = time.time()
+            files = self.scan()
+
+            last_used: Dict[str, float] = {}
+            for f in files:
+                last_used[f.job_id] = max(last_used.get(f.job_id, 0.0), f.mtime)
+            protected = {job_id for job_id, mtime in last_used.items() if self._protected(job_id, mtime, now)}
+
+            # Bytes of an inode are released once every managed link to it is gone
+            remaining = Counter(f.inode for f in files)
+
+            # 1. Retention per class
+            expired = [
+                f for f in files
+                if f.job_id not in protected
+                and self.retention_seconds.get(f.storage_class, 0) > 0
+                and now - f.mtime > self.retention_seconds[f.storage_class]
+            ]
+            freed, removed = self._remove(expired, remaining, "retention")
+
+            # 2. Dedup (relinking changes inodes, so rescan afterwards)
+            deduped = 0
+            if self.dedup:
+                deduped = self._dedup([f for f in files if f.job_id not in protected and f.path not in removed])
+            if deduped or removed:
+                files = [f for f in self.scan() if f.path not in removed]
+                remaining = Counter(f.inode for f in files)
+
+            # 3. Quota: whole jobs, least recently used first
+            evicted = []
+            sizes = {f.inode: f.size for f in files}
+            usage = sum(sizes.values())
+            if self.quota_bytes and usage > self.quota_bytes:
+                by_job: Dict[str, List[StoredFile]] = {}
+                for f in files:
+                    by_job.setdefault(f.job_id, []).append(f)
+                for job_id in sorted(by_job, key=lambda j: last_used.get(j, 0.0)):
+                    if usage <= self.quota_bytes:
+                        break
+                    if job_id in protected:
+                        continue
+                    job_freed, job_removed = self._remove(by_job[job_id], remaining, "quota")
+                    removed |= job_removed
+                    usage -= job_freed
+                    freed += job_freed
+                    evicted.append(job_id)
+                if usage > self.quota_bytes:
+                    log.warning("Storage quota exceeded by running jobs", usage_bytes=usage, quota_bytes=self.quota_bytes)
+
+            report = self._report(remaining, [f for f in files if f.path not in removed])
+            report.expired_files = len(expired)
+            report.evicted_jobs = evicted
+            report.freed_bytes = freed
+            report.deduped_bytes = deduped
+            report.protected_jobs = len(protected)
+            report.seconds = round(time.perf_counter() - t0, 3)
+            STORAGE_SWEEP_SECONDS.observe(report.seconds)
+
+            self.last_report = report
+            if expired or evicted or deduped:
+                log.info(
+                    "Storage swept", expired_files=len(expired), evicted_jobs=len(evicted),
+                    freed_bytes=freed, deduped_bytes=deduped, seconds=report.seconds
+                )
+            return report
+
+    def _remove(self, files: List[StoredFile], remaining: Counter, reason: str) -> Tuple[int, set]:
+        """Deletes files job by job (re-checking leases). Returns (bytes released, removed paths)."""
+        by_job: Dict[str, List[StoredFile]] = {}
+        for f in files:
+            by_job.setdefault(f.job_id, []).append(f)
+
+        freed, removed = 0, set()
+        for job_id, job_files in by_job.items():
+            with self._lock:
+                # A workflow may have started on this job since the scan
+                if self._leases[job_id]:
+                    continue
+                for f in job_files:
+                    try:
+                        os.remove(f.path)
+                    except FileNotFoundError:
+                        continue
+                    removed.add(f.path)
+                    remaining[f.inode] -= 1
+                    if remaining[f.inode] <= 0:
+                        freed += f.size
+                self._prune_dirs(job_id)
+
+        if freed:
+            STORAGE_FREED_BYTES.inc(freed, reason=reason)
+        return freed, removed
+
+    def _prune_dirs(self, job_id: str):
+        """Removes the job's folders in the output roots once nothing but empty folders is left."""
+        for root in self.output_roots:
+            job_dir = os.path.join(root, job_id)
+            if not os.path.isdir(job_dir):
+                continue
+            for current, dirs, names in os.walk(job_dir, topdown=False):
+                if not names and not os.listdir(current):
+                    os.rmdir(current)
+            # manifest.json alone describes files that are gone
+            if os.path.isdir(job_dir) and os.listdir(job_dir) == ["manifest.json"]:
+                shutil.rmtree(job_dir, ignore_errors=True)
+
+    def _digest(self, f: StoredFile) -> str:
+        key = (*f.inode, f.size, f.mtime)
+        digest = self._digests.get(key)
+        if digest is None:
+            h = hashlib.sha256()
+            with open(f.path, "rb") as stream:
+                while chunk := stream.read(1024 * 1024):
+                    h.update(chunk)
+            digest = self._digests[key] = h.hexdigest()
+        return digest
+
+    def _dedup(self, files: List[StoredFile]) -> int:
+        """Hardlinks files with identical content (same size, then SHA-256) to one inode.
+
+        Returns the bytes saved. Only inodes on the same device can be merged; digests are
+        remembered per inode and mtime, so unchanged files are hashed once.
+        """
+        paths: Dict[tuple, List[StoredFile]] = {}
+        for f in files:
+            if f.size >= DEDUP_MIN_BYTES:
+                paths.setdefault(f.inode, []).append(f)
+
+        same_size: Dict[tuple, List[tuple]] = {}
+        for inode, group in paths.items():
+            same_size.setdefault((inode[0], group[0].size), []).append(inode)
+
+        saved = 0
+        for (_, size), inodes in same_size.items():
+            if len(inodes) < 2:
+                continue
+            same_content: Dict[str, List[tuple]] = {}
+            for inode in inodes:
+                try:
+                    same_content.setdefault(self._digest(paths[inode][0]), []).append(inode)
+                except FileNotFoundError:
+                    continue
+
+            for group in same_content.values():
+                if len(group) < 2:
+                    continue
+                # Keep the inode with the most links, so the fewest paths are relinked
+                group.sort(key=lambda i: (-paths[i][0].links, paths[i][0].mtime))
+                keep = paths[group[0]][0].path
+                for inode in group[1:]:
+                    relinked = [f for f in paths[inode] if self._relink(keep, f)]
+                    # Links outside the managed folders (e.g. the rendition cache) keep the old inode alive
+                    if relinked and len(relinked) == paths[inode][0].links:
+                        saved += size
+
+        self._digests = {k: v for k, v in self._digests.items() if (k[0], k[1]) in paths}
+        if saved:
+            STORAGE_FREED_BYTES.inc(saved, reason="dedup")
+        return saved
+
+    def _relink(self, keep: str, f: StoredFile) -> bool:
+        with self._lock:
+            if self._leases[f.job_id]:
+                return False
+            tmp_path = f"{f.path}.{os.getpid()}.dedup"
+            try:
+                os.link(keep, tmp_path)
+                os.replace(tmp_path, f.path)
+                return True
+            except OSError as e:
+                log.warning("Dedup relink failed", path=f.path, error=str(e))
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+                return False
+
+    def _report(self, remaining: Counter, files: List[StoredFile]) -> SweepReport:
+        """Usage per class (an inode counts once, in the first class holding it) and disk gauges."""
+        usage = {c: 0 for c in STORAGE_CLASSES}
+        counts = {c: 0 for c in STORAGE_CLASSES}
+        seen = set()
+        for f in sorted(files, key=lambda f: STORAGE_CLASSES.index(f.storage_class)):
+            counts[f.storage_class] += 1
+            if f.inode not in seen and remaining[f.inode] > 0:
+                seen.add(f.inode)
+                usage[f.storage_class] += f.size
+
+        for storage_class in STORAGE_CLASSES:
+            STORAGE_BYTES.set(usage[storage_class], storage_class=storage_class)
+            STORAGE_FILES.set(counts[storage_class], storage_class=storage_class)
+
+        # Cache entries hardlinked into job folders (renditions) are already counted above
+        cache_bytes = {}
+        for name, (directory, _) in self.caches.items():
+            cache_bytes[name] = 0
+            if not os.path.isdir(directory):
+                continue
+            for entry in os.scandir(directory):
+                try:
+                    st = entry.stat()
+                except FileNotFoundError:
+                    continue
+                inode = (st.st_dev, st.st_ino)
+                if entry.is_file() and inode not in seen:
+                    seen.add(inode)
+                    cache_bytes[name] += st.st_size
+            STORAGE_BYTES.set(cache_bytes[name], storage_class=f"cache:{name}")
+
+        for root in [self.temp_dir, *self.output_roots, *(d for d, _ in self.caches.values())]:
+            if os.path.isdir(root):
+                DISK_FREE_BYTES.set(shutil.disk_usage(root).free, root=root)
+
+        return SweepReport(usage_bytes=usage, files=counts, cache_bytes=cache_bytes)
@@ -1,102 +1,706 @@
 import os
-from moviepy.video.io.VideoFileClip import VideoFileClip
+import re
+import bisect
+import tempfile
+import subprocess
+import time
+import multiprocessing
+from functools import lru_cache
+from concurrent.futures import Executor, ProcessPoolExecutor, FIRST_COMPLETED, wait
+from typing import Callable, Dict, List, Optional, Tuple
+import numpy as np
+from pydantic import BaseModel
+from imageio_ffmpeg import get_ffmpeg_exe
+from src.core.config import settings
+from src.core.telemetry import BYTES_TOTAL, CLIP_RENDER_FPS, CLIP_RENDER_SECONDS, get_logger
+from src.services.renditions import (
+    RENDER_VERSION, RenditionProfile, link_or_copy, primary_profile, rendition_cache, rendition_key, rendition_profiles
+)
+from src.services.response_cache import canonical_hash
+from src.services.smart_crop import RoiTrack, crop_signature, roi_track
+
+log = get_logger("VIDEO")
+
+# Audio codecs the .mp4 muxer takes as-is; anything else the upload accepts (pcm, vorbis,
+# opus from mkv/avi/ts) is re-encoded to AAC even in fast mode
+MP4_AUDIO_CODECS = ("aac", "mp3")
+
+# 1. DATA MODELS
+class RenditionTarget(BaseModel):
+    """One encoder output of a clip; `links` get the same file once it is encoded."""
+    profile: RenditionProfile
+    path: str
+    links: List[str] = []
+    cache_key: Optional[str] = None
+
+class ClipPlan(BaseModel):
+    """Render instructions for a single clip, resolved before any decoding starts.
+
+    `outputs` holds only the encodes still to do; renditions found in the cache are
+    linked into place during planning. `renditions` maps platform -> URL (ladder only).
+    `crop_mode` "smart" moves the crop window along the clip's ROI track, which is
+    cached per `source_hash`. `signature` identifies the rendered files, so a job derived
+    from this one can link them instead of rendering again. `copy_audio` stream-copies the
+    source audio (fast mode, MP4-compatible codec only).
+    """
+    index: int
+    start_s: float
+    end_s: float
+    file_name: str
+    target_path: str
+    url: str
+    hook: str
+    extract_mode: str = "exact"
+    copy_audio: bool = False
+    crop_mode: str = "center"
+    source_hash: Optional[str] = None
+    signature: Optional[str] = None
+    outputs: List[RenditionTarget] = []
+    renditions: Dict[str, str] = {}
 
 def timestamp_to_seconds(ts: str) -> float:
-    """Converts MM:SS format to seconds."""
+    """Converts MM:SS format (or MM:SS.ss after scene-cut snapping) to seconds."""
     try:
         parts = ts.split(':')
-        return float(int(parts[0]) * 60 + int(parts[1]))
+        return float(int(parts[0]) * 60 + float(parts[1]))
     except:
         return 0.0
 
-def process_video_segments(source_path: str, clips_data: list, job_id: str, output_root: str = None):
-    """Cuts clips and saves them in public folder."""
+def seconds_to_timestamp(seconds: float) -> str:
+    """Inverse of timestamp_to_seconds; keeps fractions only when they matter."""
+    minutes, rest = divmod(max(seconds, 0.0), 60)
+    if abs(rest - round(rest)) < 0.01:
+        minutes, rest = divmod(round(max(seconds, 0.0)), 60)
+        return f"{int(minutes):02d}:{int(rest):02d}"
+    return f"{int(minutes):02d}:{rest:05.2f}"
+
+def probe_source(source_path: str) -> Tuple[float, Tuple[int, int]]:
+    """Reads container duration and frame size from the header without opening a decoder."""
+    # MoviePy (and the IPython it pulls in) is only imported when a video is actually probed
+    from moviepy.video.io.ffmpeg_reader import ffmpeg_parse_infos
+    infos = ffmpeg_parse_infos(source_path)
+    return float(infos["duration"]), tuple(infos["video_size"])
+
+def probe_keyframes(source_path: str) -> List[float]:
+    """Lists video keyframe timestamps. Only keyframes are decoded (skip_frame nokey)."""
+    proc = subprocess.run(
+        [get_ffmpeg_exe(), "-hide_banner", "-nostats", "-skip_frame", "nokey",
+         "-i", source_path, "-map", "0:v:0", "-vf", "showinfo", "-f", "null", "-"],
+        capture_output=True, text=True
+    )
+    return sorted(float(t) for t in re.findall(r"pts_time:\s*([0-9.]+)", proc.stderr))
+
+def probe_audio_codec(source_path: str) -> Optional[str]:
+    """Codec of the first audio stream, read from the header; None without audio."""
+    proc = subprocess.run([get_ffmpeg_exe(), "-hide_banner", "-i", source_path], capture_output=True, text=True)
+    match = re.search(r"Stream #\S+.*?: Audio: (\w+)", proc.stderr)
+    return match.group(1) if match else None
+
+def snap_to_keyframes(start_s: float, end_s: float, keyframes: List[float]) -> tuple:
+    """Widens a cut outward to the surrounding keyframes so decoding starts on a clean GOP."""
+    if not keyframes:
+        return start_s, end_s
+
+    i = bisect.bisect_right(keyframes, start_s) - 1
+    snapped_start = keyframes[max(i, 0)]
+
+    j = bisect.bisect_left(keyframes, end_s)
+    snapped_end = keyframes[j] if j < len(keyframes) else end_s
+
+    return snapped_start, snapped_end
+
+def resolve_workers(clip_count: int, max_workers: Optional[int] = None) -> int:
+    """One worker per core (or RENDER_WORKERS), never more than there are clips."""
+    workers = max_workers or settings.render_workers or os.cpu_count() or 1
+    return max(1, min(workers, clip_count))
+
+# 2. PLANNING
+def plan_clips(
+    clips_data: list,
+    duration: float,
+    job_id: str,
+    output_base: str,
+    extract_mode: str = "exact",
+    keyframes: Optional[List[float]] = None,
+    crop_mode: str = "center",
+    source_hash: Optional[str] = None,
+    copy_audio: bool = False
+) -> List[ClipPlan]:
+    """Applies timestamp parsing, keyframe snapping (fast mode) and safety guards to every clip up front."""
+    plans = []
+
+    for i, clip in enumerate(clips_data, 1):
+        start_s = timestamp_to_seconds(clip['start'])
+        end_s = timestamp_to_seconds(clip['end'])
+
+        if extract_mode == "fast":
+            start_s, end_s = snap_to_keyframes(start_s, end_s, keyframes or [])
+
+        # SAFETY: We don't cut beyond video duration
+        end_s = min(end_s, duration)
+
+        # Safety Guard: Max 90 seconds per clip
+        if (end_s - start_s) > 90:
+            log.warning("Clip too long, trimming to 60s", clip=i, seconds=end_s - start_s)
+            end_s = start_s + 60
+
+        if start_s >= end_s:
+            log.warning("Segment invalid (start >= end), skipping", clip=i)
+            continue
+
+        file_name = f"short_{i}.mp4"
+        target_path = os.path.join(output_base, file_name)
+        plans.append(ClipPlan(
+            index=i,
+            start_s=start_s,
+            end_s=end_s,
+            file_name=file_name,
+            target_path=target_path,
+            # Relative URL for Next.js
+            url=f"/output/{job_id}/{file_name}",
+            hook=clip.get('narrative_hook', 'No description'),
+            extract_mode=extract_mode,
+            copy_audio=copy_audio,
+            crop_mode=crop_mode,
+            source_hash=source_hash,
+            # Single 9:16 output at source resolution unless plan_renditions() replaces it
+            outputs=[RenditionTarget(
+                profile=RenditionProfile(preset="veryfast" if extract_mode == "fast" else "medium"),
+                path=target_path
+            )]
+        ))
+
+    return plans
+
+def plan_renditions(
+    plans: List[ClipPlan],
+    job_id: str,
+    output_base: str,
+    source_hash: Optional[str] = None,
+    profiles: Optional[Dict[str, RenditionProfile]] = None
+) -> int:
+    """Turns every plan into a rendition ladder: short_{i}_{platform}.mp4 per profile.
+
+    Platforms with identical profiles share one encode. With a source hash, renditions
+    already in the cache are linked instead of encoded. Returns the number of cache hits.
+    """
+    profiles = profiles or rendition_profiles()
+    primary = primary_profile(profiles)
+    cache = rendition_cache() if source_hash else None
+    brand = brand_signature()
+    hits = 0
+
+    for plan in plans:
+        groups: Dict[str, RenditionTarget] = {}
+        plan.renditions = {}
+        for name, profile in profiles.items():
+            file_name = f"short_{plan.index}_{name}.mp4"
+            path = os.path.join(output_base, file_name)
+            plan.renditions[name] = f"/output/{job_id}/{file_name}"
+            paths = [path, plan.target_path] if name == primary else [path]
+
+            key = rendition_key(
+                source_hash or "", plan.start_s, plan.end_s, plan.extract_mode, profile, brand, crop_signature(plan.crop_mode)
+            )
+            if key in groups:
+                groups[key].links += paths
+            else:
+                groups[key] = RenditionTarget(profile=profile, path=path, links=paths[1:], cache_key=key if cache else None)
+
+        plan.outputs = []
+        for target in groups.values():
+            if cache and cache.fetch(target.cache_key, target.path):
+                hits += 1
+                for link in target.links:
+                    link_or_copy(target.path, link)
+            else:
+                plan.outputs.append(target)
+
+    return hits
+
+def clip_signature(plan: ClipPlan, source_key: str, profiles: Optional[Dict[str, RenditionProfile]] = None) -> str:
+    """Everything that shapes a clip's files: (start, end, crop, branding), extraction and output formats."""
+    return canonical_hash(
+        source_key, round(plan.start_s, 3), round(plan.end_s, 3), plan.extract_mode, crop_signature(plan.crop_mode),
+        brand_signature(), {name: p.model_dump() for name, p in (profiles or {}).items()}, RENDER_VERSION
+    )
+
+def reuse_parent_clips(plans: List[ClipPlan], parent_base: str, parent_videos: List[dict]) -> int:
+    """Links the files of clips a parent job rendered with the same signature.
+
+    Clips are matched by signature, not index, so reordered clips are reused too; the
+    parent's short_{j}* files become short_{i}*. Plans whose files are all in place have
+    nothing left to encode. Returns the number of clips reused.
+    """
+    by_signature = {v["signature"]: v for v in parent_videos if v.get("signature")}
+    reused = 0
+
+    for plan in plans:
+        parent = by_signature.get(plan.signature)
+        if parent is None or not plan.outputs:
+            continue
+
+        parent_stem = os.path.splitext(os.path.basename(parent["url"]))[0]
+        own_stem = os.path.splitext(plan.file_name)[0]
+        pairs = []
+        for target in plan.outputs:
+            for path in [target.path, *target.links]:
+                name = os.path.basename(path)
+                pairs.append((os.path.join(parent_base, parent_stem + name[len(own_stem):]), path))
+
+        # The parent's folder may have been cleaned up since; render as usual then
+        if not all(os.path.exists(src) for src, _ in pairs):
+            continue
+        for src, dst in pairs:
+            link_or_copy(src, dst)
+        plan.outputs = []
+        reused += 1
+
+    return reused
+
+# 3. BRANDING & FILTER GRAPH
+LOGO_PATH = os.path.join(os.getcwd(), "web", "public", "logo.png")
+BRAND_CACHE_DIR = os.path.join(tempfile.gettempdir(), "omni_brand")
+
+def crop_size(w: int, h: int, ratio: Tuple[int, int] = (9, 16)) -> Tuple[int, int]:
+    """Largest centered crop with the given W:H ratio."""
+    target_ratio = ratio[0] / ratio[1]
+    new_h = h
+    new_w = int(h * target_ratio)
+
+    # Check if video is not already narrower than the target ratio
+    if new_w > w:
+        new_w = w
+        new_h = int(w / target_ratio)
+
+    return new_w, new_h
+
+def vertical_crop_size(w: int, h: int) -> Tuple[int, int]:
+    """Automatic cropping to 9:16 (Vertical video for Shorts/TikTok)."""
+    return crop_size(w, h, (9, 16))
+
+def output_size(crop_w: int, crop_h: int, height: Optional[int]) -> Tuple[int, int]:
+    """Scales a crop down to `height` (even dimensions); never upscales."""
+    if not height or height >= crop_h:
+        return crop_w, crop_h
+    out_h = height - height % 2
+    out_w = max(2, round(crop_w * out_h / crop_h / 2) * 2)
+    return out_w, out_h
+
+def brand_signature() -> str:
+    """Changes whenever the watermark does, so cached renditions follow the logo."""
+    return f"logo:{int(os.path.getmtime(LOGO_PATH))}" if os.path.exists(LOGO_PATH) else "drawbox"
+
+@lru_cache(maxsize=8)
+def prepare_brand_logo(height: int) -> Optional[str]:
+    """Resizes the logo and bakes in its 0.7 opacity once per process. Returns a PNG path."""
+    if not os.path.exists(LOGO_PATH):
+        return None
+
+    from PIL import Image
+
+    os.makedirs(BRAND_CACHE_DIR, exist_ok=True)
+    target = os.path.join(BRAND_CACHE_DIR, f"logo_{height}_{int(os.path.getmtime(LOGO_PATH))}.png")
+
+    if not os.path.exists(target):
+        with Image.open(LOGO_PATH) as img:
+            logo = img.convert("RGBA")
+            width = int(logo.width * height / logo.height)
+            logo = logo.resize((width, height), Image.Resampling.LANCZOS)
+            logo.putalpha(logo.getchannel("A").point(lambda a: int(a * 0.7)))
+            # Workers may race on the same asset, so write aside and rename atomically
+            tmp_path = f"{target}.{os.getpid()}.tmp"
+            logo.save(tmp_path, format="PNG")
+            os.replace(tmp_path, target)
+
+    return target
+
+# Rate at which a smart crop window may move (sendcmd updates per second)
+CROP_COMMAND_RATE = 25
+
+def crop_offsets(
+    track: RoiTrack,
+    src_w: int,
+    src_h: int,
+    crop_w: int,
+    crop_h: int,
+    times: np.ndarray
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Top-left corners (even, inside the frame) of a crop window centered on the ROI track."""
+    cx, cy = track.at(times)
+    x = np.clip(np.round(cx * src_w - crop_w / 2), 0, src_w - crop_w)
+    y = np.clip(np.round(cy * src_h - crop_h / 2), 0, src_h - crop_h)
+    return (x // 2 * 2).astype(int), (y // 2 * 2).astype(int)
+
+def crop_script(
+    track: RoiTrack,
+    src_w: int,
+    src_h: int,
+    profiles: List[RenditionProfile],
+    duration: float
+) -> Tuple[List[Tuple[int, int]], str]:
+    """Initial crop offsets per output plus a sendcmd script moving crop@c{k} along the track.
+
+    Commands are only emitted when an offset actually changes, so locked-off shots
+    cost nothing at render time.
+    """
+    times = np.arange(0.0, max(duration, 0.0) + 1 / CROP_COMMAND_RATE, 1 / CROP_COMMAND_RATE)
+    paths = [crop_offsets(track, src_w, src_h, *crop_size(src_w, src_h, p.ratio()), times) for p in profiles]
+
+    lines = []
+    for i in range(1, len(times)):
+        commands = []
+        for k, (xs, ys) in enumerate(paths):
+            if xs[i] != xs[i - 1]:
+                commands.append(f"crop@c{k} x {xs[i]}")
+            if ys[i] != ys[i - 1]:
+                commands.append(f"crop@c{k} y {ys[i]}")
+        if commands:
+            lines.append(f"{times[i]:.3f} {', '.join(commands)};")
+
+    return [(int(xs[0]), int(ys[0])) for xs, ys in paths], "\n".join(lines)
+
+def _filter_path(path: str) -> str:
+    """Escapes a file path for use as a filter option value."""
+    return path.replace("\\", "/").replace(":", "\\:").replace("'", "\\'")
+
+def build_filter_graph(
+    src_w: int,
+    src_h: int,
+    outputs: List[Tuple[RenditionProfile, Optional[int]]],
+    branding: bool = True,
+    offsets: Optional[List[Tuple[int, int]]] = None,
+    crop_script_path: Optional[str] = None
+) -> str:
+    """Crop + scale + watermark for every output of one decode, as one FFmpeg filter graph.
+
+    Input 0 is the source; each output is (profile, input index of its logo or None).
+    The decoded frames are split once and output k is labelled [vk]. Crops are centered
+    unless `offsets` gives their top-left corners; a sendcmd script at `crop_script_path`
+    then moves crop@c{k} over time (smart crop).
+    """
+    chains = []
+    source = "[0:v]"
+    if crop_script_path:
+        chains.append(f"[0:v]sendcmd=f={_filter_path(crop_script_path)}[sc]")
+        source = "[sc]"
+
+    heads = [f"[s{k}]" for k in range(len(outputs))] if len(outputs) > 1 else [source]
+    if len(outputs) > 1:
+        chains.append(f"{source}split={len(outputs)}{''.join(heads)}")
+
+    for k, (profile, logo_input) in enumerate(outputs):
+        crop_w, crop_h = crop_size(src_w, src_h, profile.ratio())
+        out_w, out_h = output_size(crop_w, crop_h, profile.height)
+        x, y = offsets[k] if offsets else ((src_w - crop_w) // 2, (src_h - crop_h) // 2)
+
+        # libx264 only accepts 4:2:0 with even dimensions
+        pix_fmt = "yuv420p" if out_w % 2 == 0 and out_h % 2 == 0 else "yuv444p"
+        name = f"crop@c{k}" if crop_script_path else "crop"
+        graph = f"{heads[k]}{name}={crop_w}:{crop_h}:{x}:{y}"
+        if (out_w, out_h) != (crop_w, crop_h):
+            graph += f",scale={out_w}:{out_h}"
+
+        if branding and logo_input is not None:
+            # Logo: 10% of height, 0.7 opacity (baked into the asset), bottom-center
+            chains.append(f"{graph}[b{k}]")
+            chains.append(f"[b{k}][{logo_input}:v]overlay=x=(W-w)/2:y=H-h:shortest=1,format={pix_fmt}[v{k}]")
+        elif branding:
+            # Fallback to a thinner, more subtle line if logo missing
+            chains.append(f"{graph},drawbox=x=0:y=ih-2:w=iw:h=2:color=white@0.3:t=fill,format={pix_fmt}[v{k}]")
+        else:
+            chains.append(f"{graph},format={pix_fmt}[v{k}]")
+
+    return ";".join(chains)
+
+def encoder_args(profile: RenditionProfile, fast: bool, threads: Optional[int], copy_audio: bool = False) -> list:
+    args = ["-c:v", "libx264", "-preset", "veryfast" if fast else profile.preset]
+    if profile.crf is not None:
+        args += ["-crf", str(profile.crf)]
+    if profile.maxrate:
+        args += ["-maxrate", profile.maxrate, "-bufsize", profile.bufsize or profile.maxrate]
+
+    # Fast mode starts on a keyframe, so audio packets can be stream-copied if .mp4 takes the codec
+    if copy_audio:
+        args += ["-c:a", "copy"]
+    else:
+        args += ["-c:a", "aac"] + (["-b:a", profile.audio_bitrate] if profile.audio_bitrate else [])
+
+    if threads:
+        args += ["-threads", str(threads)]
+    return args
+
+# 4. RENDERING
+def render_clip(
+    source_path: str,
+    plan: ClipPlan,
+    source_size: Tuple[int, int],
+    threads: Optional[int] = None,
+    progress=None
+) -> dict:
+    """Renders every pending output of a planned clip in a single FFmpeg process.
+
+    The clip is sought and decoded once; the frames fan out to one crop/scale/watermark
+    chain and one encoder per output. If `progress` is given (anything with .put(), e.g.
+    a Manager queue), render percentage events are reported to it as FFmpeg advances.
+    Render stats travel back under "stats" and are recorded (and removed) by the parent,
+    see _record_render.
+    """
+    result = {"url": plan.url, "hook": plan.hook}
+    if plan.renditions:
+        result["renditions"] = plan.renditions
+    if plan.signature:
+        result["signature"] = plan.signature
+    if not plan.outputs:
+        return result
+
+    log.info("Rendering fragment", clip=plan.index, outputs=len(plan.outputs))
+
+    src_w, src_h = source_size
+    fast = plan.extract_mode == "fast"
+
+    branding = True
+    logos = [None] * len(plan.outputs)
+    try:
+        logos = [
+            prepare_brand_logo(int(output_size(*crop_size(src_w, src_h, t.profile.ratio()), t.profile.height)[1] * 0.1))
+            for t in plan.outputs
+        ]
+    except Exception as e:
+        log.warning("Error applying branding, rendering clean vertical", error=str(e))
+        branding = False
+
+    # Smart crop: the window follows the clip's ROI track; any failure falls back to a centered crop
+    offsets, script_path = None, None
+    if plan.crop_mode == "smart":
+        try:
+            track = roi_track(source_path, plan.start_s, plan.end_s, source_size, plan.source_hash)
+            offsets, script = crop_script(
+                track, src_w, src_h, [t.profile for t in plan.outputs], plan.end_s - plan.start_s
+            )
+            if script:
+                fd, script_path = tempfile.mkstemp(prefix="omni_crop_", suffix=".cmd")
+                with os.fdopen(fd, "w") as f:
+                    f.write(script)
+        except Exception as e:
+            log.warning("Smart crop failed, rendering centered", clip=plan.index, error=str(e))
+            offsets, script_path = None, None
+
+    cmd = [get_ffmpeg_exe(), "-y", "-loglevel", "error", "-progress", "pipe:1", "-nostats",
+           "-ss", f"{plan.start_s:.3f}", "-t", f"{plan.end_s - plan.start_s:.3f}", "-i", source_path]
+
+    # One looped logo input per output (input 0 is the source)
+    graph_outputs = []
+    for target, logo_path in zip(plan.outputs, logos):
+        logo_input = None
+        if logo_path:
+            cmd += ["-loop", "1", "-i", logo_path]
+            logo_input = sum(1 for _, i in graph_outputs if i is not None) + 1
+        graph_outputs.append((target.profile, logo_input))
+    cmd += ["-filter_complex", build_filter_graph(src_w, src_h, graph_outputs, branding, offsets, script_path)]
+
+    # Encoder threads are split between the outputs sharing this process
+    encoder_threads = max(1, threads // len(plan.outputs)) if threads else None
+    for k, target in enumerate(plan.outputs):
+        cmd += ["-map", f"[v{k}]", "-map", "0:a?", *encoder_args(target.profile, fast, encoder_threads, plan.copy_audio), target.path]
+
+    t0 = time.perf_counter()
+    try:
+        frames = run_ffmpeg_with_progress(cmd, plan.end_s - plan.start_s, plan.index, progress)
+    finally:
+        if script_path:
+            os.remove(script_path)
+    seconds = time.perf_counter() - t0
+
+    cache = None
+    for target in plan.outputs:
+        for link in target.links:
+            link_or_copy(target.path, link)
+        if target.cache_key:
+            cache = cache or rendition_cache()
+            cache.store(target.cache_key, target.path)
+
+    result["stats"] = {
+        "mode": plan.extract_mode,
+        "seconds": seconds,
+        "frames": frames,
+        "bytes": sum(os.path.getsize(target.path) for target in plan.outputs)
+    }
+    return result
+
+def _record_render(result: dict) -> dict:
+    """Moves a worker's render stats into the parent's metrics; returns the public result."""
+    stats = result.pop("stats", None)
+    if stats:
+        CLIP_RENDER_SECONDS.observe(stats["seconds"], mode=stats["mode"])
+        if stats["frames"] and stats["seconds"] > 0:
+            CLIP_RENDER_FPS.observe(stats["frames"] / stats["seconds"], mode=stats["mode"])
+        BYTES_TOTAL.inc(stats["bytes"], kind="rendered")
+    return result
+
+def run_ffmpeg_with_progress(cmd: list, duration: float, clip_index: int, progress=None) -> int:
+    """Runs FFmpeg with `-progress pipe:1`, forwards whole-percent render updates, returns frames encoded."""
+    proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+    last_percent = -1
+    frames = 0
+
+    for line in proc.stdout:
+        key, _, value = line.strip().partition("=")
+        if key == "frame" and value.isdigit():
+            frames = int(value)
+            continue
+        # out_time_us and (despite its name) out_time_ms are both in microseconds
+        if progress is None or key != "out_time_us" or not value.isdigit():
+            continue
+        percent = min(100, int(int(value) / 1e6 / max(duration, 0.001) * 100))
+        if percent > last_percent:
+            last_percent = percent
+            progress.put({"type": "render_progress", "clip": clip_index, "percent": percent})
+
+    stderr = proc.stderr.read()
+    if proc.wait() != 0:
+        raise subprocess.CalledProcessError(proc.returncode, cmd, stderr=stderr)
+    return frames
+
+def process_video_segments(
+    source_path: str,
+    clips_data: list,
+    job_id: str,
+    output_root: str = None,
+    max_workers: int = None,
+    executor: Executor = None,
+    on_event: Callable[[dict], None] = None,
+    source_hash: str = None,
+    parent_job_id: str = None,
+    parent_videos: list = None
+):
+    """Cuts clips and saves them in public folder.
+
+    All clips are planned first, then rendered concurrently on a bounded process pool
+    (one worker per core by default). max_workers=1 keeps the serial in-process path.
+    Passing an executor renders on that shared pool instead of a private one.
+    `on_event` receives render_progress and clip_ready events from the calling thread.
+    With RENDITION_LADDER each clip gets one rendition per platform profile; `source_hash`
+    lets renditions (and smart-crop ROI tracks) computed for the same content be reused.
+    A job derived from `parent_job_id` links the parent's files for every clip whose
+    signature is among `parent_videos` (the parent's result) and renders only the rest.
+    """
     if output_root is None:
         output_root = os.path.join("web", "public", "output")
-        
+
     output_base = os.path.join(output_root, job_id)
     os.makedirs(output_base, exist_ok=True)
-    
-    generated_files = []
-    
-    print(f"LOG: Starting editing for Job: {job_id}")
-    
-    with VideoFileClip(source_path) as video:
-        for i, clip in enumerate(clips_data, 1):
-            start_s = timestamp_to_seconds(clip['start'])
-            end_s = timestamp_to_seconds(clip['end'])
-            
-            file_name = f"short_{i}.mp4"
-            target_path = os.path.join(output_base, file_name)
-            
-            print(f"LOG: Rendering fragment {i}...")
-            
-            # SAFETY: We don't cut beyond video duration
-            end_s = min(end_s, video.duration)
-
-            # Safety Guard: Max 90 seconds per clip
-            if (end_s - start_s) > 90:
-                print(f"⚠️ WARNING: Clip {i} is too long ({end_s - start_s}s). Trimming to 60s.")
-                end_s = start_s + 60
-
-            if start_s >= end_s:
-                print(f"WARN: Segment {i} is invalid (start >= end). Skipping.")
-                continue
-                
-            # 1. Fragment extraction
-            source_clip = video.subclipped(start_s, end_s)
-            
-            # 2. Automatic cropping to 9:16 (Vertical video for Shorts/TikTok)
-            w, h = source_clip.size
-            target_ratio = 9/16
-            new_h = h
-            new_w = int(h * target_ratio)
-            
-            # Check if video is not already vertical or narrower than 9:16
-            if new_w > w:
-                new_w = w
-                new_h = int(w / target_ratio)
-                
-            final_clip = source_clip.cropped(
-                x_center=w/2, 
-                y_center=h/2, 
-                width=new_w, 
-                height=new_h
+
+    log.info("Starting editing", job_id=job_id)
+
+    extract_mode = settings.video_extract_mode
+    keyframes = probe_keyframes(source_path) if extract_mode == "fast" else None
+    copy_audio = extract_mode == "fast" and probe_audio_codec(source_path) in MP4_AUDIO_CODECS
+    duration, source_size = probe_source(source_path)
+
+    plans = plan_clips(
+        clips_data,
+        duration,
+        job_id,
+        output_base,
+        extract_mode=extract_mode,
+        keyframes=keyframes,
+        crop_mode=settings.crop_mode,
+        source_hash=source_hash,
+        copy_audio=copy_audio
+    )
+    if not plans:
+        return []
+
+    profiles = rendition_profiles() if settings.rendition_ladder else None
+    for plan in plans:
+        plan.signature = clip_signature(plan, source_hash or source_path, profiles)
+
+    if settings.rendition_ladder:
+        hits = plan_renditions(plans, job_id, output_base, source_hash, profiles)
+        if hits:
+            log.info("Renditions reused from cache", job_id=job_id, renditions=hits)
+
+    if parent_job_id and parent_videos:
+        reused = reuse_parent_clips(plans, os.path.join(output_root, parent_job_id), parent_videos)
+        log.info("Clips reused from parent job", job_id=job_id, parent_job_id=parent_job_id, clips=reused, of=len(plans))
+
+    workers = resolve_workers(sum(1 for plan in plans if plan.outputs) or 1, max_workers)
+
+    if workers == 1:
+        generated_files = []
+        for plan in plans:
+            result = _record_render(
+                render_clip(source_path, plan, source_size, progress=_CallbackQueue(on_event) if on_event else None)
             )
-            
-            # 3. Adding OPERATORS' FORGE branding Watermark
-            from moviepy.video.VideoClip import ImageClip
-            from moviepy.video.compositing.CompositeVideoClip import CompositeVideoClip
-            
-            logo_path = os.path.join(os.getcwd(), "web", "public", "logo.png")
-            try:
-                if os.path.exists(logo_path):
-                    # Branding with logo image
-                    brand_overlay = (ImageClip(logo_path)
-                                   .with_duration(final_clip.duration)
-                                   .resized(height=int(new_h * 0.1)) # 10% of height
-                                   .with_opacity(0.7)
-                                   .with_position(("center", "bottom")))
-                    output_clip = CompositeVideoClip([final_clip, brand_overlay])
-                else:
-                    # Fallback to a thinner, more subtle line if logo missing
-                    from moviepy.video.VideoClip import ColorClip
-                    brand_overlay = ColorClip(
-                        size=(new_w, 2), 
-                        color=(255, 255, 255) 
-                    ).with_duration(final_clip.duration).with_opacity(0.3).with_position(("center", "bottom"))
-                    output_clip = CompositeVideoClip([final_clip, brand_overlay])
-            except Exception as e:
-                print(f"WARN: Error applying branding: {e}. Rendering clean vertical.")
-                output_clip = final_clip
-            
-            # 4. Final render
-            output_clip.write_videofile(target_path, codec="libx264", audio_codec="aac", logger=None)
-            
-            # Relative URL for Next.js
-            generated_files.append({
-                "url": f"/output/{job_id}/{file_name}",
-                "hook": clip.get('narrative_hook', 'No description')
-            })
-            
-    return generated_files
\ No newline at end of file
+            _emit(on_event, {"type": "clip_ready", "clip": plan.index, **result})
+            generated_files.append(result)
+        return generated_files
+
+    # Split encoder threads across workers so the pool doesn't oversubscribe the CPU
+    threads = max(1, (os.cpu_count() or 1) // workers)
+    log.info("Rendering fragments", job_id=job_id, clips=len(plans), workers=workers)
+
+    if executor is not None:
+        return _render_on(executor, source_path, plans, source_size, threads, on_event)
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return _render_on(pool, source_path, plans, source_size, threads, on_event)
+
+class _CallbackQueue:
+    """Queue-like adapter so in-process renders report straight to a callback."""
+
+    def __init__(self, callback: Callable[[dict], None]):
+        self.callback = callback
+
+    def put(self, event: dict):
+        self.callback(event)
+
+def _emit(on_event: Optional[Callable[[dict], None]], event: dict):
+    if on_event:
+        on_event(event)
+
+_progress_manager = None
+
+def _progress_queue():
+    """Cross-process queue for worker progress (one Manager per process, started lazily)."""
+    global _progress_manager
+    if _progress_manager is None:
+        _progress_manager = multiprocessing.Manager()
+    return _progress_manager.Queue()
+
+def _render_on(
+    executor: Executor,
+    source_path: str,
+    plans: List[ClipPlan],
+    source_size: Tuple[int, int],
+    threads: int,
+    on_event: Callable[[dict], None] = None
+) -> list:
+    progress = _progress_queue() if on_event else None
+    futures = {
+        executor.submit(render_clip, source_path, plan, source_size, threads, progress): plan
+        for plan in plans if plan.outputs
+    }
+
+    # Fully cached clips are ready before anything is decoded
+    ready = {}
+    for plan in plans:
+        if not plan.outputs:
+            ready[plan.index] = render_clip(source_path, plan, source_size)
+            _emit(on_event, {"type": "clip_ready", "clip": plan.index, **ready[plan.index]})
+
+    # Drain worker progress and announce each clip as soon as it is finished
+    pending = set(futures)
+    while pending:
+        done, pending = wait(pending, timeout=0.25, return_when=FIRST_COMPLETED)
+        while progress is not None and not progress.empty():
+            _emit(on_event, progress.get_nowait())
+        for future in done:
+            if future.exception() is None:
+                result = _record_render(future.result())
+                _emit(on_event, {"type": "clip_ready", "clip": futures[future].index, **result})
+
+    # Results are collected in plan order to keep the generated_files order stable
+    rendered = {plan.index: future.result() for future, plan in futures.items()}
+    return [ready.get(plan.index) or rendered[plan.index] for plan in plans]
@@ -0,0 +1,26 @@
+import os
+import sys
+import tempfile
+import subprocess
+import pytest
+
+# Settings are read at import time; the job store goes to a scratch file
+os.environ.setdefault("GEMINI_API_KEY", "test")
+os.environ.setdefault("LANGFUSE_PUBLIC_KEY", "test")
+os.environ.setdefault("LANGFUSE_SECRET_KEY", "test")
+os.environ.setdefault("JOB_STORE_PATH", os.path.join(tempfile.mkdtemp(prefix="omni-test-"), "jobs.db"))
+os.environ.setdefault("WARM_UP_ON_STARTUP", "false")
+os.environ.setdefault("STORAGE_SWEEP_INTERVAL_SECONDS", "0")
+
+@pytest.fixture
+def dead_worker():
+    """Identity of a worker process that has exited."""
+    from src.services.job_store import process_identity
+
+    def make() -> str:
+        proc = subprocess.Popen([sys.executable, "-c", "import time; time.sleep(30)"])
+        worker = process_identity(proc.pid)
+        proc.kill()
+        proc.wait()
+        return worker
+    return make
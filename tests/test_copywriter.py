@@ -0,0 +1,33 @@
+import asyncio
+
+from src.agents import copywriter
+from src.agents.copywriter import BRIEF_LEVEL, CLIP_LEVEL, ClipStrategy
+from src.services.response_cache import ResponseCache
+
+def analysis(*spans) -> dict:
+    return {"main_topic": "drones", "clips": [{"start": s, "end": e} for s, e in spans]}
+
+def test_brief_and_clip_lookups_are_counted_separately(monkeypatch, tmp_path):
+    monkeypatch.setattr(copywriter, "copy_cache", ResponseCache(str(tmp_path), 1024 * 1024))
+
+    async def stream_clip(clip, main_topic, directives, on_event=None):
+        return ClipStrategy(clip_index=clip["clip_index"], duration_seconds=5, posts=[])
+
+    async def write_overall_strategy(prompt):
+        return "strategy"
+
+    monkeypatch.setattr(copywriter, "stream_clip", stream_clip)
+    monkeypatch.setattr(copywriter, "write_overall_strategy", write_overall_strategy)
+
+    async def run():
+        await copywriter.run_copywriting(analysis((0, 5), (5, 10)), mode="fanout")
+        # Whole brief cached: no clip lookups at all
+        await copywriter.run_copywriting(analysis((0, 5), (5, 10)), mode="fanout")
+        # New brief: two clips come from the clip level, one is written
+        await copywriter.run_copywriting(analysis((0, 5), (5, 10), (10, 15)), mode="fanout")
+    asyncio.run(run())
+
+    brief, clip = copywriter.copy_cache.stats(BRIEF_LEVEL), copywriter.copy_cache.stats(CLIP_LEVEL)
+    assert (brief["exact_hits"], brief["misses"]) == (1, 2)
+    assert (clip["exact_hits"], clip["misses"]) == (2, 3)
+    assert clip["hit_rate"] == 0.4
@@ -0,0 +1,44 @@
+import os
+import json
+import threading
+
+from fastapi.testclient import TestClient
+from src.api import main
+from src.services.job_store import process_identity
+
+def read_events(response) -> list:
+    events = []
+    for line in response.iter_lines():
+        if line.startswith("data: "):
+            events.append(json.loads(line[len("data: "):]))
+            if events[-1]["type"] in ("completed", "failed"):
+                break
+    return events
+
+def test_stream_ends_when_job_finishes_in_another_worker(monkeypatch):
+    """No publisher on this process's bus: status and completion must come from the job store."""
+    monkeypatch.setattr(main, "SSE_STORE_POLL", 0.05)
+    other = process_identity(os.getppid())
+    main.job_store.create({"job_id": "sse-other", "status": "QUEUED", "video_path": "x.mp4", "worker": other, "result": None})
+
+    def other_worker():
+        main.job_store.update("sse-other", status="RENDERING", active_stages=["RENDERING"])
+        main.job_store.update("sse-other", status="COMPLETED", result={"videos": []})
+
+    # The test client may buffer the whole body, so the other worker starts first
+    threading.Timer(0.2, other_worker).start()
+    with TestClient(main.app) as client:
+        with client.stream("GET", "/events/sse-other") as response:
+            events = read_events(response)
+
+    assert events[0]["type"] == "status" and events[0]["status"] == "QUEUED"
+    assert events[-1]["type"] == "completed"
+    assert events[-1]["result"] == {"videos": []}
+
+def test_finished_job_gets_terminal_event_only():
+    main.job_store.create({"job_id": "sse-done", "status": "FAILED", "video_path": "x.mp4", "error": "boom"})
+    with TestClient(main.app) as client:
+        with client.stream("GET", "/events/sse-done") as response:
+            events = read_events(response)
+    assert [e["type"] for e in events] == ["failed"]
+    assert events[0]["error"] == "boom"
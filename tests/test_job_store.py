@@ -0,0 +1,54 @@
+import os
+import time
+import pytest
+from fastapi.testclient import TestClient
+from src.api import main
+from src.services.job_store import WORKER_ID, InMemoryJobStore, SQLiteJobStore
+
+@pytest.fixture(params=["memory", "sqlite"])
+def store(request, tmp_path):
+    if request.param == "memory":
+        return InMemoryJobStore()
+    return SQLiteJobStore(str(tmp_path / "jobs.db"))
+
+def test_jobs_of_a_stopped_worker_are_failed(store, dead_worker):
+    store.create({"job_id": "dead", "status": "RENDERING", "worker": dead_worker()})
+    store.create({"job_id": "legacy", "status": "QUEUED"})
+    # Same pid as a live process but another start time: a restarted worker reusing the pid
+    store.create({"job_id": "reused", "status": "ANALYZING", "worker": f"{os.getpid()}:0"})
+    store.create({"job_id": "live", "status": "WRITING", "worker": WORKER_ID})
+    store.create({"job_id": "done", "status": "COMPLETED", "worker": dead_worker()})
+
+    assert store.recover_interrupted() == 3
+    for job_id in ("dead", "legacy", "reused"):
+        job = store.get(job_id)
+        assert job["status"] == "FAILED"
+        assert job["error"].startswith("Interrupted by restart")
+    assert store.get("live")["status"] == "WRITING"
+    assert store.get("done")["status"] == "COMPLETED"
+    assert [j["job_id"] for j in store.list_unfinished()] == ["live"]
+
+def test_idle_upload_sessions_expire(store, tmp_path):
+    stale, fresh = tmp_path / "stale.mp4", tmp_path / "fresh.mp4"
+    stale.write_bytes(b"partial")
+    fresh.write_bytes(b"partial")
+    store.create({"job_id": "stale", "status": "UPLOADING", "video_path": str(stale)})
+    store.create({"job_id": "fresh", "status": "UPLOADING", "video_path": str(fresh)})
+    # Uploads are resumable from any worker, so only idleness expires them
+    time.sleep(0.2)
+    os.utime(fresh)
+
+    assert store.recover_interrupted(upload_idle_seconds=0.1) == 1
+    assert store.get("stale")["status"] == "FAILED"
+    assert store.get("stale")["error"] == "Upload session expired"
+    assert store.get("fresh")["status"] == "UPLOADING"
+    # 0 keeps sessions forever
+    assert store.recover_interrupted(upload_idle_seconds=0) == 0
+
+def test_startup_fails_interrupted_jobs(dead_worker):
+    main.job_store.create({"job_id": "restart", "status": "RENDERING", "video_path": "x.mp4", "worker": dead_worker()})
+    with TestClient(main.app) as client:
+        job = client.get("/status/restart").json()
+        assert job["status"] == "FAILED"
+        with client.stream("GET", "/events/restart") as response:
+            assert "event: failed" in next(response.iter_lines())
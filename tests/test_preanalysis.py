@@ -0,0 +1,59 @@
+import os
+import subprocess
+import pytest
+from imageio_ffmpeg import get_ffmpeg_exe
+from src.core.config import settings
+from src.services import preanalysis
+
+@pytest.fixture
+def source(tmp_path) -> str:
+    path = str(tmp_path / "source.mp4")
+    subprocess.run(
+        [get_ffmpeg_exe(), "-y", "-loglevel", "error", "-f", "lavfi", "-i", "testsrc=d=4:s=320x240:r=15",
+         "-f", "lavfi", "-i", "sine=d=4", "-c:v", "libx264", "-preset", "ultrafast", "-c:a", "aac", "-shortest", path],
+        check=True
+    )
+    return path
+
+@pytest.fixture(autouse=True)
+def proxy_mode(monkeypatch, tmp_path):
+    monkeypatch.setattr(settings, "preanalysis_mode", "proxy")
+    monkeypatch.setattr(settings, "preanalysis_dir", str(tmp_path / "preanalysis"))
+
+def test_off_by_default():
+    assert type(settings).model_fields["preanalysis_mode"].default == "off"
+
+def test_variant_follows_settings(monkeypatch):
+    variant = preanalysis.preanalysis_variant()
+    for name, value in [
+        ("preanalysis_fps", 2.0), ("scene_cut_threshold", 0.5), ("proxy_height", 240),
+        ("proxy_fps", 10), ("proxy_crf", 28), ("preanalysis_candidates", 5),
+    ]:
+        with monkeypatch.context() as m:
+            m.setattr(settings, name, value)
+            assert preanalysis.preanalysis_variant() != variant, name
+    assert preanalysis.preanalysis_variant() == variant
+
+def test_reused_until_a_setting_changes(monkeypatch, source):
+    first = preanalysis.run_preanalysis(source, "abc")
+    assert os.path.exists(first.proxy_path)
+    assert preanalysis.run_preanalysis(source, "abc") == first
+
+    monkeypatch.setattr(settings, "proxy_height", 120)
+    second = preanalysis.run_preanalysis(source, "abc")
+    assert second.variant != first.variant
+    assert second.proxy_path != first.proxy_path
+
+def test_cache_is_evicted_beyond_its_cap(monkeypatch, source):
+    first = preanalysis.run_preanalysis(source, "first")
+    size = os.path.getsize(first.proxy_path)
+    monkeypatch.setattr(settings, "preanalysis_cache_max_bytes", size + 1024)
+
+    second = preanalysis.run_preanalysis(source, "second")
+    assert not os.path.exists(first.proxy_path)
+    assert os.path.exists(second.proxy_path)
+    names = os.listdir(settings.preanalysis_dir)
+    assert sum(os.path.getsize(os.path.join(settings.preanalysis_dir, n)) for n in names) <= size + 1024
+    # An index whose proxy is gone is rebuilt, not reused
+    assert preanalysis.run_preanalysis(source, "first").proxy_path == first.proxy_path
+    assert os.path.exists(first.proxy_path)
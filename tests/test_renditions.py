@@ -0,0 +1,59 @@
+import os
+import subprocess
+import pytest
+from imageio_ffmpeg import get_ffmpeg_exe
+from src.core.config import settings
+from src.services import renditions, video_proc
+from src.services.renditions import RenditionCache, rendition_profiles
+
+@pytest.fixture(scope="module")
+def source(tmp_path_factory) -> str:
+    path = str(tmp_path_factory.mktemp("source") / "source.mp4")
+    subprocess.run(
+        [get_ffmpeg_exe(), "-y", "-loglevel", "error", "-f", "lavfi", "-i", "testsrc=d=2:s=640x360:r=15",
+         "-f", "lavfi", "-i", "sine=d=2", "-c:v", "libx264", "-preset", "ultrafast", "-c:a", "aac", "-shortest", path],
+        check=True
+    )
+    return path
+
+@pytest.fixture
+def cache(monkeypatch, tmp_path) -> RenditionCache:
+    cache = RenditionCache(str(tmp_path / "renditions"), 1024 ** 3)
+    monkeypatch.setattr(renditions, "_cache", cache)
+    # A fourth platform identical to youtube must not cost a fourth encode
+    monkeypatch.setattr(settings, "rendition_profiles", {"shorts": renditions.DEFAULT_PROFILES["youtube"]})
+    return cache
+
+def plan(source: str, job_id: str, output_root: str):
+    output_base = os.path.join(output_root, job_id)
+    os.makedirs(output_base, exist_ok=True)
+    duration, size = video_proc.probe_source(source)
+    plans = video_proc.plan_clips([{"start": "00:00", "end": "00:01"}], duration, job_id, output_base, source_hash="abc")
+    hits = video_proc.plan_renditions(plans, job_id, output_base, "abc", rendition_profiles())
+    return plans, size, hits
+
+def test_ladder_is_off_by_default():
+    assert type(settings).model_fields["rendition_ladder"].default is False
+
+def test_each_distinct_profile_is_encoded_once_then_cached(source, cache, tmp_path):
+    profiles = rendition_profiles()
+    distinct = {p.model_dump_json() for p in profiles.values()}
+    assert len(profiles) == 4 and len(distinct) == 3
+
+    plans, size, hits = plan(source, "first", str(tmp_path / "out"))
+    assert hits == 0
+    assert len(plans[0].outputs) == len(distinct)
+    result = video_proc.render_clip(source, plans[0], size)
+    assert result["stats"]["frames"] > 0
+    assert set(result["renditions"]) == set(profiles)
+    for name in profiles:
+        assert os.path.getsize(tmp_path / "out" / "first" / f"short_1_{name}.mp4") > 0
+
+    # Same clip again: every rendition comes from the cache, nothing is left to encode
+    plans, size, hits = plan(source, "second", str(tmp_path / "out"))
+    assert hits == len(distinct)
+    assert plans[0].outputs == []
+    assert "stats" not in video_proc.render_clip(source, plans[0], size)
+    for name in profiles:
+        assert os.path.getsize(tmp_path / "out" / "second" / f"short_1_{name}.mp4") > 0
+    assert os.path.exists(tmp_path / "out" / "second" / "short_1.mp4")
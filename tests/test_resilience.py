@@ -0,0 +1,168 @@
+import time
+import asyncio
+from types import SimpleNamespace
+import pytest
+from src.api import main
+from src.core.config import settings
+from src.core.resilience import CallPolicy, CircuitOpenError, DeadlineExceeded, Guard, deadline
+from src.services.scheduler import StageScheduler
+
+class HTTPError(Exception):
+    """Shaped like google-genai / qdrant-client errors: status_code plus response headers."""
+
+    def __init__(self, status_code: int, retry_after: float = None):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+        headers = {"retry-after": str(retry_after)} if retry_after else {}
+        self.response = SimpleNamespace(status_code=status_code, headers=headers)
+
+class Endpoint:
+    """Fails with the queued errors first, then answers "ok"."""
+
+    def __init__(self, *errors: Exception, latency: float = 0):
+        self.errors = list(errors)
+        self.latency = latency
+        self.calls = []
+
+    async def __call__(self):
+        self.calls.append(time.monotonic())
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        if self.errors:
+            raise self.errors.pop(0)
+        return "ok"
+
+@pytest.fixture(autouse=True)
+def fast_retries(monkeypatch):
+    monkeypatch.setattr(settings, "resilience_enabled", True)
+    monkeypatch.setattr(settings, "call_max_attempts", 4)
+    monkeypatch.setattr(settings, "call_retry_base_delay", 0.01)
+    monkeypatch.setattr(settings, "call_retry_max_delay", 0.05)
+    monkeypatch.setattr(settings, "call_deadline_seconds", 5)
+    monkeypatch.setattr(settings, "circuit_failure_threshold", 2)
+    monkeypatch.setattr(settings, "circuit_cooldown_seconds", 0.2)
+
+def guard() -> Guard:
+    return Guard("test", CallPolicy())
+
+def test_transient_errors_are_retried():
+    endpoint = Endpoint(HTTPError(503), HTTPError(500))
+    g = guard()
+    assert asyncio.run(g.call(endpoint)) == "ok"
+    assert len(endpoint.calls) == 3
+    assert g.state == "closed" and g.failures == 0
+
+def test_rate_limit_waits_for_retry_after():
+    endpoint = Endpoint(HTTPError(429, retry_after=0.3))
+    assert asyncio.run(guard().call(endpoint)) == "ok"
+    assert endpoint.calls[1] - endpoint.calls[0] >= 0.3
+
+def test_client_errors_are_not_retried():
+    endpoint = Endpoint(HTTPError(400))
+    g = guard()
+    with pytest.raises(HTTPError):
+        asyncio.run(g.call(endpoint))
+    assert len(endpoint.calls) == 1
+    assert g.failures == 0
+
+def test_retries_stop_after_max_attempts():
+    endpoint = Endpoint(*[HTTPError(503)] * 10)
+    with pytest.raises(HTTPError):
+        asyncio.run(Guard("other", CallPolicy()).call(endpoint))
+    assert len(endpoint.calls) == settings.call_max_attempts
+
+def test_circuit_opens_then_probe_closes_it(monkeypatch):
+    monkeypatch.setattr(settings, "call_max_attempts", 1)
+    g = guard()
+
+    async def run():
+        for _ in range(2):
+            with pytest.raises(HTTPError):
+                await g.call(Endpoint(HTTPError(503)))
+        assert g.state == "open"
+
+        # Held back, not failed, until the cooldown ends; the probe then closes the circuit
+        endpoint = Endpoint()
+        t0 = time.monotonic()
+        assert await g.call(endpoint) == "ok"
+        assert endpoint.calls[0] - t0 >= 0.15
+        assert g.state == "closed"
+
+    asyncio.run(run())
+
+def test_failed_probe_reopens_circuit(monkeypatch):
+    monkeypatch.setattr(settings, "call_max_attempts", 1)
+    g = guard()
+
+    async def run():
+        for _ in range(2):
+            with pytest.raises(HTTPError):
+                await g.call(Endpoint(HTTPError(503)))
+        await asyncio.sleep(0.25)
+        with pytest.raises(HTTPError):
+            await g.call(Endpoint(HTTPError(503)))
+        assert g.state == "open"
+
+    asyncio.run(run())
+
+def test_open_circuit_fails_fast_past_the_deadline(monkeypatch):
+    monkeypatch.setattr(settings, "call_max_attempts", 1)
+    monkeypatch.setattr(settings, "circuit_cooldown_seconds", 30)
+    g = guard()
+
+    async def run():
+        for _ in range(2):
+            with pytest.raises(HTTPError):
+                await g.call(Endpoint(HTTPError(503)))
+        endpoint = Endpoint()
+        with deadline(1):
+            with pytest.raises(CircuitOpenError):
+                await g.call(endpoint)
+        assert endpoint.calls == []
+
+    asyncio.run(run())
+
+def test_deadline_cut_off_is_not_an_endpoint_failure():
+    g = guard()
+
+    async def run():
+        for _ in range(3):
+            with deadline(0.05):
+                with pytest.raises(DeadlineExceeded):
+                    await g.call(Endpoint(latency=1))
+
+    asyncio.run(run())
+    assert g.state == "closed"
+    assert g.failures == 0
+    assert g.in_flight == 0
+
+def test_retries_end_at_the_deadline():
+    endpoint = Endpoint(*[HTTPError(503, retry_after=0.5)] * 3)
+    t0 = time.monotonic()
+
+    async def run():
+        with deadline(0.3):
+            await guard().call(endpoint)
+
+    with pytest.raises(HTTPError):
+        asyncio.run(run())
+    assert len(endpoint.calls) == 1
+    assert time.monotonic() - t0 < 0.3
+
+def test_stage_deadline_starts_when_the_slot_is_taken(monkeypatch):
+    """Time queued behind another job's stage must not count against the call deadline."""
+    monkeypatch.setattr(settings, "stage_deadline_seconds", 0.3)
+    monkeypatch.setattr(main, "scheduler", StageScheduler(concurrency={"write": 1}, max_pending=4))
+    for job_id in ("first", "second"):
+        main.job_store.create({"job_id": job_id, "status": "QUEUED", "video_path": "x.mp4"})
+    g = guard()
+
+    async def stage():
+        return await g.call(Endpoint(latency=0.2))
+
+    async def run():
+        return await asyncio.gather(
+            main.run_stage("first", "write", stage), main.run_stage("second", "write", stage)
+        )
+
+    assert asyncio.run(run()) == ["ok", "ok"]
@@ -0,0 +1,52 @@
+import os
+import time
+from src.services.job_store import InMemoryJobStore, process_identity
+from src.services.storage import StorageManager
+
+def write(path, size: int = 100, age: float = 0):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(b"x" * size)
+    if age:
+        t = time.time() - age
+        os.utime(path, (t, t))
+
+def manager(tmp_path, store, **kwargs) -> StorageManager:
+    return StorageManager(
+        str(tmp_path / "temp"), [str(tmp_path / "output")], retention_seconds={"source": 60, "renders": 60},
+        job_lookup=store.get, **kwargs
+    )
+
+def test_unfinished_jobs_lose_protection_when_orphaned_or_stale(tmp_path, dead_worker):
+    store = InMemoryJobStore()
+    live = process_identity(os.getppid())
+    store.create({"job_id": "live", "status": "RENDERING", "worker": live})
+    store.create({"job_id": "orphan", "status": "RENDERING", "worker": dead_worker()})
+    store.create({"job_id": "stale", "status": "RENDERING", "worker": live})
+    store._jobs["stale"]["updated_at"] -= 3600
+    for job_id in ("live", "orphan", "stale"):
+        write(str(tmp_path / "temp" / f"{job_id}_source.mp4"), age=120)
+
+    report = manager(tmp_path, store, stale_seconds=600).sweep()
+
+    assert sorted(os.listdir(tmp_path / "temp")) == ["live_source.mp4"]
+    assert report.protected_jobs == 1
+
+def test_caches_are_reported_next_to_the_quota(tmp_path):
+    store = InMemoryJobStore()
+    store.create({"job_id": "job", "status": "COMPLETED"})
+    write(str(tmp_path / "output" / "job" / "short_1.mp4"), size=1000)
+    write(str(tmp_path / "data" / "analysis" / "a.json"), size=300)
+    # A cached rendition hardlinked into the job folder is counted once, with the renders
+    os.makedirs(tmp_path / "data" / "renditions")
+    os.link(tmp_path / "output" / "job" / "short_1.mp4", tmp_path / "data" / "renditions" / "k.mp4")
+    write(str(tmp_path / "data" / "renditions" / "other.mp4"), size=500)
+
+    report = manager(tmp_path, store, caches={
+        "analysis": (str(tmp_path / "data" / "analysis"), 10_000),
+        "renditions": (str(tmp_path / "data" / "renditions"), 10_000),
+        "copy": (str(tmp_path / "data" / "missing"), 10_000),
+    }).sweep()
+
+    assert report.usage_bytes["renders"] == 1000
+    assert report.cache_bytes == {"analysis": 300, "renditions": 500, "copy": 0}
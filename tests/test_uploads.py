@@ -0,0 +1,37 @@
+import os
+import asyncio
+
+import httpx
+from src.api import main
+
+async def concurrent_patches() -> tuple:
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        upload_id = (await client.post("/uploads", data={"filename": "clip.mp4"})).json()["upload_id"]
+        url = f"/uploads/{upload_id}"
+        release = asyncio.Event()
+
+        async def slow_body():
+            yield b"a" * 10
+            await release.wait()
+            yield b"b" * 10
+
+        first = asyncio.create_task(client.patch(url, content=slow_body(), headers={"Upload-Offset": "0"}))
+        await asyncio.sleep(0.1)
+        # Same offset while the first PATCH is still writing
+        second = await asyncio.wait_for(client.patch(url, content=b"c" * 10, headers={"Upload-Offset": "0"}), 5)
+        release.set()
+        first = await first
+        after = await client.patch(url, content=b"d" * 10, headers={"Upload-Offset": "0"})
+        return upload_id, first, second, after
+
+def test_concurrent_patch_at_same_offset_is_rejected():
+    upload_id, first, second, after = asyncio.run(concurrent_patches())
+
+    assert second.status_code == 423
+    assert first.status_code == 200 and first.json()["offset"] == 20
+    # Once the writer is done the usual offset check applies
+    assert after.status_code == 409 and after.json()["detail"] == {"offset": 20}
+    with open(main.job_store.get(upload_id)["video_path"], "rb") as f:
+        assert f.read() == b"a" * 10 + b"b" * 10
+    os.remove(main.job_store.get(upload_id)["video_path"])
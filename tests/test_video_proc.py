@@ -0,0 +1,39 @@
+import os
+import subprocess
+import pytest
+from imageio_ffmpeg import get_ffmpeg_exe
+from src.core.config import settings
+from src.services import video_proc
+
+def make_source(path: str, audio_codec: str) -> str:
+    subprocess.run(
+        [get_ffmpeg_exe(), "-y", "-loglevel", "error", "-f", "lavfi", "-i", "testsrc=d=3:s=320x240:r=15",
+         "-f", "lavfi", "-i", "sine=d=3", "-c:v", "libx264", "-preset", "ultrafast", "-g", "15",
+         "-c:a", audio_codec, "-shortest", path],
+        check=True
+    )
+    return path
+
+@pytest.mark.parametrize("container, audio_codec, copied", [
+    ("mkv", "pcm_s16le", False),
+    ("mkv", "libvorbis", False),
+    ("mkv", "libopus", False),
+    ("mp4", "aac", True),
+])
+def test_fast_mode_copies_only_mp4_compatible_audio(monkeypatch, tmp_path, container, audio_codec, copied):
+    monkeypatch.setattr(settings, "video_extract_mode", "fast")
+    monkeypatch.setattr(settings, "rendition_ladder", False)
+    source = make_source(str(tmp_path / f"source.{container}"), audio_codec)
+
+    assert (video_proc.probe_audio_codec(source) in video_proc.MP4_AUDIO_CODECS) == copied
+    results = video_proc.process_video_segments(
+        source, [{"start": "00:00", "end": "00:02"}], "job", output_root=str(tmp_path / "out"), max_workers=1
+    )
+
+    assert len(results) == 1
+    assert video_proc.probe_audio_codec(str(tmp_path / "out" / "job" / "short_1.mp4")) == "aac"
+
+def test_source_without_audio(tmp_path):
+    path = str(tmp_path / "silent.mp4")
+    subprocess.run([get_ffmpeg_exe(), "-y", "-loglevel", "error", "-f", "lavfi", "-i", "testsrc=d=1", path], check=True)
+    assert video_proc.probe_audio_codec(path) is None
@@ -0,0 +1,26 @@
+from src.api import main
+
+def status(job_id: str) -> tuple:
+    job = main.job_store.get(job_id)
+    return job["status"], job["active_stages"]
+
+def test_status_follows_the_earliest_running_stage():
+    main.job_store.create({"job_id": "stages", "status": "QUEUED", "video_path": "x.mp4"})
+
+    main.enter_stage("stages", "render")
+    main.enter_stage("stages", "write")
+    assert status("stages") == ("WRITING", ["RENDERING", "WRITING"])
+
+    main.enter_stage("stages", "remember")
+    main.leave_stage("stages", "write")
+    # Memory save started later but rendering is still the work holding the job back
+    assert status("stages") == ("RENDERING", ["RENDERING", "REMEMBERING"])
+
+    main.leave_stage("stages", "render")
+    assert status("stages") == ("REMEMBERING", ["REMEMBERING"])
+
+    main.job_store.update("stages", status="COMPLETED")
+    main.leave_stage("stages", "remember")
+    assert status("stages") == ("COMPLETED", [])
+    main.active_stages.pop("stages", None)
+    main.stage_timings.pop("stages", None)
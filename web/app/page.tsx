@@ -176,6 +176,23 @@ export default function Home() {
                               UNIT_SHORT_IDX_{i + 1}
                             </div>
 
+                            {/* Per-platform renditions (aspect / bitrate ladder) */}
+                            {video.renditions && (
+                              <div className="absolute top-6 right-6 flex gap-2">
+                                {Object.entries(video.renditions).map(([platform, url]: [string, any]) => (
+                                  <a
+                                    key={platform}
+                                    href={`http://localhost:8000${url}`}
+                                    target="_blank"
+                                    rel="noreferrer"
+                                    className="bg-black/70 backdrop-blur-lg text-zinc-300 text-[8px] font-black px-3 py-1.5 rounded-lg uppercase tracking-widest border border-white/10 hover:border-red-600 hover:text-white transition-colors"
+                                  >
+                                    {platform}
+                                  </a>
+                                ))}
+                              </div>
+                            )}
+
                             {/* Corner deco on player */}
                             <div className="absolute bottom-6 right-6 flex gap-2">
                               <div className="w-1 h-8 bg-white/10" />
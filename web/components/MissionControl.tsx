@@ -14,10 +14,12 @@ import {
 
 type MissionStatus =
   | "idle"
+  | "uploading"
   | "analyzing"
   | "writing"
   | "rendering"
   | "distributing"
+  | "remembering"
   | "completed"
   | "failed";
 
@@ -32,6 +34,8 @@ export default function MissionControl({
   const [error, setError] = useState<string | null>(null);
   const [thought, setThought] = useState<string>("SYSTEM_READY_FOR_DEPLOYMENT");
   const [directives, setDirectives] = useState<string>("");
+  const [renderProgress, setRenderProgress] = useState<Record<number, number>>({});
+  const [copyDrafts, setCopyDrafts] = useState<Record<number, any[]>>({});
 
   const thoughts = [
     "ANALYZING_VISUAL_FREQUENCIES...",
@@ -57,42 +61,110 @@ export default function MissionControl({
   const startMission = async () => {
     if (!file) return;
     setError(null);
-    setStatus("analyzing");
+    setRenderProgress({});
+    setCopyDrafts({});
+    setStatus("uploading");
 
-    const formData = new FormData();
-    formData.append("file", file);
+    // Raw body upload: streamed straight to disk on the server (no multipart spooling)
+    const params = new URLSearchParams({ filename: file.name });
     if (directives) {
-      formData.append("directives", directives);
+      params.append("directives", directives);
     }
 
     try {
-      const response = await fetch("http://localhost:8000/upload", {
-        method: "POST",
-        body: formData,
-      });
+      const response = await fetch(
+        `http://localhost:8000/upload/stream?${params.toString()}`,
+        {
+          method: "POST",
+          headers: { "Content-Type": file.type || "application/octet-stream" },
+          body: file,
+        },
+      );
 
+      if (response.status === 429)
+        throw new Error("Factory at capacity. Retry shortly.");
+      if (response.status === 413)
+        throw new Error("Source material exceeds upload limit.");
+      if (response.status === 415)
+        throw new Error("Source material is not a video container.");
       if (!response.ok)
         throw new Error("Neural link rejected source material.");
 
       const data = await response.json();
       setJobId(data.job_id);
-      pollStatus(data.job_id);
+      watchMission(data.job_id);
     } catch (err: any) {
       setError(err.message);
       setStatus("failed");
     }
   };
 
+  const applyStatus = (data: any) => {
+    if (data.status === "UPLOADING") setStatus("uploading");
+    if (data.status === "QUEUED" || data.status === "PREPARING" || data.status === "ANALYZING") setStatus("analyzing");
+    if (data.status === "WRITING") setStatus("writing");
+    if (data.status === "RENDERING") setStatus("rendering");
+    if (data.status === "DISTRIBUTING") setStatus("distributing");
+    if (data.status === "REMEMBERING") setStatus("remembering");
+  };
+
+  // Server push: status, per-clip render progress and final result over SSE
+  const watchMission = (id: string) => {
+    const source = new EventSource(`http://localhost:8000/events/${id}`);
+    let finished = false;
+
+    source.addEventListener("status", (e) => {
+      applyStatus(JSON.parse((e as MessageEvent).data));
+    });
+
+    source.addEventListener("render_progress", (e) => {
+      const data = JSON.parse((e as MessageEvent).data);
+      setRenderProgress((prev) => ({ ...prev, [data.clip]: data.percent }));
+    });
+
+    // Fan-out copywriting: posts per clip arrive while the rest of the brief is still being written
+    source.addEventListener("copy_partial", (e) => {
+      const data = JSON.parse((e as MessageEvent).data);
+      setCopyDrafts((prev) => ({ ...prev, [data.clip]: data.posts }));
+    });
+
+    source.addEventListener("copy_ready", (e) => {
+      const data = JSON.parse((e as MessageEvent).data);
+      setCopyDrafts((prev) => ({ ...prev, [data.clip]: data.strategy.posts }));
+    });
+
+    source.addEventListener("completed", (e) => {
+      const data = JSON.parse((e as MessageEvent).data);
+      finished = true;
+      source.close();
+      setStatus("completed");
+      onComplete(data.result);
+    });
+
+    source.addEventListener("failed", (e) => {
+      const data = JSON.parse((e as MessageEvent).data);
+      finished = true;
+      source.close();
+      setError(data.error);
+      setStatus("failed");
+    });
+
+    source.onerror = () => {
+      // Stream unavailable (proxy, old server): fall back to polling
+      if (!finished) {
+        source.close();
+        pollStatus(id);
+      }
+    };
+  };
+
   const pollStatus = (id: string) => {
     const interval = setInterval(async () => {
       try {
         const res = await fetch(`http://localhost:8000/status/${id}`);
         const data = await res.json();
 
-        if (data.status === "ANALYZING") setStatus("analyzing");
-        if (data.status === "WRITING") setStatus("writing");
-        if (data.status === "RENDERING") setStatus("rendering");
-        if (data.status === "DISTRIBUTING") setStatus("distributing");
+        applyStatus(data);
 
         if (data.status === "COMPLETED") {
           setStatus("completed");
@@ -111,6 +183,12 @@ export default function MissionControl({
     }, 2000);
   };
 
+  const renderPercent = () => {
+    const values = Object.values(renderProgress);
+    if (values.length === 0) return "";
+    return ` ${Math.round(values.reduce((a, b) => a + b, 0) / values.length)}%`;
+  };
+
   return (
     <div className="flex flex-col gap-6">
       {/* SCANNER AREA */}
@@ -221,10 +299,12 @@ export default function MissionControl({
               Initiate Sequence
             </>
           )}
+          {status === "uploading" && "UPLINK: SOURCE_TRANSFER..."}
           {status === "analyzing" && "GEMINI: NEURAL_MAPPING..."}
           {status === "writing" && "AGENT: CONTENT_GENERATION..."}
-          {status === "rendering" && "SYSTEM: FFMPEG_SYNTHESIS..."}
+          {status === "rendering" && `SYSTEM: FFMPEG_SYNTHESIS...${renderPercent()}`}
           {status === "distributing" && "MCP: ASSET_DISTRIBUTION..."}
+          {status === "remembering" && "QDRANT: MEMORY_SYNC..."}
           {status === "completed" && "MISSION_COMPLETE"}
           {status === "failed" && "CRITICAL_ERROR"}
 
@@ -300,16 +380,32 @@ export default function MissionControl({
                 </div>
               )}
 
+              {Object.keys(copyDrafts).length > 0 && status !== "completed" && (
+                <div className="space-y-1 text-[10px] text-zinc-500">
+                  {Object.entries(copyDrafts).map(([clip, posts]) => (
+                    <div key={clip} className="truncate">
+                      <span className="text-red-700 font-black">CLIP_{clip}</span>{" "}
+                      {(posts || [])
+                        .filter((p: any) => p && p.platform)
+                        .map((p: any) => `${p.platform}: ${(p.content || "").slice(0, 60)}`)
+                        .join(" | ")}
+                    </div>
+                  ))}
+                </div>
+              )}
+
               {status !== "failed" && (
                 <div className="w-full h-1 bg-zinc-900 rounded-full overflow-hidden">
                   <div
-                    className={`h-full bg-red-700 transition-all duration-1000 ${status === "analyzing"
+                    className={`h-full bg-red-700 transition-all duration-1000 ${status === "uploading"
+                      ? "w-[10%]"
+                      : status === "analyzing"
                       ? "w-1/4"
                       : status === "writing"
                         ? "w-1/2"
                         : status === "rendering"
                           ? "w-3/4"
-                          : status === "distributing"
+                          : status === "distributing" || status === "remembering"
                             ? "w-[90%]"
                             : status === "completed"
                               ? "w-full"